@@ -29,7 +29,8 @@ export function getExpressTrace(orderId) {
 export function getExpressWaybill(orderId) {
   return request({
     url: `/express/admin/waybill/${orderId}/`,
-    method: 'get'
+    method: 'get',
+    responseType: 'blob'
   })
 }
 
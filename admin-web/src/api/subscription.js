@@ -15,6 +15,11 @@ export function confirmDelivery(id) {
   return request.post(`/admin/subscriptions/${id}/confirm_delivery/`)
 }
 
+// 批量确认配送
+export function batchConfirmDelivery(subscriptionIds) {
+  return request.post('/admin/subscriptions/batch-confirm-delivery/', { subscription_ids: subscriptionIds })
+}
+
 // 暂停订阅
 export function pauseSubscription(id) {
   return request.post(`/admin/subscriptions/${id}/pause/`)
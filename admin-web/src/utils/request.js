@@ -40,7 +40,8 @@ request.interceptors.response.use(
         ElMessage.error('请求的资源不存在')
       } else if (status === 500) {
         ElMessage.error('服务器错误')
-      } else {
+      } else if (!(data instanceof Blob)) {
+        // blob 请求的错误信息由调用方解析后提示
         ElMessage.error(data.detail || data.message || '请求失败')
       }
     } else {
@@ -0,0 +1,62 @@
+"""
+评论模块 - 产品评分汇总维护
+"""
+from django.db.models import F
+
+from apps.products.models import Product
+
+
+def _clamp_rating(rating) -> int:
+    """评分限制在1-5之间"""
+    return min(5, max(1, int(rating)))
+
+
+def apply_rating(product_id, rating, delta: int) -> None:
+    """
+    增量更新产品评分汇总
+
+    Args:
+        product_id: 产品ID
+        rating: 评分 1-5
+        delta: +1 计入，-1 移除
+    """
+    if not product_id or not delta:
+        return
+    rating = _clamp_rating(rating)
+    star_field = f'rating_{rating}_count'
+    Product.objects.filter(pk=product_id).update(**{
+        'rating_sum': F('rating_sum') + rating * delta,
+        'rating_count': F('rating_count') + delta,
+        star_field: F(star_field) + delta,
+    })
+
+
+def rating_snapshot(comment):
+    """
+    评论对评分汇总的贡献 (product_id, rating)，未审核的评论不计入
+
+    Args:
+        comment: 评论
+
+    Returns:
+        tuple | None
+    """
+    if comment is None or not comment.is_approved:
+        return None
+    return comment.product_id, comment.rating
+
+
+def sync_rating(before, after) -> None:
+    """
+    根据评论变更前后的贡献差异更新评分汇总
+
+    Args:
+        before: 变更前 rating_snapshot
+        after: 变更后 rating_snapshot
+    """
+    if before == after:
+        return
+    if before:
+        apply_rating(before[0], before[1], -1)
+    if after:
+        apply_rating(after[0], after[1], 1)
@@ -4,13 +4,31 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.db.models import F
 from django.utils import timezone
 from .models import Comment, CommentLike
 from .serializers import CommentSerializer, CommentCreateSerializer
+from .services import apply_rating, rating_snapshot, sync_rating
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class RatingSyncMixin:
+    """评论增删改时同步产品评分汇总"""
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        before = rating_snapshot(serializer.instance)
+        comment = serializer.save()
+        sync_rating(before, rating_snapshot(comment))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        before = rating_snapshot(instance)
+        instance.delete()
+        sync_rating(before, None)
+
+
+class CommentViewSet(RatingSyncMixin, viewsets.ModelViewSet):
     """评论视图集"""
     queryset = Comment.objects.filter(is_approved=True)
 
@@ -31,12 +49,14 @@ class CommentViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(product_id=product_id)
         return queryset
 
+    @transaction.atomic
     def perform_create(self, serializer):
         if self.request.user.is_authenticated:
-            serializer.save(user=self.request.user)
+            comment = serializer.save(user=self.request.user)
         else:
             # 对于匿名用户，需要在序列化器中处理
-            serializer.save()
+            comment = serializer.save()
+        sync_rating(None, rating_snapshot(comment))
 
     @action(detail=False, methods=['get'])
     def my(self, request):
@@ -68,7 +88,7 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Response({'message': '取消点赞', 'likes': max(0, comment.likes - 1)})
 
 
-class AdminCommentViewSet(viewsets.ModelViewSet):
+class AdminCommentViewSet(RatingSyncMixin, viewsets.ModelViewSet):
     """管理员评论视图集"""
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
@@ -129,16 +149,26 @@ class AdminCommentViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         """审核通过"""
         comment = self.get_object()
-        comment.is_approved = True
-        comment.save()
+        with transaction.atomic():
+            # 条件更新，重复审核不会重复计入评分汇总
+            changed = Comment.objects.filter(
+                pk=comment.pk, is_approved=False
+            ).update(is_approved=True)
+            if changed:
+                apply_rating(comment.product_id, comment.rating, 1)
         return Response({'message': '审核通过'})
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         """审核拒绝"""
         comment = self.get_object()
-        comment.is_approved = False
-        comment.save()
+        with transaction.atomic():
+            # 条件更新，重复审核不会重复计入评分汇总
+            changed = Comment.objects.filter(
+                pk=comment.pk, is_approved=True
+            ).update(is_approved=False)
+            if changed:
+                apply_rating(comment.product_id, comment.rating, -1)
         return Response({'message': '审核拒绝'})
 
     @action(detail=True, methods=['post'])
@@ -0,0 +1 @@
+# apps/common/__init__.py
@@ -0,0 +1,166 @@
+"""
+HTTP 传输层 - 测试
+
+用线程中运行的本地 HTTP 服务模拟第三方接口。
+"""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from . import transport as transport_module
+from .transport import CircuitOpenError, HTTPTransport, TransportError, get_transport, transport_stats
+
+TEST_CONFIG = {
+    'CONNECT_TIMEOUT': 1,
+    'READ_TIMEOUT': 1,
+    'POOL_SIZE': 2,
+    'RETRIES': 2,
+    'BACKOFF': 0,
+    'FAILURE_THRESHOLD': 2,
+    'RECOVERY_TIMEOUT': 0.2,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.client_ports.append(self.client_address[1])
+            status = server.statuses.pop(0) if server.statuses else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.client_ports = []
+        self.statuses = []
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/api'
+
+
+def unused_url() -> str:
+    """没有服务监听的地址（连接被拒绝）"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/api'
+
+
+class HTTPTransportTest(SimpleTestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def make_transport(self, **config) -> HTTPTransport:
+        transport = HTTPTransport('stub', {**TEST_CONFIG, **config})
+        self.addCleanup(transport.session.close)
+        return transport
+
+    def test_connection_reused(self):
+        transport = self.make_transport()
+        for _ in range(5):
+            self.assertEqual(transport.get(self.server.url).status_code, 200)
+        self.assertEqual(len(self.server.client_ports), 5)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_retry_on_server_error(self):
+        self.server.statuses = [502, 503]
+        transport = self.make_transport(FAILURE_THRESHOLD=10)
+        response = transport.get(self.server.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.client_ports), 3)
+        self.assertEqual(transport.stats.snapshot()['errors'], 2)
+
+    def test_server_error_returned_after_retries(self):
+        self.server.statuses = [500, 500, 500]
+        transport = self.make_transport(FAILURE_THRESHOLD=10)
+        self.assertEqual(transport.get(self.server.url).status_code, 500)
+        self.assertEqual(len(self.server.client_ports), 3)
+
+    def test_post_not_retried_on_server_error(self):
+        self.server.statuses = [500]
+        transport = self.make_transport(FAILURE_THRESHOLD=10)
+        self.assertEqual(transport.post(self.server.url).status_code, 500)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_retry_on_connection_error(self):
+        transport = self.make_transport(FAILURE_THRESHOLD=10)
+        with self.assertRaises(TransportError):
+            transport.get(unused_url())
+        self.assertEqual(transport.stats.snapshot()['calls'], 3)
+        self.assertEqual(transport.stats.snapshot()['errors'], 3)
+
+    def test_circuit_opens_and_recovers(self):
+        self.server.statuses = [500, 500]
+        transport = self.make_transport(RETRIES=0)
+        transport.get(self.server.url)
+        self.assertEqual(transport.breaker.state, 'closed')
+        transport.get(self.server.url)
+        self.assertEqual(transport.breaker.state, 'open')
+
+        # 熔断中不发出请求
+        with self.assertRaises(CircuitOpenError):
+            transport.get(self.server.url)
+        self.assertEqual(len(self.server.client_ports), 2)
+
+        time.sleep(0.25)
+        self.assertEqual(transport.breaker.state, 'half_open')
+        self.assertEqual(transport.get(self.server.url).status_code, 200)
+        self.assertEqual(transport.breaker.state, 'closed')
+        self.assertEqual(len(self.server.client_ports), 3)
+
+    def test_failed_probe_reopens_circuit(self):
+        self.server.statuses = [500, 500, 500]
+        transport = self.make_transport(RETRIES=0)
+        transport.get(self.server.url)
+        transport.get(self.server.url)
+
+        time.sleep(0.25)
+        self.assertEqual(transport.get(self.server.url).status_code, 500)
+        self.assertEqual(transport.breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            transport.get(self.server.url)
+        self.assertEqual(len(self.server.client_ports), 3)
+
+    def test_half_open_allows_single_probe(self):
+        transport = self.make_transport(RETRIES=0)
+        transport.breaker.record_failure()
+        transport.breaker.record_failure()
+        time.sleep(0.25)
+        self.assertTrue(transport.breaker.allow())
+        self.assertFalse(transport.breaker.allow())
+
+    def test_transport_stats(self):
+        transport = get_transport(self.server.url)
+        self.addCleanup(transport.session.close)
+        self.addCleanup(transport_module._transports.pop, transport.host, None)
+        transport.get(self.server.url)
+        stats = transport_stats()[transport.host]
+        self.assertGreaterEqual(stats['calls'], 1)
+        self.assertEqual(stats['circuit'], 'closed')
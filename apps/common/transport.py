@@ -0,0 +1,231 @@
+"""
+第三方接口 HTTP 传输层（快递、微信等共用）
+
+每个目标主机共用一个带连接池的 requests.Session（长连接复用），区分连接超时和读取超时；
+幂等请求失败时按抖动退避重试；连续失败达到阈值后熔断，一段时间内直接失败，
+避免承运商故障时拖慢所有请求；每次调用记录耗时。
+
+配置 (settings.HTTP_TRANSPORT):
+    CONNECT_TIMEOUT: 连接超时（秒），默认 3
+    READ_TIMEOUT: 读取超时（秒），默认 10
+    POOL_SIZE: 每个主机的连接池大小，默认 10
+    RETRIES: 失败重试次数，默认 2
+    BACKOFF: 退避基数（秒），第 n 次重试随机等待 0 ~ BACKOFF * 2^n，默认 0.2
+    FAILURE_THRESHOLD: 连续失败多少次后熔断，默认 5
+    RECOVERY_TIMEOUT: 熔断持续时间（秒），之后放行一次试探请求，默认 30
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'CONNECT_TIMEOUT': 3,
+    'READ_TIMEOUT': 10,
+    'POOL_SIZE': 10,
+    'RETRIES': 2,
+    'BACKOFF': 0.2,
+    'FAILURE_THRESHOLD': 5,
+    'RECOVERY_TIMEOUT': 30,
+}
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+def get_config() -> dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, 'HTTP_TRANSPORT', {})}
+
+
+class TransportError(Exception):
+    """请求失败（重试后仍失败）"""
+
+
+class CircuitOpenError(TransportError):
+    """熔断中，请求未发出"""
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器"""
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self) -> bool:
+        """是否放行请求；熔断到期后只放行一个试探请求"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.recovery_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class LatencyStats:
+    """调用耗时统计"""
+
+    def __init__(self, window: int = 256):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self._recent.append(elapsed)
+            self.calls += 1
+            self.errors += int(not ok)
+            self.total += elapsed
+            self.max = max(self.max, elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            calls, errors, total, max_elapsed = self.calls, self.errors, self.total, self.max
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            'calls': calls,
+            'errors': errors,
+            'avg_ms': round(total / calls * 1000, 1) if calls else 0.0,
+            'p95_ms': round(p95 * 1000, 1),
+            'max_ms': round(max_elapsed * 1000, 1),
+        }
+
+
+class HTTPTransport:
+    """单个主机的 HTTP 传输"""
+
+    def __init__(self, host: str, config: dict = None):
+        self.host = host
+        self.config = config or get_config()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config['POOL_SIZE'], max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = CircuitBreaker(self.config['FAILURE_THRESHOLD'], self.config['RECOVERY_TIMEOUT'])
+        self.stats = LatencyStats()
+
+    def request(self, method: str, url: str, idempotent: bool = None, **kwargs) -> requests.Response:
+        """
+        发送请求
+
+        幂等请求在连接失败、超时和 5xx 时重试；非幂等请求只在连接超时时重试。
+
+        Args:
+            method: HTTP 方法
+            url: 地址
+            idempotent: 是否幂等，默认按 HTTP 方法判断
+            **kwargs: 传给 requests 的参数
+
+        Returns:
+            requests.Response: 最后一次响应
+
+        Raises:
+            CircuitOpenError: 熔断中
+            TransportError: 重试后仍失败
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault('timeout', (self.config['CONNECT_TIMEOUT'], self.config['READ_TIMEOUT']))
+        retries = self.config['RETRIES']
+
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f'{self.host} 暂时不可用，已熔断')
+
+            started = time.monotonic()
+            error = None
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            elapsed = time.monotonic() - started
+
+            ok = error is None and response.status_code < 500
+            self.stats.record(elapsed, ok)
+            logger.debug('%s %s -> %s (%.0f ms)', method, self.host,
+                         response.status_code if response is not None else error, elapsed * 1000)
+            if ok:
+                self.breaker.record_success()
+                return response
+            self.breaker.record_failure()
+
+            # 非幂等请求只在确定未发出（连接超时）时重试
+            retryable = idempotent or isinstance(error, requests.ConnectTimeout)
+            if attempt >= retries or not retryable:
+                break
+            time.sleep(random.uniform(0, self.config['BACKOFF'] * (2 ** attempt)))
+
+        if error is not None:
+            raise TransportError(f'{self.host} 请求失败: {error}') from error
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+_transports: Dict[str, HTTPTransport] = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(url: str) -> HTTPTransport:
+    """获取目标地址所在主机的共享传输"""
+    host = urlsplit(url).netloc
+    transport = _transports.get(host)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.get(host)
+            if transport is None:
+                transport = _transports[host] = HTTPTransport(host)
+    return transport
+
+
+def transport_stats() -> Dict[str, dict]:
+    """各主机的调用统计和熔断状态"""
+    return {
+        host: {**transport.stats.snapshot(), 'circuit': transport.breaker.state}
+        for host, transport in list(_transports.items())
+    }
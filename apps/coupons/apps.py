@@ -5,3 +5,6 @@ class CouponsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.coupons'
     verbose_name = '优惠券管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
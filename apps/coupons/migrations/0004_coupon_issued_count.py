@@ -0,0 +1,28 @@
+"""添加优惠券已发放数量，并按现有用户优惠券回填"""
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_issued_count(apps, schema_editor):
+    Coupon = apps.get_model('coupons', 'Coupon')
+    UserCoupon = apps.get_model('coupons', 'UserCoupon')
+
+    rows = UserCoupon.objects.values('coupon_id').annotate(total=Count('id')).order_by()
+    for row in rows:
+        Coupon.objects.filter(pk=row['coupon_id']).update(issued_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coupons', '0003_add_exchangeable_coupons'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coupon',
+            name='issued_count',
+            field=models.IntegerField(default=0, verbose_name='已发放'),
+        ),
+        migrations.RunPython(backfill_issued_count, migrations.RunPython.noop),
+    ]
@@ -31,6 +31,7 @@ class Coupon(models.Model):
     # 使用限制
     total_count = models.IntegerField('发放总量', default=0)  # 0表示不限
     used_count = models.IntegerField('已使用', default=0)
+    issued_count = models.IntegerField('已发放', default=0)  # 领取/发放时原子占用 total_count 额度
     per_user_limit = models.IntegerField('每人限领', default=1)
     
     # 有效期
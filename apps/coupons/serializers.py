@@ -16,18 +16,18 @@ class CouponSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'code', 'name', 'type', 'type_display',
             'discount_percent', 'discount_amount', 'min_amount', 'max_discount',
-            'total_count', 'used_count', 'remaining', 'per_user_limit',
+            'total_count', 'used_count', 'issued_count', 'remaining', 'per_user_limit',
             'start_time', 'end_time', 'is_all_products',
             'status', 'status_display', 'description',
             'points_required', 'is_exchangeable', 'exchange_limit', 'exchanged_count',
             'created_at'
         ]
-        read_only_fields = ['id', 'code', 'used_count', 'exchanged_count', 'created_at']
+        read_only_fields = ['id', 'code', 'used_count', 'issued_count', 'exchanged_count', 'created_at']
 
     def get_remaining(self, obj):
         if obj.total_count == 0:
             return -1  # 无限
-        return obj.total_count - obj.used_count
+        return max(0, obj.total_count - obj.issued_count)
 
 
 class CouponListSerializer(serializers.ModelSerializer):
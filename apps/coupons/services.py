@@ -0,0 +1,131 @@
+"""
+优惠券模块 - 批量发放服务
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from apps.users.models import User
+from .models import Coupon, UserCoupon
+
+# 每批处理的用户数
+GRANT_CHUNK_SIZE = 2000
+
+
+def build_user_segment(segment: dict):
+    """
+    按条件筛选发放人群
+
+    Args:
+        segment: 人群条件，支持 member_level（等级或等级列表）、min_points（最低积分），
+            为空表示全部活跃用户
+
+    Returns:
+        QuerySet: 用户查询集（不含管理员）
+    """
+    unknown = set(segment) - {'member_level', 'min_points'}
+    if unknown:
+        raise ValueError(f'不支持的人群条件: {", ".join(sorted(unknown))}')
+
+    users = User.objects.filter(is_active=True, is_admin=False)
+    member_level = segment.get('member_level')
+    if member_level:
+        levels = [member_level] if isinstance(member_level, str) else list(member_level)
+        valid_levels = {value for value, _ in User.MEMBER_LEVEL_CHOICES}
+        if not set(levels) <= valid_levels:
+            raise ValueError('会员等级不正确')
+        users = users.filter(member_level__in=levels)
+    if segment.get('min_points') is not None:
+        try:
+            users = users.filter(points__gte=int(segment['min_points']))
+        except (TypeError, ValueError):
+            raise ValueError('最低积分不正确')
+    return users
+
+
+def reserve_quota(coupon_id: int, count: int) -> int:
+    """
+    原子占用发放额度，额度不足时占用剩余部分
+
+    Args:
+        coupon_id: 优惠券ID
+        count: 需要的张数
+
+    Returns:
+        int: 实际占用的张数
+    """
+    while count > 0:
+        updated = Coupon.objects.filter(pk=coupon_id).filter(
+            Q(total_count=0) | Q(total_count__gte=F('issued_count') + count)
+        ).update(issued_count=F('issued_count') + count)
+        if updated:
+            return count
+        # 额度不足，按最新剩余量重试
+        row = Coupon.objects.filter(pk=coupon_id).values('total_count', 'issued_count').first()
+        if row is None:
+            return 0
+        count = min(count, row['total_count'] - row['issued_count'])
+    return 0
+
+
+def release_quota(coupon_id: int, count: int = 1) -> None:
+    """归还发放额度（用户优惠券被删除时）"""
+    Coupon.objects.filter(pk=coupon_id, issued_count__gte=count).update(issued_count=F('issued_count') - count)
+
+
+def grant_coupon(coupon: Coupon, users, chunk_size: int = GRANT_CHUNK_SIZE,
+                 collect_skipped: bool = False) -> dict:
+    """
+    向一批用户发放优惠券，每人一张
+
+    按用户ID分批流式处理：每批用一次分组查询统计已领数量，一次条件 UPDATE
+    占用额度，一次 bulk_create 写入。额度用完即停止。
+
+    Args:
+        coupon: 优惠券
+        users: 用户查询集
+        chunk_size: 每批用户数
+        collect_skipped: 是否返回达到领取上限的用户名（按ID列表发放时使用）
+
+    Returns:
+        dict: granted 发放张数，skipped 达到上限的人数，skipped_users 用户名列表，
+            exhausted 是否因额度不足提前结束
+    """
+    users = users.order_by('pk')
+    fields = ['pk', 'username', 'phone'] if collect_skipped else ['pk']
+    result = {'granted': 0, 'skipped': 0, 'skipped_users': [], 'exhausted': False}
+    last_user_id = 0
+
+    while True:
+        rows = list(users.filter(pk__gt=last_user_id).values_list(*fields)[:chunk_size])
+        if not rows:
+            break
+        last_user_id = rows[-1][0]
+
+        received = dict(
+            UserCoupon.objects.filter(
+                coupon=coupon, user_id__in=[row[0] for row in rows]
+            ).values_list('user_id').annotate(total=Count('id')).order_by()
+        )
+        eligible = []
+        for row in rows:
+            if received.get(row[0], 0) >= coupon.per_user_limit:
+                result['skipped'] += 1
+                if collect_skipped:
+                    result['skipped_users'].append(row[1] or row[2])
+            else:
+                eligible.append(row[0])
+        if not eligible:
+            continue
+
+        with transaction.atomic():
+            reserved = reserve_quota(coupon.pk, len(eligible))
+            UserCoupon.objects.bulk_create(
+                [UserCoupon(user_id=user_id, coupon=coupon) for user_id in eligible[:reserved]],
+                batch_size=chunk_size
+            )
+        result['granted'] += reserved
+        if reserved < len(eligible):
+            result['exhausted'] = True
+            break
+
+    return result
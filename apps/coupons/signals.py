@@ -0,0 +1,14 @@
+"""
+优惠券模块 - 信号处理
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import UserCoupon
+from .services import release_quota
+
+
+@receiver(post_delete, sender=UserCoupon)
+def release_coupon_quota(sender, instance, **kwargs):
+    """删除用户优惠券时归还发放额度"""
+    release_quota(instance.coupon_id)
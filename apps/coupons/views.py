@@ -55,7 +55,7 @@ class CouponViewSet(viewsets.ModelViewSet):
             start_time__lte=now,
             end_time__gte=now
         ).filter(
-            Q(total_count=0) | Q(total_count__gt=F('used_count'))
+            Q(total_count=0) | Q(total_count__gt=F('issued_count'))
         )
         serializer = CouponListSerializer(coupons, many=True)
         return Response(serializer.data)
@@ -77,46 +77,53 @@ class CouponViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def grant(self, request, pk=None):
-        """管理员发放优惠券给用户"""
+        """
+        管理员发放优惠券
+
+        请求参数二选一:
+            user_ids: 用户ID列表
+            segment: 人群条件，如 {"member_level": "gold"}，{} 表示全部用户
+        """
         from apps.users.models import User
+        from .services import build_user_segment, grant_coupon
 
         coupon = self.get_object()
         user_ids = request.data.get('user_ids', [])
+        segment = request.data.get('segment')
 
-        if not user_ids:
+        if not user_ids and segment is None:
             return Response({'error': '请选择用户'}, status=status.HTTP_400_BAD_REQUEST)
 
         # 验证优惠券状态
         if coupon.status != 'active':
             return Response({'error': '优惠券已停用'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 获取用户
-        users = User.objects.filter(id__in=user_ids)
-        if not users.exists():
-            return Response({'error': '用户不存在'}, status=status.HTTP_400_BAD_REQUEST)
-
-        granted_count = 0
-        skipped_users = []
-
-        for user in users:
-            # 检查用户已领取数量
-            user_count = UserCoupon.objects.filter(user=user, coupon=coupon).count()
-            if user_count >= coupon.per_user_limit:
-                skipped_users.append(user.username or user.phone)
-                continue
+        if user_ids:
+            users = User.objects.filter(id__in=user_ids)
+            if not users.exists():
+                return Response({'error': '用户不存在'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            if not isinstance(segment, dict):
+                return Response({'error': '人群条件格式不正确'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                users = build_user_segment(segment)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # 创建用户优惠券
-            UserCoupon.objects.create(user=user, coupon=coupon)
-            granted_count += 1
+        result = grant_coupon(coupon, users, collect_skipped=bool(user_ids))
 
-        message = f'成功发放给 {granted_count} 位用户'
-        if skipped_users:
-            message += f'，{len(skipped_users)} 位用户已达领取上限'
+        message = f'成功发放给 {result["granted"]} 位用户'
+        if result['skipped']:
+            message += f'，{result["skipped"]} 位用户已达领取上限'
+        if result['exhausted']:
+            message += '，优惠券发放额度已用完'
 
         return Response({
             'message': message,
-            'granted_count': granted_count,
-            'skipped_users': skipped_users
+            'granted_count': result['granted'],
+            'skipped_count': result['skipped'],
+            'skipped_users': result['skipped_users'],
+            'exhausted': result['exhausted']
         })
 
 
@@ -149,7 +156,7 @@ class UserCouponViewSet(viewsets.ModelViewSet):
             return Response({'error': '优惠券已停用'}, status=status.HTTP_400_BAD_REQUEST)
         if now < coupon.start_time or now > coupon.end_time:
             return Response({'error': '优惠券不在有效期内'}, status=status.HTTP_400_BAD_REQUEST)
-        if coupon.total_count > 0 and coupon.used_count >= coupon.total_count:
+        if coupon.total_count > 0 and coupon.issued_count >= coupon.total_count:
             return Response({'error': '优惠券已领完'}, status=status.HTTP_400_BAD_REQUEST)
         
         # 检查用户领取数量
@@ -157,11 +164,15 @@ class UserCouponViewSet(viewsets.ModelViewSet):
         if user_count >= coupon.per_user_limit:
             return Response({'error': f'每人限领{coupon.per_user_limit}张'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 创建用户优惠券
-        user_coupon = UserCoupon.objects.create(
-            user=request.user,
-            coupon=coupon
-        )
+        # 占用发放额度并创建用户优惠券
+        from .services import reserve_quota
+        with transaction.atomic():
+            if not reserve_quota(coupon.pk, 1):
+                return Response({'error': '优惠券已领完'}, status=status.HTTP_400_BAD_REQUEST)
+            user_coupon = UserCoupon.objects.create(
+                user=request.user,
+                coupon=coupon
+            )
         
         return Response({
             'message': '领取成功',
@@ -243,7 +254,11 @@ class UserCouponViewSet(viewsets.ModelViewSet):
 
         # 执行兑换
         from apps.users.models import PointsRecord
+        from .services import reserve_quota
         with transaction.atomic():
+            if not reserve_quota(coupon.pk, 1):
+                return Response({'error': '优惠券已兑完'}, status=status.HTTP_400_BAD_REQUEST)
+
             # 扣除积分
             user.points -= coupon.points_required
             user.save()
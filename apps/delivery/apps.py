@@ -5,3 +5,6 @@ class DeliveryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.delivery'
     verbose_name = '配送管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,260 @@
+"""
+配送员自动分配
+
+把配送员的配送区域（自由文本，如“上海市浦东新区、徐汇区”）解析为区县索引，
+按收货地址所在区县为当天待分配的配送记录挑选配送员：只在覆盖该区县的配送员中选择，
+优先分给“(当前负载 + 1) / 评分”最小的配送员，评分高的配送员按比例多分；
+候选配送员最少的区县先分配。分配结果、当天的配送路线和配送员每日汇总批量写入。
+
+配置 (settings.DELIVERY_ASSIGNMENT):
+    MAX_LOAD: 每名配送员每天最多配送单数，默认 200
+    FALLBACK_ANY: 没有配送员覆盖的地址是否分给任意配送员，默认 True
+"""
+import heapq
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .geo import find_city, find_district
+from .models import DeliveryPerson, DeliveryRecord, DeliveryRoute
+from .stats import apply_changes, contribution
+
+# 区域键：(城市, 区县)；只识别到城市时区县为 None
+AreaKey = Tuple[Optional[str], Optional[str]]
+
+AREA_SEPARATORS = re.compile(r'[,，、;；/\s]+')
+OPEN_STATUSES = ['pending', 'picked', 'delivering']
+
+
+def get_config() -> dict:
+    return {'MAX_LOAD': 200, 'FALLBACK_ANY': True, **getattr(settings, 'DELIVERY_ASSIGNMENT', {})}
+
+
+def parse_service_area(text: str) -> Set[AreaKey]:
+    """
+    解析配送区域文本
+
+    Returns:
+        set: 覆盖的 (城市, 区县)；只写城市的表示覆盖全市，记为 (城市, None)
+    """
+    areas = set()
+    city = None
+    for token in AREA_SEPARATORS.split(text or ''):
+        if not token:
+            continue
+        district = find_district(token)
+        if district:
+            areas.add(district)
+            city = district[0]
+            continue
+        token_city = find_city(token)
+        if token_city:
+            areas.add((token_city, None))
+            city = token_city
+        elif city:
+            # “上海市浦东新区、徐汇区”：后续区县沿用前一个城市
+            matched = find_district(city + token)
+            if matched:
+                areas.add(matched)
+    return areas
+
+
+def address_area(address: str) -> Optional[AreaKey]:
+    """收货地址所在区域"""
+    district = find_district(address)
+    if district:
+        return district
+    city = find_city(address)
+    return (city, None) if city else None
+
+
+class AreaIndex:
+    """区域 -> 配送员 索引"""
+
+    def __init__(self, couriers: Dict[int, Set[AreaKey]]):
+        self.all = frozenset(couriers)
+        self.by_district = defaultdict(set)
+        self.by_city = defaultdict(set)
+        self.citywide = defaultdict(set)
+        for courier_id, areas in couriers.items():
+            for city, district in areas:
+                self.by_city[city].add(courier_id)
+                if district is None:
+                    self.citywide[city].add(courier_id)
+                else:
+                    self.by_district[(city, district)].add(courier_id)
+
+    def candidates(self, area: Optional[AreaKey], fallback_any: bool) -> frozenset:
+        if area is not None:
+            city, district = area
+            if district is None:
+                found = self.by_city.get(city)
+            else:
+                found = self.by_district.get(area, set()) | self.citywide.get(city, set())
+            if found:
+                return frozenset(found)
+        return self.all if fallback_any else frozenset()
+
+
+def plan_assignments(drops: Iterable[Tuple[int, Optional[AreaKey]]],
+                     couriers: Dict[int, Tuple[Set[AreaKey], float]],
+                     loads: Dict[int, int] = None,
+                     max_load: int = None,
+                     fallback_any: bool = None) -> Dict[int, int]:
+    """
+    计算分配方案（不访问数据库）
+
+    Args:
+        drops: (配送记录ID, 区域)
+        couriers: {配送员ID: (覆盖区域, 评分)}
+        loads: 配送员当前负载
+        max_load: 每名配送员最多单数
+        fallback_any: 无人覆盖的区域是否分给任意配送员
+
+    Returns:
+        dict: {配送记录ID: 配送员ID}，分配不了的记录不在结果中
+    """
+    config = get_config()
+    max_load = config['MAX_LOAD'] if max_load is None else max_load
+    fallback_any = config['FALLBACK_ANY'] if fallback_any is None else fallback_any
+    loads = defaultdict(int, loads or {})
+    ratings = {courier_id: max(float(rating), 0.1) for courier_id, (_, rating) in couriers.items()}
+    index = AreaIndex({courier_id: areas for courier_id, (areas, _) in couriers.items()})
+
+    # 候选配送员集合相同的记录一起分配，候选最少的先分
+    groups = defaultdict(list)
+    for record_id, area in drops:
+        groups[index.candidates(area, fallback_any)].append(record_id)
+
+    assignments = {}
+    for candidates in sorted(groups, key=len):
+        if not candidates:
+            continue
+        heap = [((loads[c] + 1) / ratings[c], c) for c in candidates if loads[c] < max_load]
+        heapq.heapify(heap)
+        for record_id in groups[candidates]:
+            while heap:
+                score, courier_id = heap[0]
+                if loads[courier_id] >= max_load:
+                    heapq.heappop(heap)
+                    continue
+                current = (loads[courier_id] + 1) / ratings[courier_id]
+                if current != score:
+                    # 其他区县分配后负载已变化，按当前负载重新入堆
+                    heapq.heapreplace(heap, (current, courier_id))
+                    continue
+                break
+            if not heap:
+                break
+            courier_id = heap[0][1]
+            assignments[record_id] = courier_id
+            loads[courier_id] += 1
+            if loads[courier_id] >= max_load:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, ((loads[courier_id] + 1) / ratings[courier_id], courier_id))
+    return assignments
+
+
+def _day_filter(date) -> Q:
+    """当天的配送记录：周期购按配送日期，普通订单不限日期"""
+    return Q(delivery_date=date) | Q(delivery_date__isnull=True)
+
+
+def assign_deliveries(date=None) -> dict:
+    """
+    为当天待分配的配送记录自动分配在岗配送员
+
+    Returns:
+        dict: pending 待分配数，assigned 分配数，unassigned 未分配数，couriers 参与分配的配送员数
+    """
+    date = date or timezone.localdate()
+    config = get_config()
+
+    couriers = {
+        pk: (parse_service_area(area), rating)
+        for pk, area, rating in DeliveryPerson.objects.filter(
+            is_active=True, status='active'
+        ).values_list('pk', 'delivery_area', 'rating')
+    }
+    assigned_times = {}
+    drops = []
+    for pk, address, assigned_at in DeliveryRecord.objects.filter(
+        _day_filter(date), status='pending', delivery_person__isnull=True
+    ).values_list('pk', 'receiver_address', 'assigned_at'):
+        drops.append((pk, address_area(address)))
+        assigned_times[pk] = assigned_at
+    stats = {'pending': len(drops), 'assigned': 0, 'unassigned': len(drops), 'couriers': len(couriers)}
+    if not drops or not couriers:
+        return stats
+
+    loads = dict(
+        DeliveryRecord.objects.filter(
+            _day_filter(date), delivery_person_id__in=list(couriers), status__in=OPEN_STATUSES
+        ).values_list('delivery_person_id').annotate(total=Count('id')).order_by()
+    )
+    assignments = plan_assignments(drops, couriers, loads, config['MAX_LOAD'], config['FALLBACK_ANY'])
+
+    by_courier = defaultdict(list)
+    for record_id, courier_id in assignments.items():
+        by_courier[courier_id].append(record_id)
+
+    with transaction.atomic():
+        assigned = 0
+        for courier_id, record_ids in by_courier.items():
+            # 条件更新：分配期间已被手动分配的记录不覆盖
+            assigned += DeliveryRecord.objects.filter(
+                pk__in=record_ids, delivery_person__isnull=True
+            ).update(delivery_person_id=courier_id)
+        if assigned != len(assignments):
+            by_courier = defaultdict(list)
+            for record_id, courier_id in DeliveryRecord.objects.filter(
+                pk__in=list(assignments)
+            ).values_list('pk', 'delivery_person_id'):
+                if assignments[record_id] == courier_id:
+                    by_courier[courier_id].append(record_id)
+        _attach_to_routes(date, by_courier)
+
+        after = Counter()
+        for courier_id, record_ids in by_courier.items():
+            for record_id in record_ids:
+                after.update(contribution(courier_id, assigned_times[record_id], 'pending'))
+        apply_changes(Counter(), after)
+
+    stats['assigned'] = assigned
+    stats['unassigned'] = len(drops) - assigned
+    return stats
+
+
+def _attach_to_routes(date, by_courier: Dict[int, List[int]]) -> None:
+    """把分配结果加入配送员当天的配送路线，并重算路线单数"""
+    DeliveryRoute.objects.bulk_create(
+        [DeliveryRoute(delivery_person_id=courier_id, date=date) for courier_id in by_courier],
+        ignore_conflicts=True
+    )
+    routes = dict(
+        DeliveryRoute.objects.filter(date=date, delivery_person_id__in=list(by_courier))
+        .values_list('delivery_person_id', 'pk')
+    )
+    Through = DeliveryRoute.records.through
+    Through.objects.bulk_create(
+        [
+            Through(deliveryroute_id=routes[courier_id], deliveryrecord_id=record_id)
+            for courier_id, record_ids in by_courier.items()
+            for record_id in record_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    counts = Through.objects.filter(deliveryroute_id=OuterRef('pk')).values(
+        'deliveryroute_id'
+    ).annotate(total=Count('id')).values('total')
+    DeliveryRoute.objects.filter(pk__in=list(routes.values())).update(
+        total_orders=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
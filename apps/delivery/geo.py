@@ -0,0 +1,107 @@
+"""
+离线地址解析
+
+按收货地址中的城市和区县名称，从本地区县中心点表取近似坐标，不调用地图接口。
+可在 settings.DELIVERY_ROUTE['DISTRICT_CENTROIDS'] 中补充或覆盖区县坐标。
+"""
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+# (城市, 区县) -> (纬度, 经度)
+DISTRICT_CENTROIDS: Dict[Tuple[str, str], Tuple[float, float]] = {
+    ('北京市', '朝阳区'): (39.9219, 116.4436),
+    ('北京市', '海淀区'): (39.9593, 116.2981),
+    ('北京市', '东城区'): (39.9285, 116.4160),
+    ('北京市', '西城区'): (39.9123, 116.3660),
+    ('北京市', '丰台区'): (39.8586, 116.2871),
+    ('上海市', '浦东新区'): (31.2215, 121.5447),
+    ('上海市', '徐汇区'): (31.1885, 121.4365),
+    ('上海市', '静安区'): (31.2290, 121.4481),
+    ('上海市', '黄浦区'): (31.2317, 121.4846),
+    ('上海市', '长宁区'): (31.2204, 121.4242),
+    ('广州市', '天河区'): (23.1248, 113.3616),
+    ('广州市', '越秀区'): (23.1290, 113.2668),
+    ('广州市', '海珠区'): (23.0838, 113.3172),
+    ('广州市', '白云区'): (23.1578, 113.2730),
+    ('广州市', '番禺区'): (22.9370, 113.3843),
+    ('深圳市', '南山区'): (22.5333, 113.9304),
+    ('深圳市', '福田区'): (22.5410, 114.0550),
+    ('深圳市', '罗湖区'): (22.5484, 114.1316),
+    ('深圳市', '宝安区'): (22.5553, 113.8830),
+    ('深圳市', '龙岗区'): (22.7210, 114.2468),
+    ('杭州市', '西湖区'): (30.2594, 120.1300),
+    ('杭州市', '上城区'): (30.2424, 120.1694),
+    ('杭州市', '拱墅区'): (30.3196, 120.1419),
+    ('杭州市', '滨江区'): (30.2084, 120.2119),
+    ('杭州市', '余杭区'): (30.4189, 120.2994),
+    ('南京市', '玄武区'): (32.0486, 118.7978),
+    ('南京市', '秦淮区'): (32.0339, 118.7945),
+    ('南京市', '鼓楼区'): (32.0663, 118.7698),
+    ('南京市', '建邺区'): (32.0035, 118.7318),
+    ('南京市', '江宁区'): (31.9535, 118.8400),
+}
+
+# 只能识别到城市时使用的城市中心点
+CITY_CENTROIDS: Dict[str, Tuple[float, float]] = {
+    '北京市': (39.9042, 116.4074),
+    '上海市': (31.2304, 121.4737),
+    '广州市': (23.1291, 113.2644),
+    '深圳市': (22.5431, 114.0579),
+    '杭州市': (30.2741, 120.1551),
+    '南京市': (32.0603, 118.7969),
+}
+
+
+def get_district_centroids() -> Dict[Tuple[str, str], Tuple[float, float]]:
+    extra = getattr(settings, 'DELIVERY_ROUTE', {}).get('DISTRICT_CENTROIDS', {})
+    return {**DISTRICT_CENTROIDS, **extra}
+
+
+def _short_name(name: str) -> str:
+    """去掉“市”后缀，地址中常写作“上海浦东新区”"""
+    return name[:-1] if name.endswith('市') else name
+
+
+def find_district(address: str) -> Optional[Tuple[str, str]]:
+    """
+    识别地址中的 (城市, 区县)
+
+    同名区县（如多个城市的鼓楼区）优先取地址中同时出现城市名的一个。
+
+    Returns:
+        tuple: (城市, 区县)，识别不到区县时返回 None
+    """
+    if not address:
+        return None
+    matched = None
+    for city, district in get_district_centroids():
+        if district in address:
+            if _short_name(city) in address:
+                return city, district
+            matched = matched or (city, district)
+    return matched
+
+
+def find_city(address: str) -> Optional[str]:
+    """识别地址中的城市"""
+    if not address:
+        return None
+    for city in CITY_CENTROIDS:
+        if _short_name(city) in address:
+            return city
+    return None
+
+
+def geocode(address: str) -> Optional[Tuple[float, float]]:
+    """
+    地址转近似坐标（区县中心点，识别不到区县时取城市中心点）
+
+    Returns:
+        tuple: (纬度, 经度)，无法识别时返回 None
+    """
+    district = find_district(address)
+    if district:
+        return get_district_centroids()[district]
+    city = find_city(address)
+    return CITY_CENTROIDS.get(city) if city else None
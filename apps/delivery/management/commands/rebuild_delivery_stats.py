@@ -0,0 +1,26 @@
+"""
+重建配送员每日汇总
+
+用法: python manage.py rebuild_delivery_stats [--days 30]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.delivery.stats import rebuild_delivery_stats
+
+
+class Command(BaseCommand):
+    help = '根据配送记录重新计算配送员每日汇总表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='只重建最近N天，默认全部')
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['days']:
+            start_date = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        count = rebuild_delivery_stats(start_date=start_date)
+        self.stdout.write(self.style.SUCCESS(f'配送员每日汇总重建完成: {count} 行'))
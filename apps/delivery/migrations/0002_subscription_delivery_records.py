@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0001_initial'),
+        ('orders', '0004_add_express_fields'),
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='delivery_date',
+            field=models.DateField(blank=True, null=True, verbose_name='配送日期'),
+        ),
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='period',
+            field=models.IntegerField(blank=True, null=True, verbose_name='期数'),
+        ),
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='subscription',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='delivery_records', to='subscriptions.subscription', verbose_name='周期购订阅'),
+        ),
+        migrations.AlterField(
+            model_name='deliveryrecord',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='delivery_records', to='orders.order', verbose_name='订单'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliveryrecord',
+            constraint=models.UniqueConstraint(fields=('subscription', 'delivery_date'), name='delivery_record_subscription_date_unique'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0002_subscription_delivery_records'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='纬度'),
+        ),
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='经度'),
+        ),
+        migrations.AddField(
+            model_name='deliveryrecord',
+            name='route_sequence',
+            field=models.IntegerField(blank=True, null=True, verbose_name='配送顺序'),
+        ),
+        migrations.AddField(
+            model_name='deliveryroute',
+            name='optimized_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='路线规划时间'),
+        ),
+        migrations.AddField(
+            model_name='deliveryroute',
+            name='total_distance',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True, verbose_name='路线里程(公里)'),
+        ),
+    ]
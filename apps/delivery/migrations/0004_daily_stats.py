@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """按已有配送记录生成每日汇总"""
+    DeliveryRecord = apps.get_model('delivery', 'DeliveryRecord')
+    DeliveryDailyStats = apps.get_model('delivery', 'DeliveryDailyStats')
+    totals, completed, failed = Counter(), Counter(), Counter()
+    rows = DeliveryRecord.objects.filter(delivery_person__isnull=False).values_list(
+        'delivery_person_id', 'assigned_at', 'status'
+    )
+    for person_id, assigned_at, status in rows.iterator():
+        key = (person_id, timezone.localtime(assigned_at).date())
+        totals[key] += 1
+        completed[key] += status == 'delivered'
+        failed[key] += status == 'failed'
+    DeliveryDailyStats.objects.bulk_create([
+        DeliveryDailyStats(
+            delivery_person_id=person_id, date=date,
+            total=total, completed=completed[(person_id, date)], failed=failed[(person_id, date)]
+        )
+        for (person_id, date), total in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0003_route_planning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('total', models.IntegerField(default=0, verbose_name='分配单数')),
+                ('completed', models.IntegerField(default=0, verbose_name='送达单数')),
+                ('failed', models.IntegerField(default=0, verbose_name='失败单数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '配送员每日汇总',
+                'verbose_name_plural': '配送员每日汇总',
+                'db_table': 'delivery_daily_stats',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='deliveryrecord',
+            index=models.Index(fields=['delivery_person', 'assigned_at'], name='delivery_record_person_idx'),
+        ),
+        migrations.AddField(
+            model_name='deliverydailystats',
+            name='delivery_person',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='delivery.deliveryperson', verbose_name='配送员'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverydailystats',
+            index=models.Index(fields=['date', '-completed'], name='delivery_stats_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='deliverydailystats',
+            constraint=models.UniqueConstraint(fields=('delivery_person', 'date'), name='delivery_daily_stats_unique'),
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -59,9 +59,22 @@ class DeliveryRecord(models.Model):
     order = models.ForeignKey(
         'orders.Order', 
         on_delete=models.CASCADE, 
+        null=True,
+        blank=True,
         related_name='delivery_records',
         verbose_name='订单'
     )
+    # 周期购每期配送（由配送排期生成，与订单二选一）
+    subscription = models.ForeignKey(
+        'subscriptions.Subscription',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='delivery_records',
+        verbose_name='周期购订阅'
+    )
+    period = models.IntegerField('期数', blank=True, null=True)
+    delivery_date = models.DateField('配送日期', blank=True, null=True)
     delivery_person = models.ForeignKey(
         DeliveryPerson, 
         on_delete=models.SET_NULL, 
@@ -75,6 +88,10 @@ class DeliveryRecord(models.Model):
     receiver_name = models.CharField('收货人', max_length=50)
     receiver_phone = models.CharField('收货电话', max_length=11)
     receiver_address = models.TextField('收货地址')
+    # 收货坐标（为空时按地址离线解析到区县中心点）
+    latitude = models.DecimalField('纬度', max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField('经度', max_digits=9, decimal_places=6, blank=True, null=True)
+    route_sequence = models.IntegerField('配送顺序', blank=True, null=True)
     
     # 时间
     assigned_at = models.DateTimeField('分配时间', auto_now_add=True)
@@ -90,9 +107,20 @@ class DeliveryRecord(models.Model):
         verbose_name = '配送记录'
         verbose_name_plural = verbose_name
         ordering = ['-assigned_at']
+        indexes = [
+            models.Index(fields=['delivery_person', 'assigned_at'], name='delivery_record_person_idx'),
+        ]
+        constraints = [
+            # 同一订阅同一天只生成一条配送记录，重复排期时跳过
+            models.UniqueConstraint(
+                fields=['subscription', 'delivery_date'], name='delivery_record_subscription_date_unique'
+            ),
+        ]
 
     def __str__(self):
-        return f'{self.order.order_no} - {self.status}'
+        if self.order_id:
+            return f'{self.order.order_no} - {self.status}'
+        return f'{self.subscription.subscription_no} 第{self.period}期 - {self.status}'
 
 
 class DeliveryRoute(models.Model):
@@ -109,6 +137,8 @@ class DeliveryRoute(models.Model):
     # 统计
     total_orders = models.IntegerField('订单数', default=0)
     completed_orders = models.IntegerField('完成数', default=0)
+    total_distance = models.DecimalField('路线里程(公里)', max_digits=8, decimal_places=2, blank=True, null=True)
+    optimized_at = models.DateTimeField('路线规划时间', blank=True, null=True)
     
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
 
@@ -120,3 +150,33 @@ class DeliveryRoute(models.Model):
 
     def __str__(self):
         return f'{self.delivery_person.name} - {self.date}'
+
+
+class DeliveryDailyStats(models.Model):
+    """配送员每日配送汇总（按分配时间的本地日期）"""
+    delivery_person = models.ForeignKey(
+        DeliveryPerson,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='配送员'
+    )
+    date = models.DateField('日期')
+    total = models.IntegerField('分配单数', default=0)
+    completed = models.IntegerField('送达单数', default=0)
+    failed = models.IntegerField('失败单数', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'delivery_daily_stats'
+        verbose_name = '配送员每日汇总'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['delivery_person', 'date'], name='delivery_daily_stats_unique'),
+        ]
+        indexes = [
+            # 排行榜按日期读取、按送达单数排序
+            models.Index(fields=['date', '-completed'], name='delivery_stats_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.delivery_person.name} - {self.date}'
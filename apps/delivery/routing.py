@@ -0,0 +1,181 @@
+"""
+配送路线规划
+
+为配送员当天的配送路线排定送货顺序：收货坐标为空时按地址离线解析到区县中心点（见 geo.py），
+用 NumPy 计算站点间的球面距离矩阵，从配送站出发按最近邻生成初始路线，再用 2-opt 反复
+反转路段消除交叉，直到无法缩短。路线不要求回到配送站。
+
+配置 (settings.DELIVERY_ROUTE):
+    DEPOT: 配送站坐标 (纬度, 经度)，默认上海浦东张江
+    MAX_PASSES: 2-opt 最多迭代轮数，默认 100
+    DISTRICT_CENTROIDS: 补充的区县中心点 {(城市, 区县): (纬度, 经度)}
+"""
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from .geo import geocode
+from .models import DeliveryRecord, DeliveryRoute
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def get_config() -> dict:
+    return {'DEPOT': (31.2035, 121.5914), 'MAX_PASSES': 100, **getattr(settings, 'DELIVERY_ROUTE', {})}
+
+
+def distance_matrix(points) -> np.ndarray:
+    """
+    站点间的球面距离矩阵（公里）
+
+    Args:
+        points: (n, 2) 的 (纬度, 经度)
+
+    Returns:
+        np.ndarray: (n, n) 距离矩阵
+    """
+    radians = np.radians(np.asarray(points, dtype=float))
+    lat = radians[:, 0][:, None]
+    lng = radians[:, 1][:, None]
+    a = (np.sin((lat - lat.T) / 2) ** 2
+         + np.cos(lat) * np.cos(lat.T) * np.sin((lng - lng.T) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_neighbor_path(dist: np.ndarray) -> np.ndarray:
+    """从 0 号站点（配送站）出发，每次走向最近的未访问站点"""
+    n = len(dist)
+    path = np.empty(n, dtype=int)
+    visited = np.zeros(n, dtype=bool)
+    current = 0
+    for position in range(n):
+        path[position] = current
+        visited[current] = True
+        if position == n - 1:
+            break
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+    return path
+
+
+def two_opt(path: np.ndarray, dist: np.ndarray, max_passes: int = 100) -> np.ndarray:
+    """
+    2-opt 改进开放路线（起点固定，终点不固定）
+
+    每轮对每个起点向量化计算所有反转方案的里程变化，取最优的一个反转，直到一轮内没有改进。
+    """
+    n = len(path)
+    if n < 4:
+        return path
+    # 末尾追加一个到所有站点距离为 0 的虚拟终点，开放路线即可按固定两端的路线处理
+    padded = np.zeros((n + 1, n + 1))
+    padded[:n, :n] = dist
+    tour = np.append(path, n)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:n]
+            d = tour[i + 2:n + 1]
+            delta = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = i + 1 + k
+                tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour[:n]
+
+
+def path_length(path: Sequence[int], dist: np.ndarray) -> float:
+    path = np.asarray(path)
+    return float(dist[path[:-1], path[1:]].sum()) if len(path) > 1 else 0.0
+
+
+def plan_path(stops: Sequence[Tuple[float, float]], depot=None, max_passes: int = None) -> Tuple[List[int], float]:
+    """
+    计算送货顺序
+
+    Args:
+        stops: 各站点坐标 (纬度, 经度)
+        depot: 配送站坐标，默认取配置
+        max_passes: 2-opt 最多迭代轮数
+
+    Returns:
+        tuple: (站点下标的送货顺序, 路线里程公里数)
+    """
+    config = get_config()
+    depot = depot or config['DEPOT']
+    max_passes = max_passes or config['MAX_PASSES']
+    if not stops:
+        return [], 0.0
+    dist = distance_matrix([depot, *stops])
+    path = two_opt(nearest_neighbor_path(dist), dist, max_passes)
+    return [int(index) - 1 for index in path[1:]], path_length(path, dist)
+
+
+def _record_point(latitude, longitude, address):
+    if latitude is not None and longitude is not None:
+        return float(latitude), float(longitude)
+    return geocode(address)
+
+
+def optimize_route(route: DeliveryRoute, depot=None) -> dict:
+    """
+    规划一条配送路线并写回送货顺序
+
+    无法解析坐标的配送记录排在最后，保持原顺序。
+
+    Returns:
+        dict: stops 站点数，unlocated 无坐标站点数，distance 里程（公里），elapsed_ms 规划耗时
+    """
+    started = time.monotonic()
+    rows = list(route.records.order_by('pk').values_list('pk', 'latitude', 'longitude', 'receiver_address'))
+    located, points, unlocated = [], [], []
+    for pk, latitude, longitude, address in rows:
+        point = _record_point(latitude, longitude, address)
+        if point is None:
+            unlocated.append(pk)
+        else:
+            located.append(pk)
+            points.append(point)
+
+    order, distance = plan_path(points, depot)
+    sequence = [located[index] for index in order] + unlocated
+    now = timezone.now()
+    with transaction.atomic():
+        if sequence:
+            DeliveryRecord.objects.filter(pk__in=sequence).update(route_sequence=Case(
+                *[When(pk=pk, then=Value(position)) for position, pk in enumerate(sequence, start=1)],
+                output_field=IntegerField()
+            ))
+        DeliveryRoute.objects.filter(pk=route.pk).update(total_distance=round(distance, 2), optimized_at=now)
+    route.total_distance = round(distance, 2)
+    route.optimized_at = now
+    return {
+        'stops': len(sequence),
+        'unlocated': len(unlocated),
+        'distance': round(distance, 2),
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+    }
+
+
+def optimize_routes(date) -> dict:
+    """
+    规划某天的全部配送路线
+
+    Returns:
+        dict: routes 路线数，stops 站点数
+    """
+    stats = {'routes': 0, 'stops': 0}
+    for route in DeliveryRoute.objects.filter(date=date):
+        result = optimize_route(route)
+        stats['routes'] += 1
+        stats['stops'] += result['stops']
+    return stats
@@ -35,12 +35,13 @@ class DeliveryRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = DeliveryRecord
         fields = [
-            'id', 'order', 'order_no', 'delivery_person', 'delivery_person_name',
-            'status', 'status_display', 'receiver_name', 'receiver_phone',
-            'receiver_address', 'assigned_at', 'picked_at', 'delivered_at',
+            'id', 'order', 'order_no', 'subscription', 'period', 'delivery_date',
+            'delivery_person', 'delivery_person_name', 'status', 'status_display', 'receiver_name', 'receiver_phone',
+            'receiver_address', 'latitude', 'longitude', 'route_sequence',
+            'assigned_at', 'picked_at', 'delivered_at',
             'remark', 'customer_remark'
         ]
-        read_only_fields = ['id', 'assigned_at']
+        read_only_fields = ['id', 'route_sequence', 'assigned_at']
 
 
 class DeliveryRouteSerializer(serializers.ModelSerializer):
@@ -52,6 +53,18 @@ class DeliveryRouteSerializer(serializers.ModelSerializer):
         model = DeliveryRoute
         fields = [
             'id', 'delivery_person', 'delivery_person_name', 'date',
-            'records', 'records_detail', 'total_orders', 'completed_orders', 'created_at'
+            'records', 'records_detail', 'total_orders', 'completed_orders',
+            'total_distance', 'optimized_at', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'total_distance', 'optimized_at', 'created_at']
+
+
+class DeliveryScanItemSerializer(serializers.Serializer):
+    """扫码状态变更"""
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=DeliveryRecord.STATUS_CHOICES)
+
+
+class DeliveryScanSerializer(serializers.Serializer):
+    """批量扫码序列化器"""
+    changes = DeliveryScanItemSerializer(many=True, allow_empty=False, max_length=500)
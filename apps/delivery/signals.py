@@ -0,0 +1,30 @@
+"""
+配送模块 - 信号处理
+"""
+from collections import Counter
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import DeliveryRecord
+from .stats import apply_changes, record_contribution
+
+
+@receiver(post_init, sender=DeliveryRecord)
+def remember_delivery_stats(sender, instance, **kwargs):
+    """记录配送记录加载时对每日汇总的贡献"""
+    instance._stats_contribution = record_contribution(instance)
+
+
+@receiver(post_save, sender=DeliveryRecord)
+def update_delivery_stats(sender, instance, **kwargs):
+    """分配配送员、状态变化时更新配送员每日汇总"""
+    after = record_contribution(instance)
+    apply_changes(instance._stats_contribution, after)
+    instance._stats_contribution = after
+
+
+@receiver(post_delete, sender=DeliveryRecord)
+def remove_delivery_stats(sender, instance, **kwargs):
+    """删除配送记录时从每日汇总中扣除"""
+    apply_changes(instance._stats_contribution, Counter())
@@ -0,0 +1,116 @@
+"""
+配送员每日配送汇总
+
+配送记录分配、状态变化时（见 signals.py，批量分配和批量扫码在各自的服务中直接调用）
+增量更新 DeliveryDailyStats，配送员统计和排行榜只需读取汇总表的一行/一个日期。
+汇总日期取分配时间的本地日期。
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import DeliveryDailyStats, DeliveryRecord
+
+STATS_FIELDS = ('total', 'completed', 'failed')
+
+
+def contribution(person_id, assigned_at, status) -> Counter:
+    """
+    配送记录对汇总表的贡献 {(配送员ID, 本地日期, 字段): 数量}
+
+    未分配配送员的记录不计入。
+    """
+    if not person_id or assigned_at is None:
+        return Counter()
+    date = timezone.localtime(assigned_at).date()
+    return Counter({
+        (person_id, date, 'total'): 1,
+        (person_id, date, 'completed'): int(status == 'delivered'),
+        (person_id, date, 'failed'): int(status == 'failed'),
+    })
+
+
+def record_contribution(record) -> Counter:
+    data = record.__dict__
+    return contribution(data.get('delivery_person_id'), data.get('assigned_at'), data.get('status'))
+
+
+def apply_changes(before: Counter, after: Counter) -> None:
+    """
+    把贡献差异累加到汇总表
+
+    缺少的汇总行先批量插入（并发插入由唯一约束兜底），增量相同的行合并为一条 F() UPDATE。
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(STATS_FIELDS, 0))
+    for key in set(before) | set(after):
+        delta = after.get(key, 0) - before.get(key, 0)
+        if delta:
+            person_id, date, field = key
+            deltas[(person_id, date)][field] += delta
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        DeliveryDailyStats.objects.bulk_create(
+            [DeliveryDailyStats(delivery_person_id=person_id, date=date) for person_id, date in deltas],
+            ignore_conflicts=True
+        )
+        days = defaultdict(list)
+        for person_id, date in deltas:
+            days[date].append(person_id)
+        condition = Q()
+        for date, person_ids in days.items():
+            condition |= Q(date=date, delivery_person_id__in=person_ids)
+        pks = {
+            (person_id, date): pk
+            for pk, person_id, date in DeliveryDailyStats.objects.filter(condition).values_list(
+                'pk', 'delivery_person_id', 'date'
+            )
+        }
+
+        groups = defaultdict(list)
+        for key, fields in deltas.items():
+            groups[tuple(fields[field] for field in STATS_FIELDS)].append(pks[key])
+        for amounts, stats_ids in groups.items():
+            DeliveryDailyStats.objects.filter(pk__in=stats_ids).update(**{
+                field: F(field) + amount for field, amount in zip(STATS_FIELDS, amounts) if amount
+            })
+
+
+def rebuild_delivery_stats(start_date=None) -> int:
+    """
+    按配送记录重建汇总表
+
+    Args:
+        start_date: 起始日期，默认全部
+
+    Returns:
+        int: 写入的行数
+    """
+    records = DeliveryRecord.objects.filter(delivery_person__isnull=False)
+    if start_date is not None:
+        start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        records = records.filter(assigned_at__gte=start)
+
+    totals = Counter()
+    for person_id, assigned_at, status in records.values_list(
+        'delivery_person_id', 'assigned_at', 'status'
+    ).iterator():
+        totals.update(contribution(person_id, assigned_at, status))
+
+    rows = defaultdict(dict)
+    for (person_id, date, field), value in totals.items():
+        rows[(person_id, date)][field] = value
+    with transaction.atomic():
+        stale = DeliveryDailyStats.objects.all()
+        if start_date is not None:
+            stale = stale.filter(date__gte=start_date)
+        stale.delete()
+        DeliveryDailyStats.objects.bulk_create([
+            DeliveryDailyStats(delivery_person_id=person_id, date=date, **fields)
+            for (person_id, date), fields in rows.items()
+        ], batch_size=1000)
+    return len(rows)
@@ -0,0 +1,177 @@
+"""
+配送状态流转
+
+状态变更先按当前状态条件（如 WHERE status IN ('picked', 'delivering')）锁定记录，再对锁定的记录
+执行一条 UPDATE，不读改写整行：同一记录的并发扫码只会生效一次。送达后配送员总配送量、路线完成数用 F() 累加，
+订单只写状态和送达时间。周期购记录送达前先确认对应期数并发放积分（每条记录一期），
+无法确认的记录不变更状态并报告失败。批量扫码时同一目标状态的记录合并为一条 UPDATE。
+配送员每日汇总（stats.py）按本轮成功的记录一次性更新。
+"""
+from collections import Counter, defaultdict
+from typing import Iterable, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.subscriptions.services import confirm_record_deliveries
+from .models import DeliveryPerson, DeliveryRecord, DeliveryRoute
+from .stats import apply_changes, contribution
+
+# 目标状态 -> 允许的当前状态
+TRANSITIONS = {
+    'picked': {'pending'},
+    'delivering': {'pending', 'picked'},
+    'delivered': {'picked', 'delivering'},
+    'failed': {'pending', 'picked', 'delivering'},
+    # 配送失败后重新配送
+    'pending': {'failed'},
+}
+
+# 进入该状态时记录的时间字段
+TIMESTAMP_FIELDS = {
+    'picked': 'picked_at',
+    'delivered': 'delivered_at',
+}
+
+# 送达后订单可以更新为已送达的状态
+DELIVERABLE_ORDER_STATUSES = ['paid', 'shipped']
+
+
+def apply_transitions(changes: Iterable[Tuple[int, str]], delivery_person=None) -> dict:
+    """
+    批量变更配送状态
+
+    同一记录出现多次时按提交顺序依次变更（如先取货再送达）。
+
+    Args:
+        changes: (配送记录ID, 目标状态)
+        delivery_person: 只允许变更该配送员的记录，默认不限
+
+    Returns:
+        dict: succeeded 成功的 [{id, status}]，failed 失败的 [{id, status, error}]
+    """
+    # 按同一记录的第几次变更分轮，每轮内同一记录只出现一次
+    waves = defaultdict(list)
+    seen = Counter()
+    for record_id, new_status in changes:
+        waves[seen[record_id]].append((record_id, new_status))
+        seen[record_id] += 1
+
+    result = {'succeeded': [], 'failed': []}
+    for wave in range(len(waves)):
+        _apply_wave(waves[wave], delivery_person, result)
+    return result
+
+
+def _apply_wave(changes, delivery_person, result: dict) -> None:
+    queryset = DeliveryRecord.objects.all()
+    if delivery_person is not None:
+        queryset = queryset.filter(delivery_person=delivery_person)
+    current = {
+        pk: (record_status, person_id, order_id, assigned_at, subscription_id)
+        for pk, record_status, person_id, order_id, assigned_at, subscription_id in queryset.filter(
+            pk__in=[record_id for record_id, _ in changes]
+        ).values_list('pk', 'status', 'delivery_person_id', 'order_id', 'assigned_at', 'subscription_id')
+    }
+
+    by_status = defaultdict(list)
+    for record_id, new_status in changes:
+        if new_status not in TRANSITIONS:
+            result['failed'].append({'id': record_id, 'status': new_status, 'error': '无效的状态'})
+        elif record_id not in current:
+            result['failed'].append({'id': record_id, 'status': new_status, 'error': '配送记录不存在'})
+        elif current[record_id][0] not in TRANSITIONS[new_status]:
+            result['failed'].append({
+                'id': record_id, 'status': new_status,
+                'error': f'当前状态为{dict(DeliveryRecord.STATUS_CHOICES)[current[record_id][0]]}，不能变更为'
+                         f'{dict(DeliveryRecord.STATUS_CHOICES)[new_status]}'
+            })
+        else:
+            by_status[new_status].append(record_id)
+
+    now = timezone.now()
+    before, after = Counter(), Counter()
+    with transaction.atomic():
+        for new_status, record_ids in by_status.items():
+            updates = {'status': new_status}
+            if new_status in TIMESTAMP_FIELDS:
+                updates[TIMESTAMP_FIELDS[new_status]] = now
+            # 锁定仍可变更的记录并读取加锁后的状态：并发扫码同一记录时只有先加锁的一方生效，
+            # 后到的一方读到已变更的状态后报告失败
+            locked = {
+                pk: (record_status, person_id, order_id, assigned_at, subscription_id)
+                for pk, record_status, person_id, order_id, assigned_at, subscription_id in queryset.select_for_update().filter(
+                    pk__in=record_ids, status__in=TRANSITIONS[new_status]
+                ).order_by('pk').values_list('pk', 'status', 'delivery_person_id', 'order_id', 'assigned_at', 'subscription_id')
+            }
+            rejected = set()
+            if new_status == 'delivered':
+                # 周期购记录先确认对应期数（每条记录一期），无法确认的记录不变更状态
+                subscription_records = [(pk, values[4]) for pk, values in locked.items() if values[4]]
+                if subscription_records:
+                    for item in confirm_record_deliveries(subscription_records)['failed']:
+                        rejected.add(item['id'])
+                        del locked[item['id']]
+                        result['failed'].append({
+                            'id': item['id'], 'status': new_status, 'error': f"周期购确认失败：{item['error']}"
+                        })
+            if locked:
+                queryset.filter(pk__in=list(locked)).update(**updates)
+            for record_id in record_ids:
+                if record_id not in locked and record_id not in rejected:
+                    result['failed'].append({'id': record_id, 'status': new_status, 'error': '状态已变化，请刷新后重试'})
+            record_ids = [record_id for record_id in record_ids if record_id in locked]
+            current.update(locked)
+
+            result['succeeded'].extend({'id': record_id, 'status': new_status} for record_id in record_ids)
+            for record_id in record_ids:
+                old_status, person_id, _, assigned_at, _ = current[record_id]
+                before.update(contribution(person_id, assigned_at, old_status))
+                after.update(contribution(person_id, assigned_at, new_status))
+            if new_status == 'delivered' and record_ids:
+                _on_delivered([
+                    (record_id, current[record_id][1], current[record_id][2])
+                    for record_id in record_ids
+                ], now)
+        apply_changes(before, after)
+
+
+def _on_delivered(records, now) -> None:
+    """
+    送达后更新配送员总配送量、路线完成数、订单状态
+
+    Args:
+        records: (配送记录ID, 配送员ID, 订单ID)
+    """
+    per_person = Counter(person_id for _, person_id, _ in records if person_id)
+    _increment_grouped(DeliveryPerson, 'total_deliveries', per_person)
+
+    Through = DeliveryRoute.records.through
+    per_route = Counter(Through.objects.filter(
+        deliveryrecord_id__in=[record_id for record_id, _, _ in records]
+    ).values_list('deliveryroute_id', flat=True))
+    _increment_grouped(DeliveryRoute, 'completed_orders', per_route)
+
+    order_ids = [order_id for _, _, order_id in records if order_id]
+    if order_ids:
+        orders = list(Order.objects.select_for_update().filter(pk__in=order_ids, status__in=DELIVERABLE_ORDER_STATUSES))
+        if orders:
+            Order.objects.filter(pk__in=[order.pk for order in orders]).update(status='delivered', delivered_at=now, updated_at=now)
+            for order in orders:
+                order.status = 'delivered'
+                order.delivered_at = now
+                # 批量 UPDATE 不触发信号，手动通知统计模块
+                post_save.send(sender=Order, instance=order, created=False,
+                               update_fields=['status', 'delivered_at', 'updated_at'])
+
+
+def _increment_grouped(model, field: str, counts: Counter) -> None:
+    """按增量分组，每组一条 F() UPDATE"""
+    by_amount = defaultdict(list)
+    for pk, amount in counts.items():
+        by_amount[amount].append(pk)
+    for amount, pks in by_amount.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + amount})
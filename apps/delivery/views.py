@@ -5,11 +5,16 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.db.models import F, Prefetch
 from django.utils import timezone
-from .models import DeliveryPerson, DeliveryRecord, DeliveryRoute
+from django.utils.dateparse import parse_date
+from .assignment import assign_deliveries
+from .models import DeliveryDailyStats, DeliveryPerson, DeliveryRecord, DeliveryRoute
+from .routing import optimize_route
+from .transitions import apply_transitions
 from .serializers import (
     DeliveryPersonSerializer, DeliveryPersonListSerializer,
-    DeliveryRecordSerializer, DeliveryRouteSerializer
+    DeliveryRecordSerializer, DeliveryRouteSerializer, DeliveryScanSerializer
 )
 
 
@@ -31,24 +36,63 @@ class DeliveryPersonViewSet(viewsets.ModelViewSet):
         new_status = request.data.get('status')
         if new_status in dict(DeliveryPerson.STATUS_CHOICES):
             person.status = new_status
-            person.save()
+            person.save(update_fields=['status', 'updated_at'])
             return Response({'message': '状态更新成功'})
         return Response({'error': '无效的状态'}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """配送员统计"""
+        """配送员统计（读取每日汇总）"""
         person = self.get_object()
-        today = timezone.now().date()
-        
-        today_records = person.records.filter(assigned_at__date=today)
-        completed = today_records.filter(status='delivered').count()
+        today = DeliveryDailyStats.objects.filter(
+            delivery_person=person, date=timezone.localdate()
+        ).values('total', 'completed', 'failed').first() or {}
         
         return Response({
             'total_deliveries': person.total_deliveries,
             'rating': float(person.rating),
-            'today_total': today_records.count(),
-            'today_completed': completed,
+            'today_total': today.get('total', 0),
+            'today_completed': today.get('completed', 0),
+            'today_failed': today.get('failed', 0),
+        })
+
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """
+        配送员排行榜（按当天送达单数）
+
+        GET /delivery-persons/leaderboard/?date=2026-02-01&limit=20
+        """
+        date = timezone.localdate()
+        if request.query_params.get('date'):
+            try:
+                date = parse_date(request.query_params['date'])
+            except ValueError:
+                date = None
+            if date is None:
+                return Response({'error': '日期格式不正确'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = DeliveryDailyStats.objects.filter(
+            date=date, delivery_person__is_active=True
+        ).select_related('delivery_person').order_by('-completed', '-total', 'delivery_person_id')[:limit]
+        return Response({
+            'date': date,
+            'results': [
+                {
+                    'rank': rank,
+                    'delivery_person': row.delivery_person_id,
+                    'name': row.delivery_person.name,
+                    'rating': float(row.delivery_person.rating),
+                    'total': row.total,
+                    'completed': row.completed,
+                    'failed': row.failed,
+                }
+                for rank, row in enumerate(rows, start=1)
+            ]
         })
 
 
@@ -71,7 +115,30 @@ class DeliveryRecordViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(delivery_person_id=delivery_person)
         
         return queryset.select_related('order', 'delivery_person')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def auto_assign(self, request):
+        """
+        自动分配配送员
+
+        POST /delivery-records/auto_assign/
+        {"date": "2026-02-01"}  不传为今天
+        """
+        date = None
+        if request.data.get('date'):
+            try:
+                date = parse_date(str(request.data['date']))
+            except ValueError:
+                date = None
+            if date is None:
+                return Response({'error': '日期格式不正确'}, status=status.HTTP_400_BAD_REQUEST)
+        stats = assign_deliveries(date)
+        return Response({'message': f"已分配 {stats['assigned']} 单，未分配 {stats['unassigned']} 单", **stats})
     
+    def _request_courier(self, request):
+        """当前用户对应的在职配送员，非配送员返回 None"""
+        return DeliveryPerson.objects.filter(user=request.user, is_active=True).first()
+
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """更新配送状态"""
@@ -81,24 +148,44 @@ class DeliveryRecordViewSet(viewsets.ModelViewSet):
         if new_status not in dict(DeliveryRecord.STATUS_CHOICES):
             return Response({'error': '无效的状态'}, status=status.HTTP_400_BAD_REQUEST)
         
-        record.status = new_status
-        
-        if new_status == 'picked':
-            record.picked_at = timezone.now()
-        elif new_status == 'delivered':
-            record.delivered_at = timezone.now()
-            # 更新订单状态
-            record.order.status = 'delivered'
-            record.order.delivered_at = timezone.now()
-            record.order.save()
-            # 更新配送员统计
-            if record.delivery_person:
-                record.delivery_person.total_deliveries += 1
-                record.delivery_person.save()
-        
-        record.save()
+        delivery_person = None
+        if not request.user.is_staff:
+            delivery_person = self._request_courier(request)
+            if delivery_person is None:
+                return Response({'error': '只有配送员可以变更配送状态'}, status=status.HTTP_403_FORBIDDEN)
+
+        result = apply_transitions([(record.pk, new_status)], delivery_person)
+        if result['failed']:
+            return Response({'error': result['failed'][0]['error']}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'message': '状态更新成功'})
 
+    @action(detail=False, methods=['post'], url_path='batch-scan')
+    def batch_scan(self, request):
+        """
+        批量扫码变更配送状态
+
+        POST /delivery-records/batch-scan/
+        {"changes": [{"id": 1, "status": "picked"}, {"id": 1, "status": "delivered"}]}
+        配送员只能变更分配给自己的配送记录
+        """
+        serializer = DeliveryScanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        delivery_person = None
+        if not request.user.is_staff:
+            delivery_person = self._request_courier(request)
+            if delivery_person is None:
+                return Response({'error': '只有配送员可以扫码'}, status=status.HTTP_403_FORBIDDEN)
+
+        result = apply_transitions(
+            [(change['id'], change['status']) for change in serializer.validated_data['changes']],
+            delivery_person
+        )
+        return Response({
+            'message': f"成功 {len(result['succeeded'])} 条，失败 {len(result['failed'])} 条",
+            **result
+        })
+
 
 class DeliveryRouteViewSet(viewsets.ModelViewSet):
     """配送路线视图集"""
@@ -117,4 +204,17 @@ class DeliveryRouteViewSet(viewsets.ModelViewSet):
         if delivery_person:
             queryset = queryset.filter(delivery_person_id=delivery_person)
         
-        return queryset.select_related('delivery_person').prefetch_related('records')
+        # 配送记录按规划的送货顺序返回
+        records = DeliveryRecord.objects.order_by(F('route_sequence').asc(nulls_last=True), 'pk')
+        return queryset.select_related('delivery_person').prefetch_related(Prefetch('records', queryset=records))
+
+    @action(detail=True, methods=['post'])
+    def optimize(self, request, pk=None):
+        """规划送货顺序"""
+        route = self.get_object()
+        result = optimize_route(route)
+        return Response({
+            'message': '路线规划完成',
+            **result,
+            'route': self.get_serializer(self.get_object()).data
+        })
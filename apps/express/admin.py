@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ExpressCompany, ExpressOrder, ExpressTrace
+from .models import ExpressCompany, ExpressOrder, ExpressTrace, ShipBatch, ShipBatchItem, Waybill
 
 
 @admin.register(ExpressCompany)
@@ -22,3 +22,23 @@ class ExpressTraceAdmin(admin.ModelAdmin):
     list_display = ['express_order', 'time', 'description', 'location']
     list_filter = ['express_order__express_company']
     search_fields = ['express_order__express_no', 'description']
+
+
+@admin.register(ShipBatch)
+class ShipBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'express_company', 'status', 'total', 'succeeded', 'failed', 'created_at']
+    list_filter = ['status', 'express_company']
+
+
+@admin.register(ShipBatchItem)
+class ShipBatchItemAdmin(admin.ModelAdmin):
+    list_display = ['batch', 'order_no', 'status', 'express_no', 'error', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['order_no', 'express_no']
+    raw_id_fields = ['batch', 'order']
+
+
+@admin.register(Waybill)
+class WaybillAdmin(admin.ModelAdmin):
+    list_display = ['express_no', 'content_type', 'size', 'sha256', 'created_at']
+    search_fields = ['express_no', 'sha256']
@@ -5,3 +5,6 @@ class ExpressConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.express'
     verbose_name = '快递管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
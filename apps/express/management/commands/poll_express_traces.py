@@ -0,0 +1,33 @@
+"""
+轮询在途快递订单的物流轨迹
+
+用法:
+    python manage.py poll_express_traces            # 查询一轮到期订单（适合 cron 每分钟执行）
+    python manage.py poll_express_traces --forever  # 常驻进程，每隔 --sleep 秒查询一轮
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.express.tracking import poll_all_due
+
+
+class Command(BaseCommand):
+    help = '按物流状态的轮询间隔，分批查询到期快递订单的最新轨迹'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='每批查询的订单数')
+        parser.add_argument('--forever', action='store_true', help='常驻运行')
+        parser.add_argument('--sleep', type=int, default=60, help='常驻运行时每轮间隔（秒）')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = poll_all_due(options['batch_size'])
+            self.stdout.write(
+                f"查询 {stats['polled']} 单: 更新 {stats['updated']}, 失败 {stats['failed']}"
+            )
+            if not options['forever']:
+                break
+            close_old_connections()
+            time.sleep(options['sleep'])
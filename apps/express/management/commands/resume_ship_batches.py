@@ -0,0 +1,26 @@
+"""
+继续执行未完成的批量发货任务（如服务重启导致中断）
+
+用法: python manage.py resume_ship_batches
+"""
+from django.core.management.base import BaseCommand
+
+from apps.express.models import ShipBatch
+from apps.express.shipping import run_ship_batch
+
+
+class Command(BaseCommand):
+    help = '继续执行等待中或发货中断的批量发货任务'
+
+    def handle(self, *args, **options):
+        batch_ids = list(ShipBatch.objects.filter(
+            status__in=['pending', 'running']
+        ).order_by('created_at').values_list('pk', flat=True))
+
+        for batch_id in batch_ids:
+            batch = run_ship_batch(batch_id)
+            self.stdout.write(
+                f'任务 {batch.pk}: {batch.get_status_display()} 成功 {batch.succeeded} 失败 {batch.failed} / {batch.total}'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'处理完成: {len(batch_ids)} 个任务'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def schedule_in_flight(apps, schema_editor):
+    ExpressOrder = apps.get_model('express', 'ExpressOrder')
+    ExpressOrder.objects.exclude(status__in=['signed', 'cancelled']).update(next_poll_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('express', '0002_expressorder_pickup_code_expressorder_pickup_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expressorder',
+            name='last_polled_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='上次查询轨迹时间'),
+        ),
+        migrations.AddField(
+            model_name='expressorder',
+            name='next_poll_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='下次查询轨迹时间'),
+        ),
+        migrations.AddIndex(
+            model_name='expressorder',
+            index=models.Index(fields=['status', 'next_poll_at'], name='express_order_poll_idx'),
+        ),
+        migrations.RunPython(schedule_in_flight, migrations.RunPython.noop),
+    ]
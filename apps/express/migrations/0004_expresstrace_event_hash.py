@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_event_hash(apps, schema_editor):
+    """计算已有轨迹的摘要，并删除同一快递订单下的重复轨迹"""
+    ExpressTrace = apps.get_model('express', 'ExpressTrace')
+    seen = set()
+    duplicate_ids = []
+    updates = []
+    for trace in ExpressTrace.objects.order_by('pk').iterator():
+        text = f'{int(trace.time.timestamp())}|{trace.description}'
+        trace.event_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        key = (trace.express_order_id, trace.event_hash)
+        if key in seen:
+            duplicate_ids.append(trace.pk)
+            continue
+        seen.add(key)
+        updates.append(trace)
+    ExpressTrace.objects.filter(pk__in=duplicate_ids).delete()
+    ExpressTrace.objects.bulk_update(updates, ['event_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('express', '0003_expressorder_trace_polling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expresstrace',
+            name='event_hash',
+            field=models.CharField(blank=True, max_length=40, verbose_name='轨迹摘要'),
+        ),
+        migrations.RunPython(backfill_event_hash, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='expresstrace',
+            constraint=models.UniqueConstraint(fields=('express_order', 'event_hash'), name='express_trace_event_unique'),
+        ),
+    ]
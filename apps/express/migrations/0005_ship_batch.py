@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('express', '0004_expresstrace_event_hash'),
+        ('orders', '0004_add_express_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('remark', models.CharField(blank=True, max_length=200, verbose_name='备注')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '发货中'), ('completed', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('total', models.IntegerField(default=0, verbose_name='订单数')),
+                ('succeeded', models.IntegerField(default=0, verbose_name='成功数')),
+                ('failed', models.IntegerField(default=0, verbose_name='失败数')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='创建人')),
+                ('express_company', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='express.expresscompany', verbose_name='快递公司')),
+            ],
+            options={
+                'verbose_name': '批量发货任务',
+                'verbose_name_plural': '批量发货任务',
+                'db_table': 'express_ship_batch',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ShipBatchItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_no', models.CharField(max_length=32, verbose_name='订单号')),
+                ('status', models.CharField(choices=[('pending', '待发货'), ('success', '发货成功'), ('failed', '发货失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('express_no', models.CharField(blank=True, max_length=50, verbose_name='快递单号')),
+                ('error', models.CharField(blank=True, max_length=200, verbose_name='失败原因')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='express.shipbatch', verbose_name='发货任务')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ship_batch_items', to='orders.order', verbose_name='订单')),
+            ],
+            options={
+                'verbose_name': '批量发货明细',
+                'verbose_name_plural': '批量发货明细',
+                'db_table': 'express_ship_batch_item',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['batch', 'status'], name='ship_batch_item_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('batch', 'order'), name='express_ship_batch_item_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('express', '0005_ship_batch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Waybill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('express_no', models.CharField(max_length=50, unique=True, verbose_name='快递单号')),
+                ('sha256', models.CharField(db_index=True, max_length=64, verbose_name='内容摘要')),
+                ('file', models.FileField(max_length=200, upload_to='waybills/', verbose_name='面单文件')),
+                ('content_type', models.CharField(max_length=50, verbose_name='文件类型')),
+                ('size', models.IntegerField(default=0, verbose_name='文件大小')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '电子面单',
+                'verbose_name_plural': '电子面单',
+                'db_table': 'express_waybill',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('express', '0006_waybill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipbatch',
+            name='attempt',
+            field=models.IntegerField(default=0, verbose_name='执行次数'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 
 
@@ -105,11 +107,18 @@ class ExpressOrder(models.Model):
     collected_at = models.DateTimeField('揽收时间', null=True, blank=True)
     signed_at = models.DateTimeField('签收时间', null=True, blank=True)
 
+    # 轨迹轮询
+    last_polled_at = models.DateTimeField('上次查询轨迹时间', null=True, blank=True)
+    next_poll_at = models.DateTimeField('下次查询轨迹时间', null=True, blank=True)  # 为空表示不再轮询
+
     class Meta:
         verbose_name = '快递订单'
         verbose_name_plural = verbose_name
         db_table = 'express_order'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_poll_at'], name='express_order_poll_idx'),
+        ]
 
     def __str__(self):
         return f'{self.express_company.name} - {self.express_no}'
@@ -129,12 +138,134 @@ class ExpressTrace(models.Model):
     status = models.CharField('状态', max_length=50, blank=True)
     description = models.TextField('描述')
     location = models.CharField('位置', max_length=100, blank=True)
+    event_hash = models.CharField('轨迹摘要', max_length=40, blank=True)  # 时间+描述的 SHA1，用于去重
 
     class Meta:
         verbose_name = '物流轨迹'
         verbose_name_plural = verbose_name
         db_table = 'express_trace'
         ordering = ['-time']
+        constraints = [
+            models.UniqueConstraint(fields=['express_order', 'event_hash'], name='express_trace_event_unique'),
+        ]
 
     def __str__(self):
         return f'{self.time} - {self.description}'
+
+    @staticmethod
+    def make_event_hash(time, description: str) -> str:
+        """轨迹去重摘要，time 为带时区的时间（按秒级时间戳计算，与时区无关）"""
+        text = f'{int(time.timestamp())}|{description}'
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class ShipBatch(models.Model):
+    """批量发货任务"""
+    STATUS_CHOICES = [
+        ('pending', '等待中'),
+        ('running', '发货中'),
+        ('completed', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    express_company = models.ForeignKey(
+        ExpressCompany,
+        on_delete=models.PROTECT,
+        verbose_name='快递公司'
+    )
+    remark = models.CharField('备注', max_length=200, blank=True)
+    status = models.CharField('状态', max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.IntegerField('订单数', default=0)
+    succeeded = models.IntegerField('成功数', default=0)
+    failed = models.IntegerField('失败数', default=0)
+    error = models.TextField('错误信息', blank=True, null=True)
+    attempt = models.IntegerField('执行次数', default=0)  # 每次开始执行时递增，只有最新一次执行能写入进度
+    created_by = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='创建人'
+    )
+    started_at = models.DateTimeField('开始时间', null=True, blank=True)
+    finished_at = models.DateTimeField('完成时间', null=True, blank=True)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+
+    class Meta:
+        verbose_name = '批量发货任务'
+        verbose_name_plural = verbose_name
+        db_table = 'express_ship_batch'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.express_company.name} - {self.total} 单 - {self.get_status_display()}'
+
+    @property
+    def progress(self):
+        """发货进度 0-100"""
+        if self.status == 'completed':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, round((self.succeeded + self.failed) * 100 / self.total, 1))
+
+
+class ShipBatchItem(models.Model):
+    """批量发货明细"""
+    STATUS_CHOICES = [
+        ('pending', '待发货'),
+        ('success', '发货成功'),
+        ('failed', '发货失败'),
+    ]
+
+    batch = models.ForeignKey(
+        ShipBatch,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='发货任务'
+    )
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='ship_batch_items',
+        verbose_name='订单'
+    )
+    order_no = models.CharField('订单号', max_length=32)
+    status = models.CharField('状态', max_length=20, choices=STATUS_CHOICES, default='pending')
+    express_no = models.CharField('快递单号', max_length=50, blank=True)
+    error = models.CharField('失败原因', max_length=200, blank=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        verbose_name = '批量发货明细'
+        verbose_name_plural = verbose_name
+        db_table = 'express_ship_batch_item'
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'order'], name='express_ship_batch_item_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['batch', 'status'], name='ship_batch_item_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.order_no} - {self.get_status_display()}'
+
+
+class Waybill(models.Model):
+    """电子面单缓存（文件按内容 SHA256 存储，同一内容只存一份）"""
+
+    express_no = models.CharField('快递单号', max_length=50, unique=True)
+    sha256 = models.CharField('内容摘要', max_length=64, db_index=True)
+    file = models.FileField('面单文件', upload_to='waybills/', max_length=200)
+    content_type = models.CharField('文件类型', max_length=50)
+    size = models.IntegerField('文件大小', default=0)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+
+    class Meta:
+        verbose_name = '电子面单'
+        verbose_name_plural = verbose_name
+        db_table = 'express_waybill'
+
+    def __str__(self):
+        return self.express_no
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ExpressCompany, ExpressOrder, ExpressTrace
+from .models import ExpressCompany, ExpressOrder, ExpressTrace, ShipBatch, ShipBatchItem
 
 
 class ExpressCompanySerializer(serializers.ModelSerializer):
@@ -45,3 +45,38 @@ class ExpressShipSerializer(serializers.Serializer):
     """快递发货序列化器"""
     express_company_code = serializers.CharField(help_text='快递公司代码: SF/YTO')
     remark = serializers.CharField(required=False, allow_blank=True, help_text='备注')
+
+
+class ShipBatchCreateSerializer(serializers.Serializer):
+    """批量发货序列化器"""
+    express_company_code = serializers.CharField(help_text='快递公司代码: SF/YTO')
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False, help_text='订单ID列表'
+    )
+    filter = serializers.DictField(
+        required=False, help_text='筛选条件: created_after, created_before, delivery_type；不传 order_ids 时使用'
+    )
+    remark = serializers.CharField(required=False, allow_blank=True, default='', help_text='备注')
+
+
+class ShipBatchItemSerializer(serializers.ModelSerializer):
+    """批量发货明细序列化器"""
+
+    class Meta:
+        model = ShipBatchItem
+        fields = ['order', 'order_no', 'status', 'express_no', 'error', 'updated_at']
+
+
+class ShipBatchSerializer(serializers.ModelSerializer):
+    """批量发货任务序列化器"""
+    express_company_name = serializers.CharField(source='express_company.name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ShipBatch
+        fields = [
+            'id', 'express_company', 'express_company_name', 'remark', 'status', 'status_display',
+            'total', 'succeeded', 'failed', 'progress', 'error',
+            'started_at', 'finished_at', 'created_at'
+        ]
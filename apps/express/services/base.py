@@ -26,7 +26,7 @@ class ExpressResult:
 class TraceInfo:
     """物流轨迹信息"""
     time: str
-    status: str
+    status: str  # 统一的物流状态（created/collected/in_transit/delivering/signed），不是承运商原始代码
     description: str
     location: str = ''
 
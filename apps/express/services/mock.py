@@ -1,14 +1,43 @@
 """
 模拟快递服务 - 用于演示/测试
 根据快递单号生成固定的随机数据，保证同一单号每次查询结果一致
+
+轨迹从下单时间（模拟单号中的时间戳，其他单号按种子取固定时间）起按时间顺序生成，
+查询时只返回已发生的部分，最终签收；同一单号的轨迹时间和内容始终相同。
+生成的完整轨迹按快递单号缓存在有界 LRU 中。可配置接口延迟和失败率，
+作为本地压测用的快递公司。
+
+配置 (settings.EXPRESS_MOCK，或构造时传入的 config):
+    LATENCY_MS: 每次调用的模拟延迟范围（毫秒）(最小, 最大)，默认 (0, 0)
+    FAILURE_RATE: 调用失败的概率 0 ~ 1，默认 0
+    CACHE_SIZE: 轨迹缓存条数，默认 10000
 """
 import time
 import random
 import base64
 import hashlib
+import itertools
+import os
+import re
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
+
+from django.conf import settings
+
 from .base import ExpressService, ExpressResult, TraceResult, TraceInfo
 
+DEFAULT_CONFIG = {
+    'LATENCY_MS': (0, 0),
+    'FAILURE_RATE': 0.0,
+    'CACHE_SIZE': 10000,
+}
+
+# 模拟单号: SF + 下单时间戳 + 4 位序号
+EXPRESS_NO_PATTERN = re.compile(r'^SF(\d{10})\d{4}$')
+# 其他单号的下单时间基准
+TRACE_EPOCH = datetime(2025, 1, 1)
+
 
 # 模拟数据池
 COURIER_NAMES = [
@@ -33,11 +62,85 @@ def get_seed_from_express_no(express_no: str) -> int:
     return int(hashlib.md5(express_no.encode()).hexdigest()[:8], 16)
 
 
+class TraceCache:
+    """线程安全的有界 LRU 缓存"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 模拟单号序号，保证同一进程同一秒内下单的单号不重复
+_express_sequence = itertools.count()
+_process_tags = {}
+
+
+def _process_tag() -> str:
+    """
+    当前进程的单号标识
+
+    进程号区分同机的多个 worker，随机段区分不同机器/容器（容器内进程号常相同）；
+    按进程号缓存，预加载后 fork 出的 worker 各自生成。
+    """
+    pid = os.getpid()
+    tag = _process_tags.get(pid)
+    if tag is None:
+        tag = _process_tags[pid] = f"{pid % 100000:05d}{random.SystemRandom().randrange(10000):04d}"
+    return tag
+
+
 class MockExpressService(ExpressService):
     """模拟快递服务，用于毕设演示"""
 
     def __init__(self, config: dict = None):
-        super().__init__(config or {})
+        config = config or {}
+        super().__init__(config)
+        self.profile = {
+            **DEFAULT_CONFIG,
+            **getattr(settings, 'EXPRESS_MOCK', {}),
+            **{key: value for key, value in config.items() if key in DEFAULT_CONFIG}
+        }
+        self.trace_cache = TraceCache(self.profile['CACHE_SIZE'])
+
+    def _simulate_call(self) -> bool:
+        """
+        按配置模拟接口延迟和失败
+
+        Returns:
+            bool: 本次调用是否成功
+        """
+        low, high = self.profile['LATENCY_MS']
+        if high > 0:
+            time.sleep(random.uniform(low, high) / 1000)
+        return random.random() >= self.profile['FAILURE_RATE']
 
     def _get_random_phone(self, rng: random.Random) -> str:
         """生成随机手机号"""
@@ -70,7 +173,9 @@ class MockExpressService(ExpressService):
     def create_order(self, order_no: str, sender: dict, receiver: dict,
                      goods: list, remark: str = '') -> ExpressResult:
         """创建快递订单 - 返回模拟单号"""
-        express_no = f"SF{int(time.time())}{random.randint(1000, 9999)}"
+        if not self._simulate_call():
+            return ExpressResult(success=False, message='模拟下单失败')
+        express_no = f"SF{int(time.time())}{_process_tag()}{next(_express_sequence) % 10000:04d}"
         return ExpressResult(
             success=True,
             express_no=express_no,
@@ -78,13 +183,42 @@ class MockExpressService(ExpressService):
         )
 
     def query_trace(self, express_no: str) -> TraceResult:
-        """查询物流轨迹 - 根据单号生成固定的随机轨迹"""
+        """查询物流轨迹 - 根据单号生成固定的随机轨迹，只返回已发生的部分"""
+        if not self._simulate_call():
+            return TraceResult(success=False, message='模拟查询失败')
+
+        timeline = self.trace_cache.get(express_no)
+        if timeline is None:
+            timeline = self._generate_traces(express_no)
+            self.trace_cache.set(express_no, timeline)
+
+        now = datetime.now()
+        traces = [trace for time_, trace in reversed(timeline) if time_ <= now]
+        return TraceResult(
+            success=True,
+            status=traces[0].status if traces else 'created',
+            traces=traces,
+            message='查询成功'
+        )
+
+    def _trace_origin(self, express_no: str) -> datetime:
+        """
+        下单时间：模拟单号中含下单时间戳时取该时间，否则按单号种子取固定时间
+
+        同一单号的轨迹时间始终相同，重复查询不会产生新的轨迹。
+        """
+        matched = EXPRESS_NO_PATTERN.match(express_no)
+        if matched:
+            return datetime.fromtimestamp(int(matched.group(1)))
+        seed = get_seed_from_express_no(express_no)
+        return TRACE_EPOCH + timedelta(seconds=seed % (365 * 24 * 3600))
+
+    def _generate_traces(self, express_no: str) -> list:
+        """从下单时间起按时间顺序生成完整轨迹（含签收） [(时间, TraceInfo)]"""
         # 使用快递单号作为随机种子，保证同一单号每次查询结果一致
         seed = get_seed_from_express_no(express_no)
         rng = random.Random(seed)
 
-        now = datetime.now()
-
         # 随机生成快递员
         pickup_courier = self._get_random_courier(rng)
         delivery_courier = self._get_random_courier(rng)
@@ -92,69 +226,42 @@ class MockExpressService(ExpressService):
         # 随机生成路线
         route = self._get_random_route(rng)
 
-        # 生成轨迹
+        current = self._trace_origin(express_no)
         traces = []
-        hour_offset = 1
-
-        # 派送中
-        traces.append(TraceInfo(
-            time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-            status='delivering',
-            description=f'【派送中】快递员 {delivery_courier["name"]} ({delivery_courier["phone"]}) 正在为您派送，请保持电话畅通',
-            location=route[-1]['location']
-        ))
-        hour_offset += rng.randint(1, 3)
 
-        # 到达派送点
-        traces.append(TraceInfo(
-            time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-            status='delivering',
-            description=f'快件已到达【{route[-1]["location"]}】，快递员 {delivery_courier["name"]} 正在安排派送',
-            location=route[-1]['location']
-        ))
-        hour_offset += rng.randint(2, 5)
-
-        # 中转站点（倒序遍历路线）
-        for i in range(len(route) - 2, 0, -1):
-            traces.append(TraceInfo(
-                time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-                status='in_transit',
-                description=f'快件已到达【{route[i]["location"]}】',
-                location=route[i]['location']
-            ))
-            hour_offset += rng.randint(3, 8)
-
-            traces.append(TraceInfo(
-                time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-                status='in_transit',
-                description=f'快件已从【{route[i-1]["location"] if i > 0 else route[0]["location"]}】发出，正发往【{route[i]["location"]}】',
-                location=route[i-1]['location'] if i > 0 else route[0]['location']
-            ))
-            hour_offset += rng.randint(2, 4)
+        def add(status, description, location, hours):
+            nonlocal current
+            traces.append((current, TraceInfo(
+                time=current.strftime('%Y-%m-%d %H:%M:%S'),
+                status=status,
+                description=description,
+                location=location
+            )))
+            current += timedelta(hours=hours)
 
+        # 已下单
+        add('created', '顺丰速运 已收到订单信息，等待揽收', route[0]['location'], rng.randint(1, 3))
         # 已揽收
-        traces.append(TraceInfo(
-            time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-            status='collected',
-            description=f'【已揽收】快递员 {pickup_courier["name"]} ({pickup_courier["phone"]}) 已揽件',
-            location=route[0]['location']
-        ))
-        hour_offset += rng.randint(1, 3)
+        add('collected', f'【已揽收】快递员 {pickup_courier["name"]} ({pickup_courier["phone"]}) 已揽件',
+            route[0]['location'], rng.randint(2, 4))
 
-        # 已下单
-        traces.append(TraceInfo(
-            time=(now - timedelta(hours=hour_offset)).strftime('%Y-%m-%d %H:%M:%S'),
-            status='created',
-            description='顺丰速运 已收到订单信息，等待揽收',
-            location=route[0]['location']
-        ))
+        # 中转站点
+        for i in range(1, len(route) - 1):
+            add('in_transit', f'快件已从【{route[i-1]["location"]}】发出，正发往【{route[i]["location"]}】',
+                route[i-1]['location'], rng.randint(3, 8))
+            add('in_transit', f'快件已到达【{route[i]["location"]}】', route[i]['location'], rng.randint(2, 5))
 
-        return TraceResult(
-            success=True,
-            status='delivering',
-            traces=traces,
-            message='查询成功'
-        )
+        # 到达派送点
+        add('delivering', f'快件已到达【{route[-1]["location"]}】，快递员 {delivery_courier["name"]} 正在安排派送',
+            route[-1]['location'], rng.randint(1, 3))
+        # 派送中
+        add('delivering',
+            f'【派送中】快递员 {delivery_courier["name"]} ({delivery_courier["phone"]}) 正在为您派送，请保持电话畅通',
+            route[-1]['location'], rng.randint(1, 2))
+        # 已签收
+        add('signed', '【已签收】快件已签收，感谢使用顺丰速运', route[-1]['location'], 0)
+
+        return traces
 
     def cancel_order(self, express_no: str) -> ExpressResult:
         """取消快递订单"""
@@ -165,6 +272,8 @@ class MockExpressService(ExpressService):
 
     def get_waybill_image(self, express_no: str, order_no: str = '') -> dict:
         """获取电子面单图片 - 返回模拟面单"""
+        if not self._simulate_call():
+            return {'success': False, 'message': '模拟获取面单失败'}
         # 根据单号生成固定随机数据
         seed = get_seed_from_express_no(express_no)
         rng = random.Random(seed)
@@ -13,8 +13,8 @@ import time
 import uuid
 import hashlib
 import base64
-import requests
 from typing import List
+from apps.common.transport import get_transport
 from .base import ExpressService, ExpressResult, TraceResult, TraceInfo
 
 
@@ -25,6 +25,20 @@ class SFExpressService(ExpressService):
     PROD_URL = 'https://bspgw.sf-express.com/std/service'
     TEST_URL = 'https://sfapi-sbox.sf-express.com/std/service'
 
+    # 只读接口，失败可安全重试
+    IDEMPOTENT_SERVICES = {
+        'EXP_RECE_SEARCH_ROUTES', 'EXP_RECE_SEARCH_PRICE',
+        'EXP_RECE_SEARCH_WAYBILL_IMAGE', 'EXP_RECE_SEARCH_PICKUP_TIME',
+    }
+
+    # 路由操作码 -> 物流状态，未列出的操作码沿用当前状态
+    TRACE_STATUSES = {
+        '50': 'collected', '51': 'collected',  # 揽收
+        '30': 'in_transit', '31': 'in_transit', '36': 'in_transit',  # 运输
+        '44': 'delivering', '45': 'delivering',  # 派送
+        '80': 'signed',  # 签收
+    }
+
     def __init__(self, config: dict):
         super().__init__(config)
         self.partner_id = config.get('app_id', '')  # 顾客编码
@@ -57,7 +71,10 @@ class SFExpressService(ExpressService):
         }
 
         try:
-            response = requests.post(self.api_url, data=data, headers=headers, timeout=30)
+            response = get_transport(self.api_url).post(
+                self.api_url, data=data, headers=headers,
+                idempotent=service_code in self.IDEMPOTENT_SERVICES
+            )
             result = response.json()
             return result
         except Exception as e:
@@ -165,20 +182,10 @@ class SFExpressService(ExpressService):
             current_status = 'created'
 
             for route in routes:
-                op_code = route.get('opCode', '')
-                # 根据操作码判断状态
-                if op_code in ['50', '51']:  # 揽收
-                    current_status = 'collected'
-                elif op_code in ['30', '31', '36']:  # 运输
-                    current_status = 'in_transit'
-                elif op_code in ['44', '45']:  # 派送
-                    current_status = 'delivering'
-                elif op_code == '80':  # 签收
-                    current_status = 'signed'
-
+                current_status = self.TRACE_STATUSES.get(route.get('opCode', ''), current_status)
                 traces.append(TraceInfo(
                     time=route.get('acceptTime', ''),
-                    status=op_code,
+                    status=current_status,
                     description=route.get('remark', ''),
                     location=route.get('acceptAddress', '')
                 ))
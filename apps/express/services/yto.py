@@ -11,8 +11,8 @@
 import json
 import time
 import hashlib
-import requests
 from typing import List
+from apps.common.transport import get_transport
 from .base import ExpressService, ExpressResult, TraceResult, TraceInfo
 
 
@@ -23,6 +23,17 @@ class YTOExpressService(ExpressService):
     PROD_URL = 'https://openapi.yto.net.cn/open/api'
     TEST_URL = 'https://openapi-test.yto.net.cn/open/api'
 
+    # 只读接口，失败可安全重试
+    IDEMPOTENT_METHODS = {'yto.open.waybill.trace.query', 'yto.open.waybill.get'}
+
+    # 扫描类型 -> 物流状态，未列出的扫描类型沿用当前状态
+    TRACE_STATUSES = {
+        'GOT': 'collected',  # 揽收
+        'ARRIVAL': 'in_transit', 'DEPARTURE': 'in_transit',  # 到达/发出
+        'SENT_SCAN': 'delivering',  # 派送
+        'SIGNED': 'signed',  # 签收
+    }
+
     def __init__(self, config: dict):
         super().__init__(config)
         self.app_key = config.get('app_key', '')
@@ -61,7 +72,10 @@ class YTOExpressService(ExpressService):
         }
 
         try:
-            response = requests.post(self.api_url, data=all_params, headers=headers, timeout=30)
+            response = get_transport(self.api_url).post(
+                self.api_url, data=all_params, headers=headers,
+                idempotent=method in self.IDEMPOTENT_METHODS
+            )
             result = response.json()
             return result
         except Exception as e:
@@ -161,20 +175,10 @@ class YTOExpressService(ExpressService):
             current_status = 'created'
 
             for trace in trace_list:
-                scan_type = trace.get('scanType', '')
-                # 根据扫描类型判断状态
-                if scan_type == 'GOT':  # 揽收
-                    current_status = 'collected'
-                elif scan_type in ['ARRIVAL', 'DEPARTURE']:  # 到达/发出
-                    current_status = 'in_transit'
-                elif scan_type == 'SENT_SCAN':  # 派送
-                    current_status = 'delivering'
-                elif scan_type == 'SIGNED':  # 签收
-                    current_status = 'signed'
-
+                current_status = self.TRACE_STATUSES.get(trace.get('scanType', ''), current_status)
                 traces.append(TraceInfo(
                     time=trace.get('scanTime', ''),
-                    status=scan_type,
+                    status=current_status,
                     description=trace.get('desc', ''),
                     location=trace.get('scanStation', '')
                 ))
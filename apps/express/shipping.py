@@ -0,0 +1,430 @@
+"""
+批量发货
+
+按订单ID列表或筛选条件创建发货任务，后台分批处理：每批用线程池并发调用快递公司下单接口，
+再用批量写入保存快递订单、订单状态和发货明细。任务中断后可继续执行；
+以订单号为幂等键，已发货的订单不会重复下单。下单后订单状态已变化（单独发货、取消等）的，
+调用快递公司接口取消未使用的快递单，取消失败的明细保留单号和原因，供人工对账。
+开始执行时用条件 UPDATE 递增 attempt 认领任务，每批写入前锁定任务行确认仍是最新一次执行，
+被接管的旧执行回滚本批、取消本批新建的快递单后停止，不会覆盖明细或重复计数。
+
+配置 (settings.EXPRESS_SHIP_BATCH):
+    WORKERS: 并发调用快递公司接口的线程数，默认 8
+    CHUNK_SIZE: 每批处理的订单数，默认 100
+"""
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.orders.models import Order
+from .models import ExpressOrder, ShipBatch, ShipBatchItem
+from .tracking import next_poll_time
+from .utils import get_express_service, get_sender_info
+
+logger = logging.getLogger(__name__)
+
+# 批量发货支持的订单筛选条件
+ORDER_FILTERS = {
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+    'delivery_type': 'delivery_type',
+}
+
+ORDER_SHIP_FIELDS = ['status', 'shipped_at', 'express_company', 'express_no', 'express_status', 'updated_at']
+
+# 下单后订单状态已变化、未使用的快递单的处理结果
+UNUSED_WAYBILL_ERRORS = {
+    'pending': '订单状态已变化，快递单待取消',
+    'cancelled': '订单状态已变化，快递单已取消',
+    'cancel_failed': '订单状态已变化，快递单取消失败，需人工对账',
+}
+
+
+class ShipBatchSuperseded(Exception):
+    """发货任务已被新的执行接管"""
+
+
+def get_config() -> dict:
+    return {'WORKERS': 8, 'CHUNK_SIZE': 100, **getattr(settings, 'EXPRESS_SHIP_BATCH', {})}
+
+
+def shippable_orders():
+    """可发货的订单：已支付且尚无快递单号"""
+    return Order.objects.filter(status='paid').filter(Q(express_no__isnull=True) | Q(express_no=''))
+
+
+def build_shipment(order: Order):
+    """
+    订单的收件人和商品信息
+
+    Returns:
+        tuple: (receiver, goods)
+    """
+    receiver = {
+        'name': order.receiver_name,
+        'phone': order.receiver_phone,
+        'province': '',
+        'city': '',
+        'district': '',
+        'address': order.receiver_address
+    }
+    goods = [{'name': item.product_name, 'quantity': item.quantity} for item in order.items.all()]
+    return receiver, goods
+
+
+def filter_orders(queryset, filters: dict):
+    """
+    按筛选条件过滤订单
+
+    Raises:
+        ValueError: 条件不支持或格式不正确
+    """
+    unknown = set(filters) - set(ORDER_FILTERS)
+    if unknown:
+        raise ValueError(f'不支持的筛选条件: {", ".join(sorted(unknown))}')
+    for key, lookup in ORDER_FILTERS.items():
+        value = filters.get(key)
+        if value in (None, ''):
+            continue
+        if key.startswith('created_'):
+            value = parse_datetime(str(value))
+            if value is None:
+                raise ValueError(f'{key} 时间格式不正确')
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+        queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+def create_ship_batch(express_company, order_ids=None, filters=None, remark: str = '', user=None) -> ShipBatch:
+    """
+    创建批量发货任务并在事务提交后开始后台执行
+
+    Args:
+        express_company: 快递公司
+        order_ids: 订单ID列表
+        filters: 筛选条件（不传 order_ids 时使用），为空表示全部可发货订单
+        remark: 备注
+        user: 创建人
+
+    Returns:
+        ShipBatch: 发货任务
+
+    Raises:
+        ValueError: 筛选条件不正确或没有可发货的订单
+    """
+    orders = shippable_orders()
+    if order_ids is not None:
+        orders = orders.filter(pk__in=order_ids)
+    else:
+        orders = filter_orders(orders, filters or {})
+
+    with transaction.atomic():
+        batch = ShipBatch.objects.create(express_company=express_company, remark=remark, created_by=user)
+        items = [
+            ShipBatchItem(batch=batch, order_id=order_id, order_no=order_no)
+            for order_id, order_no in orders.order_by('pk').values_list('pk', 'order_no')
+        ]
+        if not items:
+            raise ValueError('没有可发货的订单')
+        ShipBatchItem.objects.bulk_create(items, batch_size=500)
+        batch.total = len(items)
+        batch.save(update_fields=['total'])
+        transaction.on_commit(lambda: run_ship_batch_in_background(batch.pk))
+    return batch
+
+
+def resume_ship_batch(batch: ShipBatch, retry_failed: bool = True) -> ShipBatch:
+    """
+    继续执行发货任务，可选把失败的明细重新加入待发货
+
+    Returns:
+        ShipBatch: 发货任务
+    """
+    with transaction.atomic():
+        # 递增 attempt：正在执行的旧任务在下一批写入前停止
+        ShipBatch.objects.select_for_update().filter(pk=batch.pk).update(attempt=F('attempt') + 1)
+        if retry_failed:
+            # 未使用快递单的明细保留单号和原因供对账，不重新发货
+            batch.items.filter(status='failed').exclude(error__in=UNUSED_WAYBILL_ERRORS.values()).update(
+                status='pending', error='', updated_at=timezone.now()
+            )
+        counts = dict(batch.items.values_list('status').annotate(total=Count('id')).order_by())
+        ShipBatch.objects.filter(pk=batch.pk).update(
+            status='pending',
+            succeeded=counts.get('success', 0),
+            failed=counts.get('failed', 0),
+            error=None,
+            finished_at=None
+        )
+        transaction.on_commit(lambda: run_ship_batch_in_background(batch.pk))
+    batch.refresh_from_db()
+    return batch
+
+
+def run_ship_batch_in_background(batch_id: int) -> None:
+    """在后台线程中执行发货任务"""
+    def target():
+        try:
+            run_ship_batch(batch_id)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=target, name=f'ship-batch-{batch_id}', daemon=True).start()
+
+
+def _create_express_order(service, sender: dict, order: Order, remark: str):
+    """调用快递公司下单（在线程池中执行，不访问数据库）"""
+    receiver, goods = build_shipment(order)
+    try:
+        return service.create_order(
+            order_no=order.order_no,
+            sender=sender,
+            receiver=receiver,
+            goods=goods,
+            remark=remark
+        )
+    except Exception as e:
+        logger.exception('批量发货下单失败: %s', order.order_no)
+        return e
+
+
+def run_ship_batch(batch_id: int, chunk_size: int = None, workers: int = None) -> ShipBatch:
+    """
+    分批执行发货任务，只处理待发货的明细，中断后重新执行即可继续
+
+    Args:
+        batch_id: 发货任务ID
+        chunk_size: 每批订单数
+        workers: 并发下单线程数
+
+    Returns:
+        ShipBatch: 执行后的任务
+    """
+    config = get_config()
+    chunk_size = chunk_size or config['CHUNK_SIZE']
+    workers = workers or config['WORKERS']
+
+    batch = ShipBatch.objects.select_related('express_company').get(pk=batch_id)
+    if batch.status == 'completed':
+        return batch
+
+    company = batch.express_company
+    service = get_express_service(company.code)
+    sender = get_sender_info(company.code)
+    if not service or not sender.get('name'):
+        ShipBatch.objects.filter(pk=batch_id).update(
+            status='failed', error='快递服务不可用或未配置发件人信息', finished_at=timezone.now()
+        )
+        batch.refresh_from_db()
+        return batch
+
+    attempt = batch.attempt + 1
+    claimed = ShipBatch.objects.filter(pk=batch_id, status=batch.status, attempt=batch.attempt).update(
+        status='running', attempt=attempt, started_at=batch.started_at or timezone.now(), error=None
+    )
+    if not claimed:
+        # 其他执行已认领或已完成
+        batch.refresh_from_db()
+        return batch
+
+    current = ShipBatch.objects.filter(pk=batch_id, attempt=attempt)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            last_item_id = 0
+            while True:
+                items = list(batch.items.filter(status='pending', pk__gt=last_item_id).order_by('pk')[:chunk_size])
+                if not items:
+                    break
+                last_item_id = items[-1].pk
+                _process_chunk(batch, current, items, service, sender, executor)
+    except ShipBatchSuperseded:
+        logger.warning('批量发货任务已被接管，停止本次执行: %s', batch_id)
+    except Exception as e:
+        logger.exception('批量发货任务失败: %s', batch_id)
+        current.update(status='failed', error=str(e))
+    else:
+        current.update(status='completed', finished_at=timezone.now())
+
+    batch.refresh_from_db()
+    return batch
+
+
+def _process_chunk(batch: ShipBatch, current, items, service, sender: dict, executor) -> None:
+    orders = Order.objects.filter(pk__in=[item.order_id for item in items]).prefetch_related('items').in_bulk()
+
+    to_ship = []
+    for item in items:
+        order = orders.get(item.order_id)
+        if order is None:
+            item.status, item.error = 'failed', '订单不存在'
+        elif order.express_no:
+            # 已发货（上次执行中断或单独发货），按订单号幂等处理
+            if order.status == 'shipped':
+                item.status, item.express_no = 'success', order.express_no
+            else:
+                item.status, item.error = 'failed', '订单已有快递单号'
+        elif order.status != 'paid':
+            item.status, item.error = 'failed', '订单状态不正确，只有已支付订单可以发货'
+        else:
+            to_ship.append(item)
+
+    results = executor.map(
+        lambda item: _create_express_order(service, sender, orders[item.order_id], batch.remark),
+        to_ship
+    )
+    shipped = {}
+    for item, result in zip(to_ship, results):
+        if isinstance(result, Exception):
+            item.status, item.error = 'failed', str(result)[:200]
+        elif not result.success:
+            item.status, item.error = 'failed', (result.message or '下单失败')[:200]
+        else:
+            item.express_no = result.express_no
+            shipped[item.order_id] = item
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            # 锁定任务行确认仍是最新一次执行（认领也要等本批提交），之后再写订单和明细
+            if not list(current.select_for_update().values_list('pk', flat=True)):
+                raise ShipBatchSuperseded()
+            _save_chunk(batch, current, items, shipped, now)
+    except ShipBatchSuperseded:
+        # 本批未写入，新建的快递单不会被使用
+        express_nos = [item.express_no for item in shipped.values()]
+        for express_no, cancelled in zip(express_nos, _cancel_waybills(service, express_nos, executor)):
+            if not cancelled:
+                logger.error('被接管的发货任务新建的快递单取消失败，需人工对账: %s %s', batch.pk, express_no)
+        raise
+
+    unused = [item for item in shipped.values() if item.status == 'failed']
+    if unused:
+        _cancel_unused_waybills(unused, service, executor)
+
+
+def _save_chunk(batch: ShipBatch, current, items, shipped: dict, now) -> None:
+    """保存一批的发货结果（在事务中调用）"""
+    # 加锁确认订单仍可发货，防止与单独发货或其他任务重复
+    locked = shippable_orders().select_for_update().filter(pk__in=list(shipped)).in_bulk()
+    updated_orders = []
+    express_orders = []
+    for order_id, item in shipped.items():
+        order = locked.get(order_id)
+        if order is None:
+            item.status, item.error = 'failed', UNUSED_WAYBILL_ERRORS['pending']
+            continue
+        order.status = 'shipped'
+        order.shipped_at = now
+        order.express_company = batch.express_company.code
+        order.express_no = item.express_no
+        order.express_status = 'created'
+        updated_orders.append(order)
+        express_orders.append(ExpressOrder(
+            order=order,
+            express_company=batch.express_company,
+            express_no=item.express_no,
+            status='created',
+            receiver_name=order.receiver_name,
+            receiver_phone=order.receiver_phone,
+            receiver_address=order.receiver_address,
+            next_poll_at=next_poll_time('created', now)
+        ))
+        item.status, item.error = 'success', ''
+
+    if updated_orders:
+        # 只有快递单号逐单不同，一条 UPDATE 写入整批订单
+        Order.objects.filter(pk__in=[order.pk for order in updated_orders]).update(
+            status='shipped',
+            shipped_at=now,
+            express_company=batch.express_company.code,
+            express_status='created',
+            updated_at=now,
+            express_no=_case_by_pk([(order.pk, order.express_no) for order in updated_orders])
+        )
+        ExpressOrder.objects.bulk_create(express_orders)
+        for order in updated_orders:
+            # 批量 UPDATE 不触发信号，手动通知统计模块
+            post_save.send(sender=Order, instance=order, created=False, update_fields=ORDER_SHIP_FIELDS)
+
+    _save_items(items, now)
+    current.update(
+        succeeded=F('succeeded') + sum(item.status == 'success' for item in items),
+        failed=F('failed') + sum(item.status == 'failed' for item in items)
+    )
+
+
+def _cancel_express_order(service, express_no: str):
+    """调用快递公司取消快递单（在线程池中执行，不访问数据库）"""
+    try:
+        result = service.cancel_order(express_no)
+    except Exception:
+        logger.exception('取消快递单失败: %s', express_no)
+        return False
+    if not result.success:
+        logger.error('取消快递单失败: %s %s', express_no, result.message)
+    return result.success
+
+
+def _cancel_waybills(service, express_nos, executor) -> list:
+    """
+    并发取消快递单
+
+    Returns:
+        list: 每个快递单是否取消成功
+    """
+    return list(executor.map(lambda express_no: _cancel_express_order(service, express_no), express_nos))
+
+
+def _cancel_unused_waybills(items, service, executor) -> None:
+    """
+    取消下单后未使用的快递单（事务提交后执行，不持有订单锁）
+
+    明细先以“待取消”保存，取消结果再写回；进程在此期间中断的，明细停留在“待取消”，同样可供对账。
+    """
+    results = _cancel_waybills(service, [item.express_no for item in items], executor)
+    outcomes = defaultdict(list)
+    for item, cancelled in zip(items, results):
+        if not cancelled:
+            logger.error('未使用的快递单取消失败，需人工对账: %s %s', item.order_no, item.express_no)
+        item.error = UNUSED_WAYBILL_ERRORS['cancelled' if cancelled else 'cancel_failed']
+        outcomes[item.error].append(item.pk)
+    now = timezone.now()
+    for error, pks in outcomes.items():
+        ShipBatchItem.objects.filter(pk__in=pks).update(error=error, updated_at=now)
+
+
+def _case_by_pk(values):
+    """按主键取不同字符串值的 CASE 表达式"""
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values],
+        output_field=CharField()
+    )
+
+
+def _save_items(items, now) -> None:
+    """写回发货明细：成功的一条 UPDATE，失败的按失败原因分组"""
+    succeeded = [item for item in items if item.status == 'success']
+    if succeeded:
+        ShipBatchItem.objects.filter(pk__in=[item.pk for item in succeeded]).update(
+            status='success',
+            error='',
+            updated_at=now,
+            express_no=_case_by_pk([(item.pk, item.express_no) for item in succeeded])
+        )
+    failed = defaultdict(list)
+    for item in items:
+        if item.status == 'failed':
+            failed[(item.error, item.express_no)].append(item.pk)
+    for (error, express_no), pks in failed.items():
+        ShipBatchItem.objects.filter(pk__in=pks).update(
+            status='failed', error=error, express_no=express_no, updated_at=now
+        )
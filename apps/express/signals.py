@@ -0,0 +1,18 @@
+"""
+快递模块 - 信号处理
+
+快递公司配置变化后（事务提交时）清空进程内的快递服务缓存（见 utils.py），
+避免提交前其他请求按旧配置重建缓存。
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ExpressCompany
+from .utils import invalidate_registry
+
+
+@receiver(post_save, sender=ExpressCompany)
+@receiver(post_delete, sender=ExpressCompany)
+def invalidate_express_registry(sender, **kwargs):
+    transaction.on_commit(invalidate_registry)
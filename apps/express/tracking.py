@@ -0,0 +1,286 @@
+"""
+物流轨迹轮询
+
+后台定时（python manage.py poll_express_traces）分批查询在途快递订单的最新轨迹并保存，
+查询间隔按物流状态调整：刚下单和运输中查得勤，已签收、已取消不再查询。
+查询物流的接口只读取已保存的轨迹，不再同步调用快递公司接口。
+
+配置 (settings.EXPRESS_TRACE_POLL):
+    INTERVALS: 各状态的轮询间隔（秒），None 表示不再轮询
+    BATCH_SIZE: 每批查询的订单数，默认 200
+    WORKERS: 并发查询线程数，默认 8
+    CACHE_TTL: 没有快递订单记录时直接查询结果的缓存时间（秒），默认 600
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import DateTimeField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.orders.models import Order
+from .models import ExpressOrder, ExpressTrace
+from .utils import get_express_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVALS = {
+    'created': 10 * 60,
+    'collected': 30 * 60,
+    'in_transit': 15 * 60,
+    'delivering': 10 * 60,
+    'failed': 2 * 60 * 60,
+    'signed': None,
+    'cancelled': None,
+}
+
+# 已揽收及之后的物流状态
+COLLECTED_STATUSES = {'collected', 'in_transit', 'delivering', 'signed'}
+
+
+def get_config() -> dict:
+    config = {'BATCH_SIZE': 200, 'WORKERS': 8, 'CACHE_TTL': 600, **getattr(settings, 'EXPRESS_TRACE_POLL', {})}
+    config['INTERVALS'] = {**DEFAULT_INTERVALS, **config.get('INTERVALS', {})}
+    return config
+
+
+def next_poll_time(status: str, now=None):
+    """按物流状态计算下次轮询时间，不再轮询时返回 None"""
+    interval = get_config()['INTERVALS'].get(status)
+    if interval is None:
+        return None
+    return (now or timezone.now()) + timedelta(seconds=interval)
+
+
+def _parse_trace_time(value):
+    """快递公司返回的轨迹时间（本地时间字符串）转为带时区的时间"""
+    if not isinstance(value, datetime):
+        value = parse_datetime(str(value or ''))
+    if value is None:
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def ingest_trace_result(express_order: ExpressOrder, result, now=None) -> int:
+    """
+    保存查询到的轨迹并更新物流状态
+
+    按 (时间, 描述) 摘要与已保存的轨迹比对，只用一次 bulk_create 插入新轨迹
+    （唯一约束兜底并发写入），再用一条 UPDATE 更新状态、揽收时间和签收时间。
+
+    Args:
+        express_order: 快递订单
+        result: TraceResult（查询成功）
+
+    Returns:
+        int: 新增的轨迹数
+    """
+    now = now or timezone.now()
+    events = {}
+    collected_at = signed_at = None
+    for trace in result.traces:
+        time = _parse_trace_time(trace.time)
+        if time is None:
+            continue
+        event_hash = ExpressTrace.make_event_hash(time, trace.description)
+        events.setdefault(event_hash, ExpressTrace(
+            express_order=express_order,
+            time=time,
+            status=trace.status,
+            description=trace.description,
+            location=trace.location,
+            event_hash=event_hash
+        ))
+        # 轨迹状态已由各快递服务统一，取第一条揽收/签收轨迹的时间
+        if trace.status == 'collected':
+            collected_at = min(collected_at or time, time)
+        elif trace.status == 'signed':
+            signed_at = min(signed_at or time, time)
+
+    updates = {
+        'status': result.status,
+        'last_polled_at': now,
+        'next_poll_at': next_poll_time(result.status, now),
+        'updated_at': now,
+    }
+    # 揽收、签收时间只记录第一次
+    if result.status in COLLECTED_STATUSES:
+        updates['collected_at'] = Coalesce('collected_at', Value(collected_at or now, output_field=DateTimeField()))
+    if result.status == 'signed':
+        updates['signed_at'] = Coalesce('signed_at', Value(signed_at or now, output_field=DateTimeField()))
+
+    with transaction.atomic():
+        existing = set(ExpressTrace.objects.filter(
+            express_order=express_order, event_hash__in=list(events)
+        ).values_list('event_hash', flat=True)) if events else set()
+        new_traces = [trace for event_hash, trace in events.items() if event_hash not in existing]
+        if new_traces:
+            ExpressTrace.objects.bulk_create(new_traces, ignore_conflicts=True)
+        ExpressOrder.objects.filter(pk=express_order.pk).update(**updates)
+        if express_order.status != result.status:
+            Order.objects.filter(
+                pk=express_order.order_id, express_no=express_order.express_no
+            ).update(express_status=result.status)
+    express_order.status = result.status
+    express_order.last_polled_at = now
+    return len(new_traces)
+
+
+def refresh_express_order(express_order: ExpressOrder) -> bool:
+    """
+    立即查询并保存一个快递订单的轨迹
+
+    Returns:
+        bool: 是否查询成功
+    """
+    service = get_express_service(express_order.express_company.code)
+    if not service:
+        return False
+    result = service.query_trace(express_order.express_no)
+    if not result.success:
+        return False
+    ingest_trace_result(express_order, result)
+    return True
+
+
+def _query(express_order: ExpressOrder):
+    try:
+        service = get_express_service(express_order.express_company.code)
+        return service.query_trace(express_order.express_no) if service else None
+    except Exception:
+        logger.exception('物流轨迹查询失败: %s', express_order.express_no)
+        return None
+    finally:
+        close_old_connections()
+
+
+def poll_due(batch_size: int = None, now=None) -> dict:
+    """
+    查询一批到期的快递订单
+
+    Returns:
+        dict: polled 查询数，updated 成功保存数，failed 失败数
+    """
+    config = get_config()
+    now = now or timezone.now()
+    batch_size = batch_size or config['BATCH_SIZE']
+    pollable = [status for status, interval in config['INTERVALS'].items() if interval is not None]
+
+    express_orders = list(
+        ExpressOrder.objects.filter(
+            status__in=pollable, next_poll_at__lte=now
+        ).select_related('express_company').order_by('next_poll_at')[:batch_size]
+    )
+    stats = {'polled': len(express_orders), 'updated': 0, 'failed': 0}
+    if not express_orders:
+        return stats
+
+    with ThreadPoolExecutor(max_workers=config['WORKERS']) as executor:
+        results = list(executor.map(_query, express_orders))
+
+    for express_order, result in zip(express_orders, results):
+        if result is not None and result.success:
+            try:
+                ingest_trace_result(express_order, result, now)
+            except Exception:
+                # 单个订单保存失败不影响本批其他订单
+                logger.exception('物流轨迹保存失败: %s', express_order.express_no)
+            else:
+                stats['updated'] += 1
+                continue
+        # 查询或保存失败，按原状态的间隔稍后重试
+        ExpressOrder.objects.filter(pk=express_order.pk).update(
+            next_poll_at=next_poll_time(express_order.status, now)
+        )
+        stats['failed'] += 1
+    return stats
+
+
+def poll_all_due(batch_size: int = None) -> dict:
+    """循环查询直到没有到期订单"""
+    total = {'polled': 0, 'updated': 0, 'failed': 0}
+    now = timezone.now()
+    while True:
+        stats = poll_due(batch_size, now)
+        for key, value in stats.items():
+            total[key] += value
+        if stats['polled'] < (batch_size or get_config()['BATCH_SIZE']):
+            return total
+
+
+# ---------- 接口读取 ----------
+
+def _format_time(value):
+    if hasattr(value, 'strftime'):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def _format_traces(traces) -> list:
+    return [
+        {'time': _format_time(trace.time), 'description': trace.description, 'location': trace.location}
+        for trace in traces
+    ]
+
+
+def get_order_tracking(order: Order) -> dict:
+    """
+    获取订单的物流信息（接口使用）
+
+    有快递订单记录时读取已保存的轨迹（从未查询过的先查询一次）；
+    没有记录时直接查询快递公司并缓存 CACHE_TTL 秒。
+
+    Returns:
+        dict: express_company, express_no, status, traces，查询失败时带 message
+    """
+    express_order = ExpressOrder.objects.filter(
+        order=order, express_no=order.express_no
+    ).select_related('express_company').order_by('-created_at').first()
+
+    if express_order is not None:
+        if express_order.last_polled_at is None:
+            refresh_express_order(express_order)
+        return {
+            'express_company': order.express_company,
+            'express_no': order.express_no,
+            'status': express_order.status,
+            'traces': _format_traces(express_order.traces.all()),
+        }
+
+    cache_key = f'express_trace:{order.express_company}:{order.express_no}'
+    data = cache.get(cache_key)
+    if data is None:
+        service = get_express_service(order.express_company)
+        if not service:
+            return {
+                'express_company': order.express_company,
+                'express_no': order.express_no,
+                'status': order.express_status or 'unknown',
+                'traces': []
+            }
+        result = service.query_trace(order.express_no)
+        if not result.success:
+            return {
+                'express_company': order.express_company,
+                'express_no': order.express_no,
+                'status': order.express_status or 'unknown',
+                'traces': [],
+                'message': result.message
+            }
+        data = {
+            'express_company': order.express_company,
+            'express_no': order.express_no,
+            'status': result.status,
+            'traces': _format_traces(result.traces),
+        }
+        cache.set(cache_key, data, get_config()['CACHE_TTL'])
+        if order.express_status != result.status:
+            Order.objects.filter(pk=order.pk).update(express_status=result.status)
+    return data
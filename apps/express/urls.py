@@ -8,5 +8,6 @@ router.register('orders', views.ExpressOrderViewSet, basename='express-order')
 router.register('admin', views.AdminExpressViewSet, basename='admin-express')
 
 urlpatterns = [
+    path('waybills/<str:token>/', views.WaybillFileView.as_view(), name='express-waybill-file'),
     path('', include(router.urls)),
 ]
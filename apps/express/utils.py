@@ -1,13 +1,101 @@
 """
 快递服务工厂
+
+启用的快递公司配置在进程内缓存：首次使用时一次查询全部启用的快递公司，为每家构建一个
+快递服务实例（连同其 HTTP 连接池）供后续请求复用。ExpressCompany 保存或删除后
+（事务提交时，见 signals.py）清空缓存；另设 REGISTRY_TTL 秒过期，多进程部署时其他进程的修改也能生效。
 """
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional
+
 from .services import ExpressService, SFExpressService, YTOExpressService, MockExpressService
 from .models import ExpressCompany
 
 # 演示模式开关 - 设为 True 使用模拟数据，适合毕设演示
 DEMO_MODE = True
 
+# 快递公司配置缓存有效期（秒）
+REGISTRY_TTL = 300
+
+SERVICE_CLASSES = {
+    'SF': SFExpressService,
+    'YTO': YTOExpressService,
+}
+
+DEMO_SENDER = {
+    'name': '鲜奶配送中心',
+    'phone': '13800138000',
+    'province': '上海市',
+    'city': '上海市',
+    'district': '浦东新区',
+    'address': '张江高科技园区博云路2号',
+}
+
+_registry: Optional[Dict[str, dict]] = None
+_registry_built_at = 0.0
+_registry_lock = threading.Lock()
+_mock_service = MockExpressService()
+
+
+def _build_registry() -> Dict[str, dict]:
+    registry = {}
+    for company in ExpressCompany.objects.filter(is_active=True):
+        service_class = SERVICE_CLASSES.get(company.code)
+        service = service_class({
+            'app_id': company.app_id,
+            'app_key': company.app_key,
+            'app_secret': company.app_secret,
+            'customer_code': company.customer_code,
+            'api_url': company.api_url,
+        }) if service_class else None
+        registry[company.code] = {
+            'company': company,
+            'service': service,
+            'sender': {
+                'name': company.sender_name,
+                'phone': company.sender_phone,
+                'province': company.sender_province,
+                'city': company.sender_city,
+                'district': company.sender_district,
+                'address': company.sender_address,
+            },
+        }
+    return registry
+
+
+def _get_registry() -> Dict[str, dict]:
+    global _registry, _registry_built_at
+    registry = _registry
+    if registry is not None and time.monotonic() - _registry_built_at < REGISTRY_TTL:
+        return registry
+    with _registry_lock:
+        if _registry is None or time.monotonic() - _registry_built_at >= REGISTRY_TTL:
+            _registry = _build_registry()
+            _registry_built_at = time.monotonic()
+        return _registry
+
+
+def invalidate_registry() -> None:
+    """清空快递公司配置缓存"""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+def get_express_company(company_code: str) -> Optional[ExpressCompany]:
+    """
+    获取启用的快递公司
+
+    Args:
+        company_code: 快递公司代码 (SF/YTO)
+
+    Returns:
+        ExpressCompany: 快递公司，不存在或未启用时返回 None
+    """
+    entry = _get_registry().get(company_code)
+    return entry['company'] if entry else None
+
 
 def get_express_service(company_code: str) -> Optional[ExpressService]:
     """
@@ -21,27 +109,10 @@ def get_express_service(company_code: str) -> Optional[ExpressService]:
     """
     # 演示模式：返回模拟服务
     if DEMO_MODE:
-        return MockExpressService()
-
-    try:
-        company = ExpressCompany.objects.get(code=company_code, is_active=True)
-    except ExpressCompany.DoesNotExist:
-        return None
+        return _mock_service
 
-    config = {
-        'app_id': company.app_id,
-        'app_key': company.app_key,
-        'app_secret': company.app_secret,
-        'customer_code': company.customer_code,
-        'api_url': company.api_url,
-    }
-
-    if company_code == 'SF':
-        return SFExpressService(config)
-    elif company_code == 'YTO':
-        return YTOExpressService(config)
-    else:
-        return None
+    entry = _get_registry().get(company_code)
+    return entry['service'] if entry else None
 
 
 def get_sender_info(company_code: str) -> dict:
@@ -56,24 +127,7 @@ def get_sender_info(company_code: str) -> dict:
     """
     # 演示模式：返回模拟发件人信息
     if DEMO_MODE:
-        return {
-            'name': '鲜奶配送中心',
-            'phone': '13800138000',
-            'province': '上海市',
-            'city': '上海市',
-            'district': '浦东新区',
-            'address': '张江高科技园区博云路2号',
-        }
+        return dict(DEMO_SENDER)
 
-    try:
-        company = ExpressCompany.objects.get(code=company_code, is_active=True)
-        return {
-            'name': company.sender_name,
-            'phone': company.sender_phone,
-            'province': company.sender_province,
-            'city': company.sender_city,
-            'district': company.sender_district,
-            'address': company.sender_address,
-        }
-    except ExpressCompany.DoesNotExist:
-        return {}
+    entry = _get_registry().get(company_code)
+    return dict(entry['sender']) if entry else {}
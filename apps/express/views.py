@@ -1,17 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
-from .models import ExpressCompany, ExpressOrder, ExpressTrace
+from .models import ExpressCompany, ExpressOrder, ShipBatch, Waybill
 from .serializers import (
     ExpressCompanySerializer,
     ExpressCompanyDetailSerializer,
     ExpressOrderSerializer,
-    ExpressShipSerializer
+    ExpressShipSerializer,
+    ShipBatchCreateSerializer,
+    ShipBatchItemSerializer,
+    ShipBatchSerializer
 )
-from .utils import get_express_service, get_sender_info
+from .shipping import build_shipment, create_ship_batch, resume_ship_batch
+from .waybills import (
+    WAYBILL_URL_MAX_AGE,
+    WaybillError,
+    get_waybill,
+    iter_print_document,
+    read_base64,
+    unsign_waybill_token,
+    waybill_response
+)
+from .tracking import get_order_tracking, next_poll_time, refresh_express_order
+from .utils import get_express_company, get_express_service, get_sender_info
 from apps.orders.models import Order
 
 
@@ -38,47 +54,25 @@ class ExpressOrderViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = ExpressOrder.objects.select_related('express_company').prefetch_related('traces')
         if user.is_staff:
-            return ExpressOrder.objects.all()
-        return ExpressOrder.objects.filter(order__user=user)
+            return queryset
+        return queryset.filter(order__user=user)
 
     @action(detail=True, methods=['get'])
     def trace(self, request, pk=None):
-        """查询物流轨迹"""
+        """查询物流轨迹（读取后台轮询保存的轨迹）"""
         express_order = self.get_object()
 
-        # 从数据库获取已保存的轨迹
-        traces = express_order.traces.all()
-        if traces.exists():
-            serializer = ExpressOrderSerializer(express_order)
-            return Response(serializer.data)
-
-        # 调用快递API查询最新轨迹
-        service = get_express_service(express_order.express_company.code)
-        if not service:
-            return Response({'error': '快递服务不可用'}, status=status.HTTP_400_BAD_REQUEST)
+        # 从未查询过的先查询一次，之后由后台轮询更新
+        if express_order.last_polled_at is None:
+            refreshed = refresh_express_order(express_order)
+            express_order = self.get_object()
+            if not refreshed and not express_order.traces.all():
+                return Response({'error': '物流信息查询失败'}, status=status.HTTP_400_BAD_REQUEST)
 
-        result = service.query_trace(express_order.express_no)
-        if result.success:
-            # 保存轨迹到数据库
-            for trace in result.traces:
-                ExpressTrace.objects.get_or_create(
-                    express_order=express_order,
-                    time=trace.time,
-                    defaults={
-                        'status': trace.status,
-                        'description': trace.description,
-                        'location': trace.location
-                    }
-                )
-            # 更新快递状态
-            express_order.status = result.status
-            express_order.save()
-
-            serializer = ExpressOrderSerializer(express_order)
-            return Response(serializer.data)
-        else:
-            return Response({'error': result.message}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ExpressOrderSerializer(express_order)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='by-order/(?P<order_id>[^/.]+)')
     def by_order(self, request, order_id=None):
@@ -98,52 +92,15 @@ class ExpressOrderViewSet(viewsets.ReadOnlyModelViewSet):
                 return Response({'error': '订单不存在'}, status=status.HTTP_404_NOT_FOUND)
 
         # 验证用户权限（只能查看自己的订单）
-        if not request.user.is_staff and order.user != request.user:
+        if not request.user.is_staff and order.user_id != request.user.id:
             return Response({'error': '无权查看此订单'}, status=status.HTTP_403_FORBIDDEN)
 
         # 检查是否有物流信息
         if not order.express_no:
             return Response({'error': '订单暂无物流信息'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 获取快递服务
-        service = get_express_service(order.express_company)
-        if not service:
-            # 没有快递服务时，返回基本信息
-            return Response({
-                'express_company': order.express_company,
-                'express_no': order.express_no,
-                'status': order.express_status or 'unknown',
-                'traces': []
-            })
-
-        result = service.query_trace(order.express_no)
-        if result.success:
-            # 更新订单物流状态
-            order.express_status = result.status
-            order.save()
-
-            return Response({
-                'express_company': order.express_company,
-                'express_no': order.express_no,
-                'status': result.status,
-                'traces': [
-                    {
-                        'time': t.time,
-                        'description': t.description,
-                        'location': t.location
-                    }
-                    for t in result.traces
-                ]
-            })
-        else:
-            # 即使查询失败，也返回基本信息
-            return Response({
-                'express_company': order.express_company,
-                'express_no': order.express_no,
-                'status': order.express_status or 'unknown',
-                'traces': [],
-                'message': result.message
-            })
+        # 即使查询失败，也返回基本信息
+        return Response(get_order_tracking(order))
 
 
 class AdminExpressViewSet(viewsets.ViewSet):
@@ -177,9 +134,8 @@ class AdminExpressViewSet(viewsets.ViewSet):
             return Response({'error': '订单状态不正确，只有已支付订单可以发货'}, status=status.HTTP_400_BAD_REQUEST)
 
         # 获取快递公司配置
-        try:
-            express_company = ExpressCompany.objects.get(code=company_code, is_active=True)
-        except ExpressCompany.DoesNotExist:
+        express_company = get_express_company(company_code)
+        if express_company is None:
             return Response({'error': '快递公司不存在或未启用'}, status=status.HTTP_400_BAD_REQUEST)
 
         # 获取快递服务
@@ -192,23 +148,8 @@ class AdminExpressViewSet(viewsets.ViewSet):
         if not sender.get('name'):
             return Response({'error': '请先配置发件人信息'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 解析收件人地址
-        receiver = {
-            'name': order.receiver_name,
-            'phone': order.receiver_phone,
-            'province': '',
-            'city': '',
-            'district': '',
-            'address': order.receiver_address
-        }
-
-        # 获取商品信息
-        goods = []
-        for item in order.items.all():
-            goods.append({
-                'name': item.product_name,
-                'quantity': item.quantity
-            })
+        # 收件人和商品信息
+        receiver, goods = build_shipment(order)
 
         # 调用快递API下单
         result = service.create_order(
@@ -228,7 +169,8 @@ class AdminExpressViewSet(viewsets.ViewSet):
                 status='created',
                 receiver_name=order.receiver_name,
                 receiver_phone=order.receiver_phone,
-                receiver_address=order.receiver_address
+                receiver_address=order.receiver_address,
+                next_poll_at=next_poll_time('created')
             )
 
             # 更新订单状态
@@ -247,6 +189,86 @@ class AdminExpressViewSet(viewsets.ViewSet):
         else:
             return Response({'error': result.message}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='ship-batch')
+    def ship_batch(self, request):
+        """
+        批量发货（后台执行）
+
+        POST /express/admin/ship-batch/
+        {
+            "express_company_code": "SF",
+            "order_ids": [1, 2, 3],                         // 与 filter 二选一
+            "filter": {"created_before": "2026-01-29 08:00:00"},  // 为空表示全部已支付订单
+            "remark": "备注"
+        }
+        """
+        serializer = ShipBatchCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        express_company = get_express_company(data['express_company_code'])
+        if express_company is None:
+            return Response({'error': '快递公司不存在或未启用'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            batch = create_ship_batch(
+                express_company,
+                order_ids=data.get('order_ids'),
+                filters=data.get('filter'),
+                remark=data['remark'],
+                user=request.user
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': f'发货任务已创建，共 {batch.total} 个订单',
+            'batch': ShipBatchSerializer(batch).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path='ship-batch/(?P<batch_id>[^/.]+)')
+    def ship_batch_detail(self, request, batch_id=None):
+        """
+        批量发货进度和明细
+
+        GET /express/admin/ship-batch/{batch_id}/?status=failed
+        """
+        try:
+            batch = ShipBatch.objects.select_related('express_company').get(pk=batch_id)
+        except (ShipBatch.DoesNotExist, ValueError):
+            return Response({'error': '发货任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        items = batch.items.all()
+        item_status = request.query_params.get('status')
+        if item_status:
+            items = items.filter(status=item_status)
+
+        return Response({
+            **ShipBatchSerializer(batch).data,
+            'items': ShipBatchItemSerializer(items, many=True).data
+        })
+
+    @action(detail=False, methods=['post'], url_path='ship-batch/(?P<batch_id>[^/.]+)/resume')
+    def ship_batch_resume(self, request, batch_id=None):
+        """
+        继续执行发货任务（重试失败的订单）
+
+        POST /express/admin/ship-batch/{batch_id}/resume/
+        """
+        try:
+            batch = ShipBatch.objects.get(pk=batch_id)
+        except (ShipBatch.DoesNotExist, ValueError):
+            return Response({'error': '发货任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        if batch.status == 'running':
+            return Response({'error': '发货任务正在执行'}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = resume_ship_batch(batch)
+        return Response({
+            'message': '发货任务已继续执行',
+            'batch': ShipBatchSerializer(batch).data
+        }, status=status.HTTP_202_ACCEPTED)
+
     @action(detail=False, methods=['get'])
     def companies(self, request):
         """获取可用的快递公司列表"""
@@ -265,32 +287,10 @@ class AdminExpressViewSet(viewsets.ViewSet):
         if not order.express_no:
             return Response({'error': '订单暂无物流信息'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 获取快递服务
-        service = get_express_service(order.express_company)
-        if not service:
-            return Response({'error': '快递服务不可用'}, status=status.HTTP_400_BAD_REQUEST)
-
-        result = service.query_trace(order.express_no)
-        if result.success:
-            # 更新订单物流状态
-            order.express_status = result.status
-            order.save()
-
-            return Response({
-                'express_company': order.express_company,
-                'express_no': order.express_no,
-                'status': result.status,
-                'traces': [
-                    {
-                        'time': t.time,
-                        'description': t.description,
-                        'location': t.location
-                    }
-                    for t in result.traces
-                ]
-            })
-        else:
-            return Response({'error': result.message}, status=status.HTTP_400_BAD_REQUEST)
+        data = get_order_tracking(order)
+        if data.get('message'):
+            return Response({'error': data['message']}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
 
     @action(detail=False, methods=['get'], url_path='waybill/(?P<order_id>[^/.]+)')
     def waybill(self, request, order_id=None):
@@ -298,7 +298,8 @@ class AdminExpressViewSet(viewsets.ViewSet):
         获取电子面单图片
 
         GET /express/admin/waybill/{order_id}/
-        返回面单的base64图片数据，前端可直接显示或打印
+        返回面单图片（二进制，带 ETag，可用 If-None-Match 条件请求）；
+        ?format=json 时返回 base64 数据（兼容旧版前端）
         """
         try:
             order = Order.objects.get(id=order_id)
@@ -308,21 +309,44 @@ class AdminExpressViewSet(viewsets.ViewSet):
         if not order.express_no:
             return Response({'error': '订单暂无快递单号'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 获取快递服务
-        service = get_express_service(order.express_company)
-        if not service:
-            return Response({'error': '快递服务不可用'}, status=status.HTTP_400_BAD_REQUEST)
+        # 面单只向快递公司获取一次，之后读取缓存
+        try:
+            waybill = get_waybill(order.express_no, order.express_company, order.order_no)
+        except WaybillError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 调用获取面单接口
-        result = service.get_waybill_image(order.express_no, order.order_no)
-        if result.get('success'):
+        if request.query_params.get('format') == 'json':
             return Response({
                 'express_no': order.express_no,
-                'image_data': result.get('image_data', ''),
-                'image_type': result.get('image_type', 'png')
+                'image_data': ''.join(read_base64(waybill)),
+                'image_type': waybill.content_type.split('/')[-1]
             })
-        else:
-            return Response({'error': result.get('message', '获取面单失败')}, status=status.HTTP_400_BAD_REQUEST)
+        return waybill_response(request, waybill)
+
+    @action(detail=False, methods=['get'], url_path='ship-batch/(?P<batch_id>[^/.]+)/waybills')
+    def ship_batch_waybills(self, request, batch_id=None):
+        """
+        批量打印发货任务的电子面单
+
+        GET /express/admin/ship-batch/{batch_id}/waybills/
+        流式返回多页 HTML 打印文档，每页一张面单（引用带签名、限时有效的面单地址）
+        """
+        try:
+            batch = ShipBatch.objects.select_related('express_company').get(pk=batch_id)
+        except (ShipBatch.DoesNotExist, ValueError):
+            return Response({'error': '发货任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+
+        company_code = batch.express_company.code
+        entries = (
+            (express_no, company_code, order_no)
+            for express_no, order_no in batch.items.filter(
+                status='success'
+            ).order_by('pk').values_list('express_no', 'order_no').iterator()
+        )
+        return StreamingHttpResponse(
+            iter_print_document(entries, title=f'快递面单 - 发货任务 {batch.pk}', request=request),
+            content_type='text/html; charset=utf-8'
+        )
 
     @action(detail=False, methods=['post'], url_path='pickup/(?P<order_id>[^/.]+)')
     def pickup(self, request, order_id=None):
@@ -500,3 +524,21 @@ class AdminExpressViewSet(viewsets.ViewSet):
             return Response({'message': '取消成功，订单已恢复为待发货状态'})
         else:
             return Response({'error': result.message}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class WaybillFileView(APIView):
+    """
+    按签名地址获取面单文件（批量打印文档引用）
+
+    GET /express/waybills/{token}/
+    token 为带时间戳签名的面单 SHA256，WAYBILL_URL_MAX_AGE 秒后失效；有效期内可缓存（带 ETag）
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, token):
+        sha256 = unsign_waybill_token(token)
+        waybill = Waybill.objects.filter(sha256=sha256).order_by('pk').first() if sha256 else None
+        if waybill is None:
+            return Response({'error': '面单不存在或链接已过期'}, status=status.HTTP_404_NOT_FOUND)
+        return waybill_response(request, waybill, cache_control=f'private, max-age={WAYBILL_URL_MAX_AGE}')
@@ -0,0 +1,178 @@
+"""
+电子面单缓存与打印
+
+面单图片第一次获取后按内容 SHA256 存入媒体目录（waybills/ab/abcdef....png），
+以快递单号索引；之后直接读取文件，以二进制返回并带 ETag，浏览器可条件请求。
+批量打印文档不内联图片数据，只引用带签名、有效期 WAYBILL_URL_MAX_AGE 秒的面单地址
+（/express/waybills/<签名>/，签名内容为面单 SHA256），打印窗口无需登录凭证即可加载，
+过期后地址失效。SVG 面单以附件方式返回并禁止执行脚本。
+"""
+import base64
+import hashlib
+import os
+from html import escape
+
+from django.core.files.base import ContentFile
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Waybill
+from .utils import get_express_service
+
+# 面单类型 -> (Content-Type, 扩展名)
+IMAGE_TYPES = {
+    'png': ('image/png', '.png'),
+    'jpg': ('image/jpeg', '.jpg'),
+    'jpeg': ('image/jpeg', '.jpg'),
+    'pdf': ('application/pdf', '.pdf'),
+    'svg+xml': ('image/svg+xml', '.svg'),
+}
+
+# 打印文档中面单地址的有效期（秒）
+WAYBILL_URL_MAX_AGE = 60 * 60
+
+_url_signer = signing.TimestampSigner(salt='express.waybill')
+
+# 流式输出时每次读取的字节数（3 的倍数，保证分段 base64 可直接拼接）
+READ_CHUNK_SIZE = 48 * 1024
+
+
+class WaybillError(Exception):
+    """获取面单失败"""
+
+
+def get_waybill(express_no: str, company_code: str, order_no: str = '') -> Waybill:
+    """
+    获取面单，缓存中没有时向快递公司获取并保存
+
+    Raises:
+        WaybillError: 快递服务不可用或获取失败
+    """
+    waybill = Waybill.objects.filter(express_no=express_no).first()
+    if waybill is not None:
+        return waybill
+
+    service = get_express_service(company_code)
+    if not service:
+        raise WaybillError('快递服务不可用')
+    result = service.get_waybill_image(express_no, order_no)
+    if not result.get('success'):
+        raise WaybillError(result.get('message', '获取面单失败'))
+
+    content = base64.b64decode(result.get('image_data', ''))
+    if not content:
+        raise WaybillError('未获取到面单图片')
+    return save_waybill(express_no, content, result.get('image_type', 'png'))
+
+
+def save_waybill(express_no: str, content: bytes, image_type: str) -> Waybill:
+    """按内容摘要保存面单文件并记录索引"""
+    content_type, ext = IMAGE_TYPES.get(image_type, ('application/octet-stream', ''))
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = f'waybills/{sha256[:2]}/{sha256}{ext}'
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(content))
+
+    try:
+        with transaction.atomic():
+            return Waybill.objects.create(
+                express_no=express_no,
+                sha256=sha256,
+                file=path,
+                content_type=content_type,
+                size=len(content)
+            )
+    except IntegrityError:
+        # 并发请求已保存
+        return Waybill.objects.get(express_no=express_no)
+
+
+def waybill_etag(waybill: Waybill) -> str:
+    return quote_etag(waybill.sha256)
+
+
+def waybill_url(waybill: Waybill, request=None) -> str:
+    """带签名的面单地址（WAYBILL_URL_MAX_AGE 秒内有效），传入 request 时为绝对地址"""
+    url = reverse('express-waybill-file', args=[_url_signer.sign(waybill.sha256)])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def unsign_waybill_token(token: str):
+    """校验面单地址签名，返回面单 SHA256；签名无效或已过期时返回 None"""
+    try:
+        return _url_signer.unsign(token, max_age=WAYBILL_URL_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def waybill_response(request, waybill: Waybill, filename: str = None,
+                     cache_control: str = 'private, max-age=86400'):
+    """以二进制返回面单，支持 If-None-Match 条件请求"""
+    if filename is None:
+        filename = f'waybill_{waybill.express_no}{os.path.splitext(waybill.file.name)[1]}'
+    etag = waybill_etag(waybill)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+    else:
+        is_svg = waybill.content_type == 'image/svg+xml'
+        response = FileResponse(
+            default_storage.open(waybill.file.name, 'rb'),
+            content_type=waybill.content_type,
+            filename=filename,
+            # 快递公司提供的 SVG 可能含脚本：作为附件下载，<img> 引用不受影响
+            as_attachment=is_svg
+        )
+        response['Content-Length'] = waybill.size
+        if is_svg:
+            response['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def read_base64(waybill: Waybill):
+    """分段读取面单并转为 base64"""
+    with default_storage.open(waybill.file.name, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield base64.b64encode(chunk).decode('ascii')
+
+
+def iter_print_document(entries, title: str = '快递面单', request=None):
+    """
+    逐页生成 HTML 打印文档
+
+    Args:
+        entries: 可迭代的 (快递单号, 快递公司代码, 订单号)，按需逐个读取
+        title: 文档标题
+        request: 当前请求，用于生成面单的绝对地址
+
+    Yields:
+        str: 文档片段
+    """
+    yield (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{escape(title)}</title>'
+        '<style>'
+        'body{margin:0}'
+        '.page{page-break-after:always;display:flex;justify-content:center;align-items:center;min-height:100vh}'
+        '.page img{max-width:100%;height:auto}'
+        '.error{color:#c00;font-size:14px}'
+        '</style></head><body>'
+    )
+    for express_no, company_code, order_no in entries:
+        try:
+            waybill = get_waybill(express_no, company_code, order_no)
+        except WaybillError as e:
+            yield f'<div class="page error">{escape(express_no)}: {escape(str(e))}</div>'
+            continue
+        yield f'<div class="page"><img alt="{escape(express_no)}" src="{escape(waybill_url(waybill, request))}"></div>'
+    # 等所有面单图片加载完成（window.onload）后再打印
+    yield '<script>window.onload=function(){window.print()}</script></body></html>'
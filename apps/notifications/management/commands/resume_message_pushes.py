@@ -0,0 +1,24 @@
+"""
+继续执行未完成的消息推送任务（如服务重启导致中断）
+
+用法: python manage.py resume_message_pushes
+"""
+from django.core.management.base import BaseCommand
+
+from apps.notifications.models import MessagePush
+from apps.notifications.services import run_push
+
+
+class Command(BaseCommand):
+    help = '继续执行等待中、推送中断或失败的消息推送任务'
+
+    def handle(self, *args, **options):
+        push_ids = list(MessagePush.objects.filter(
+            status__in=['pending', 'running', 'failed']
+        ).order_by('created_at').values_list('pk', flat=True))
+
+        for push_id in push_ids:
+            push = run_push(push_id)
+            self.stdout.write(f'任务 {push.pk}: {push.get_status_display()} {push.delivered}/{push.total}')
+
+        self.stdout.write(self.style.SUCCESS(f'处理完成: {len(push_ids)} 个任务'))
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessagePush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '推送中'), ('completed', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('total', models.IntegerField(default=0, verbose_name='目标用户数')),
+                ('delivered', models.IntegerField(default=0, verbose_name='已处理用户数')),
+                ('last_user_id', models.BigIntegerField(default=0, verbose_name='已处理到的用户ID')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='错误信息')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '消息推送任务',
+                'verbose_name_plural': '消息推送任务',
+                'db_table': 'message_pushes',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserMessageCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_pushed_at', models.DateTimeField(blank=True, null=True, verbose_name='已生成到的推送时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '用户消息游标',
+                'verbose_name_plural': '用户消息游标',
+                'db_table': 'user_message_cursors',
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='is_lazy',
+            field=models.BooleanField(default=False, verbose_name='延迟投递'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='pushed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='推送时间'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['is_lazy', 'pushed_at'], name='messages_lazy_pushed_idx'),
+        ),
+        migrations.AddField(
+            model_name='messagepush',
+            name='message',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pushes', to='notifications.message', verbose_name='消息'),
+        ),
+        migrations.AddField(
+            model_name='usermessagecursor',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='message_cursor', to=settings.AUTH_USER_MODEL, verbose_name='用户'),
+        ),
+    ]
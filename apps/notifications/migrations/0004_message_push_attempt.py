@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_message_push'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagepush',
+            name='attempt',
+            field=models.IntegerField(default=0, verbose_name='执行次数'),
+        ),
+    ]
@@ -53,6 +53,9 @@ class Message(models.Model):
     link = models.CharField('跳转链接', max_length=500, blank=True, null=True)
     is_global = models.BooleanField('全局消息', default=True)  # 是否推送给所有用户
     is_active = models.BooleanField('是否启用', default=True)
+    # 延迟投递：推送时不逐个写入用户消息，用户读取消息时再生成
+    is_lazy = models.BooleanField('延迟投递', default=False)
+    pushed_at = models.DateTimeField('推送时间', blank=True, null=True)
     created_at = models.DateTimeField('创建时间', auto_now_add=True)
 
     class Meta:
@@ -60,6 +63,9 @@ class Message(models.Model):
         verbose_name = '系统消息'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_lazy', 'pushed_at'], name='messages_lazy_pushed_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -91,3 +97,67 @@ class UserMessage(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.message.title}'
+
+
+class MessagePush(models.Model):
+    """消息推送任务"""
+    STATUS_CHOICES = [
+        ('pending', '等待中'),
+        ('running', '推送中'),
+        ('completed', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name='pushes',
+        verbose_name='消息'
+    )
+    status = models.CharField('状态', max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.IntegerField('目标用户数', default=0)
+    delivered = models.IntegerField('已处理用户数', default=0)
+    last_user_id = models.BigIntegerField('已处理到的用户ID', default=0)  # 用于中断后续推
+    attempt = models.IntegerField('执行次数', default=0)  # 每次开始执行时递增，只有最新一次执行能写入进度
+    error = models.TextField('错误信息', blank=True, null=True)
+    started_at = models.DateTimeField('开始时间', blank=True, null=True)
+    finished_at = models.DateTimeField('完成时间', blank=True, null=True)
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+
+    class Meta:
+        db_table = 'message_pushes'
+        verbose_name = '消息推送任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.message.title} - {self.get_status_display()}'
+
+    @property
+    def progress(self):
+        """推送进度 0-100"""
+        if self.status == 'completed':
+            return 100
+        if not self.total:
+            return 0
+        return min(100, round(self.delivered * 100 / self.total, 1))
+
+
+class UserMessageCursor(models.Model):
+    """用户延迟投递消息的读取游标"""
+    user = models.OneToOneField(
+        'users.User',
+        on_delete=models.CASCADE,
+        related_name='message_cursor',
+        verbose_name='用户'
+    )
+    last_pushed_at = models.DateTimeField('已生成到的推送时间', blank=True, null=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'user_message_cursors'
+        verbose_name = '用户消息游标'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.user.username} - {self.last_pushed_at}'
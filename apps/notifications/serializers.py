@@ -2,7 +2,7 @@
 消息模块 - 序列化器
 """
 from rest_framework import serializers
-from .models import Advertisement, Message, UserMessage
+from .models import Advertisement, Message, UserMessage, MessagePush
 
 
 class AdvertisementSerializer(serializers.ModelSerializer):
@@ -22,8 +22,9 @@ class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = ['id', 'title', 'content', 'message_type', 'type_display',
-                  'image', 'link', 'is_global', 'is_active', 'created_at']
-        read_only_fields = ['id', 'created_at']
+                  'image', 'link', 'is_global', 'is_active', 'is_lazy', 'pushed_at',
+                  'created_at']
+        read_only_fields = ['id', 'is_lazy', 'pushed_at', 'created_at']
 
 
 class UserMessageSerializer(serializers.ModelSerializer):
@@ -34,3 +35,14 @@ class UserMessageSerializer(serializers.ModelSerializer):
         model = UserMessage
         fields = ['id', 'message', 'is_read', 'read_at', 'created_at']
         read_only_fields = ['id', 'created_at']
+
+
+class MessagePushSerializer(serializers.ModelSerializer):
+    """消息推送任务序列化器"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = MessagePush
+        fields = ['id', 'message', 'status', 'status_display', 'total', 'delivered',
+                  'progress', 'error', 'started_at', 'finished_at', 'created_at']
@@ -0,0 +1,151 @@
+"""
+消息模块 - 消息推送服务
+"""
+import logging
+import threading
+
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, F, Q, Subquery
+from django.utils import timezone
+
+from apps.users.models import User
+from .models import Message, MessagePush, UserMessage, UserMessageCursor
+
+logger = logging.getLogger(__name__)
+
+# 每批处理的用户数
+PUSH_CHUNK_SIZE = 2000
+
+
+def start_push(message: Message, lazy: bool = False):
+    """
+    推送消息给所有活跃用户
+
+    Args:
+        message: 消息
+        lazy: 延迟投递，只记录推送时间，用户读取消息时再生成记录
+
+    Returns:
+        MessagePush | None: 后台推送任务，延迟投递时返回 None
+    """
+    if lazy:
+        message.is_lazy = True
+        message.pushed_at = timezone.now()
+        message.save(update_fields=['is_lazy', 'pushed_at'])
+        return None
+
+    push = MessagePush.objects.create(
+        message=message,
+        total=User.objects.filter(is_active=True).count()
+    )
+    transaction.on_commit(lambda: run_push_in_background(push.pk))
+    return push
+
+
+def run_push_in_background(push_id: int) -> None:
+    """在后台线程中执行推送任务"""
+    def target():
+        try:
+            run_push(push_id)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=target, name=f'message-push-{push_id}', daemon=True).start()
+
+
+class PushSuperseded(Exception):
+    """推送任务已被新的执行接管"""
+
+
+def run_push(push_id: int, chunk_size: int = PUSH_CHUNK_SIZE) -> MessagePush:
+    """
+    分批写入用户消息，按用户ID游标推进，中断后可从 last_user_id 继续
+
+    开始执行时用条件 UPDATE 递增 attempt 认领任务，同一任务同时只有一次执行能认领成功；
+    每批进度只在 attempt 和游标都未变化时写入，被接管的旧执行在下一批停止，不会重复计数。
+
+    Args:
+        push_id: 推送任务ID
+        chunk_size: 每批用户数
+
+    Returns:
+        MessagePush: 执行后的任务
+    """
+    push = MessagePush.objects.get(pk=push_id)
+    if push.status == 'completed':
+        return push
+
+    attempt = push.attempt + 1
+    claimed = MessagePush.objects.filter(
+        pk=push_id, status=push.status, attempt=push.attempt
+    ).update(
+        status='running', attempt=attempt, started_at=push.started_at or timezone.now(), error=None
+    )
+    if not claimed:
+        # 其他执行已认领或已完成
+        push.refresh_from_db()
+        return push
+
+    current = MessagePush.objects.filter(pk=push_id, attempt=attempt)
+    users = User.objects.filter(is_active=True).order_by('pk')
+    last_user_id = push.last_user_id
+
+    try:
+        while True:
+            user_ids = list(
+                users.filter(pk__gt=last_user_id).values_list('pk', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            with transaction.atomic():
+                UserMessage.objects.bulk_create(
+                    [UserMessage(user_id=user_id, message_id=push.message_id) for user_id in user_ids],
+                    ignore_conflicts=True
+                )
+                if not current.filter(last_user_id=last_user_id).update(
+                    delivered=F('delivered') + len(user_ids),
+                    last_user_id=user_ids[-1]
+                ):
+                    raise PushSuperseded()
+                last_user_id = user_ids[-1]
+    except PushSuperseded:
+        logger.warning('消息推送任务已被接管，停止本次执行: %s', push_id)
+    except Exception as e:
+        logger.exception('消息推送失败: %s', push_id)
+        current.update(status='failed', error=str(e))
+    else:
+        current.update(status='completed', finished_at=timezone.now())
+
+    push.refresh_from_db()
+    return push
+
+
+def materialize_lazy_messages(user) -> int:
+    """
+    为用户生成延迟投递的消息记录（读取消息列表/未读数前调用）
+
+    只生成用户注册之后推送、且游标之后的新消息，重复调用不会重复生成。
+
+    Returns:
+        int: 新生成的消息数
+    """
+    # 一条查询取游标之后的新消息；没有新消息时不再读写游标
+    cursor = UserMessageCursor.objects.filter(user=user).values('last_pushed_at')
+    pending = list(Message.objects.filter(
+        is_lazy=True, is_active=True,
+        pushed_at__isnull=False, pushed_at__gte=user.date_joined
+    ).filter(
+        Q(pushed_at__gt=Subquery(cursor)) | ~Exists(cursor.filter(last_pushed_at__isnull=False))
+    ).values_list('pk', 'pushed_at'))
+    if not pending:
+        return 0
+
+    with transaction.atomic():
+        UserMessage.objects.bulk_create(
+            [UserMessage(user=user, message_id=message_id) for message_id, _ in pending],
+            ignore_conflicts=True
+        )
+        UserMessageCursor.objects.update_or_create(
+            user=user, defaults={'last_pushed_at': max(pushed_at for _, pushed_at in pending)}
+        )
+    return len(pending)
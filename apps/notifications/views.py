@@ -6,9 +6,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.db import models
-from django.db.models import F, Q
+from django.db.models import Q
 from .models import Advertisement, Message, UserMessage
-from .serializers import AdvertisementSerializer, MessageSerializer, UserMessageSerializer
+from .serializers import (
+    AdvertisementSerializer, MessageSerializer, UserMessageSerializer, MessagePushSerializer
+)
+from .services import start_push, materialize_lazy_messages
+from apps.statistics.counters import ad_clicks
 
 
 class AdvertisementViewSet(viewsets.ReadOnlyModelViewSet):
@@ -34,7 +38,7 @@ class AdvertisementViewSet(viewsets.ReadOnlyModelViewSet):
     def click(self, request, pk=None):
         """记录点击"""
         ad = self.get_object()
-        Advertisement.objects.filter(pk=ad.pk).update(click_count=F('click_count') + 1)
+        ad_clicks.incr(ad.pk)
         return Response({'message': 'ok'})
 
 
@@ -51,7 +55,13 @@ class UserMessageViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserMessage.objects.filter(user=self.request.user)
+        return UserMessage.objects.filter(
+            user=self.request.user
+        ).select_related('message').order_by('-created_at')
+
+    def list(self, request, *args, **kwargs):
+        materialize_lazy_messages(request.user)
+        return super().list(request, *args, **kwargs)
 
     @action(detail=True, methods=['post'])
     def read(self, request, pk=None):
@@ -66,6 +76,7 @@ class UserMessageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def read_all(self, request):
         """全部已读"""
+        materialize_lazy_messages(request.user)
         UserMessage.objects.filter(
             user=request.user, is_read=False
         ).update(is_read=True, read_at=timezone.now())
@@ -74,6 +85,7 @@ class UserMessageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
         """未读数量"""
+        materialize_lazy_messages(request.user)
         count = UserMessage.objects.filter(user=request.user, is_read=False).count()
         return Response({'count': count})
 
@@ -109,12 +121,24 @@ class AdminMessageViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def push(self, request, pk=None):
-        """推送消息给所有用户"""
-        from apps.users.models import User
+        """推送消息给所有用户（后台分批写入；lazy=true 时延迟到用户读取时生成）"""
         msg = self.get_object()
-        
-        users = User.objects.filter(is_active=True)
-        for user in users:
-            UserMessage.objects.get_or_create(user=user, message=msg)
-        
-        return Response({'message': f'已推送给 {users.count()} 位用户'})
+        lazy = str(request.data.get('lazy', '')).lower() in ('1', 'true')
+
+        push = start_push(msg, lazy=lazy)
+        if push is None:
+            return Response({'message': '已设置为延迟投递，用户查看消息时送达'})
+
+        return Response({
+            'message': f'推送任务已创建，共 {push.total} 位用户',
+            'push': MessagePushSerializer(push).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def push_status(self, request, pk=None):
+        """推送进度"""
+        msg = self.get_object()
+        push = msg.pushes.order_by('-created_at').first()
+        if push is None:
+            return Response({'error': '该消息尚未推送'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(MessagePushSerializer(push).data)
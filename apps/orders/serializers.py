@@ -33,11 +33,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 
 class OrderListSerializer(serializers.ModelSerializer):
-    """订单列表序列化器"""
+    """订单列表序列化器（查询集需经 services.annotate_order_list 处理）"""
     items = OrderItemSerializer(many=True, read_only=True)
-    total_count = serializers.SerializerMethodField()
+    total_count = serializers.IntegerField(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    is_reviewed = serializers.SerializerMethodField()
+    is_reviewed = serializers.BooleanField(read_only=True)
     user = OrderUserSerializer(read_only=True)
 
     class Meta:
@@ -47,12 +47,6 @@ class OrderListSerializer(serializers.ModelSerializer):
                   'is_reviewed', 'created_at', 'express_company', 'express_no',
                   'express_status', 'receiver_name', 'receiver_phone', 'receiver_address']
 
-    def get_total_count(self, obj):
-        return sum(item.quantity for item in obj.items.all())
-
-    def get_is_reviewed(self, obj):
-        return obj.comments.exists()
-
 
 class OrderDetailSerializer(serializers.ModelSerializer):
     """订单详情序列化器"""
@@ -71,6 +65,12 @@ class OrderDetailSerializer(serializers.ModelSerializer):
                   'express_company', 'express_no', 'express_status']
 
 
+class OrderItemCreateSerializer(serializers.Serializer):
+    """下单商品序列化器"""
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
 class OrderCreateSerializer(serializers.Serializer):
     """订单创建序列化器"""
     address_id = serializers.IntegerField(required=False)
@@ -81,7 +81,7 @@ class OrderCreateSerializer(serializers.Serializer):
     is_subscription = serializers.BooleanField(default=False)
     subscription_frequency = serializers.CharField(required=False, allow_blank=True)
     subscription_periods = serializers.IntegerField(default=1)
-    items = serializers.ListField(child=serializers.DictField())
+    items = OrderItemCreateSerializer(many=True)
 
     def validate_items(self, value):
         if not value:
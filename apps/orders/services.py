@@ -0,0 +1,192 @@
+"""
+订单模块 - 服务层（库存预占、列表查询构建）
+"""
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.db.models import (
+    Case, Exists, F, IntegerField, OuterRef, Prefetch, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from apps.products.models import Product
+from apps.products.signals import stock_changed
+from apps.comments.models import Comment
+from .models import OrderItem
+
+
+def merge_items(items: List[dict]) -> Dict[int, int]:
+    """
+    合并同一产品的多个购买项
+
+    Args:
+        items: 下单商品列表 [{product_id, quantity}, ...]
+
+    Returns:
+        dict: {product_id: quantity}，保持首次出现的顺序
+    """
+    merged = OrderedDict()
+    for item_data in items:
+        product_id = item_data.get('product_id')
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(f'产品不存在: {product_id}')
+        try:
+            quantity = int(item_data.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(f'购买数量不正确: {product_id}')
+        if quantity <= 0:
+            raise serializers.ValidationError(f'购买数量不正确: {product_id}')
+        merged[product_id] = merged.get(product_id, 0) + quantity
+    return merged
+
+
+def _stock_case(field: str, quantities: Dict[int, int], sign: int) -> Case:
+    """构造按产品ID分支的库存/销量增减表达式"""
+    return Case(
+        *[When(pk=pk, then=F(field) + sign * qty) for pk, qty in quantities.items()],
+        default=F(field),
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(items: List[dict]) -> List[Tuple[Product, int]]:
+    """
+    批量预占库存，需在事务中调用
+
+    所有产品按ID顺序一次性 SELECT ... FOR UPDATE 加锁，避免并发购物车互相死锁；
+    随后用一条带条件的 UPDATE 同时扣减库存、增加销量。
+
+    Args:
+        items: 下单商品列表 [{product_id, quantity}, ...]
+
+    Returns:
+        list: [(product, quantity), ...]，顺序与下单顺序一致
+
+    Raises:
+        serializers.ValidationError: 产品不存在或库存不足
+    """
+    quantities = merge_items(items)
+
+    products = {
+        p.pk: p for p in
+        Product.objects.select_for_update().filter(pk__in=quantities.keys()).order_by('pk')
+    }
+
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            raise serializers.ValidationError(f'产品不存在: {product_id}')
+        if product.stock < quantity:
+            raise serializers.ValidationError(f'库存不足: {product.name}')
+
+    condition = Q()
+    for product_id, quantity in quantities.items():
+        condition |= Q(pk=product_id, stock__gte=quantity)
+
+    updated = Product.objects.filter(condition).update(
+        stock=_stock_case('stock', quantities, -1),
+        sales_count=_stock_case('sales_count', quantities, 1),
+    )
+    if updated != len(quantities):
+        # 行已加锁，正常情况下不会出现；防御性校验
+        raise serializers.ValidationError('库存不足')
+
+    reserved = []
+    changes = []
+    for product_id, quantity in quantities.items():
+        product = products[product_id]
+        changes.append((product_id, product.is_active, product.stock, product.stock - quantity))
+        product.stock -= quantity
+        product.sales_count += quantity
+        reserved.append((product, quantity))
+    stock_changed.send(sender=Product, changes=changes)
+    return reserved
+
+
+def release_stock(order) -> None:
+    """
+    释放订单占用的库存（取消/退款时调用），需在事务中调用
+
+    Args:
+        order: 订单
+    """
+    quantities = {}
+    for product_id, quantity in order.items.filter(
+            product__isnull=False).values_list('product_id', 'quantity'):
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    if not quantities:
+        return
+
+    # 与 reserve_stock 相同的加锁顺序
+    current = Product.objects.select_for_update().filter(
+        pk__in=quantities.keys()
+    ).order_by('pk').values_list('pk', 'is_active', 'stock')
+    changes = [
+        (pk, is_active, stock, stock + quantities[pk])
+        for pk, is_active, stock in current
+    ]
+
+    Product.objects.filter(pk__in=quantities.keys()).update(
+        stock=_stock_case('stock', quantities, 1),
+        sales_count=_stock_case('sales_count', quantities, -1),
+    )
+    stock_changed.send(sender=Product, changes=changes)
+
+
+def build_order_items(order, reserved: List[Tuple[Product, int]]) -> List[OrderItem]:
+    """
+    一次 bulk_create 写入全部订单商品
+
+    Args:
+        order: 已保存的订单
+        reserved: reserve_stock 的返回值
+
+    Returns:
+        list: 创建的订单商品
+    """
+    order_items = [
+        OrderItem(
+            order=order,
+            product=product,
+            product_name=product.name,
+            product_image=product.cover_image.url if product.cover_image else '',
+            price=product.price,
+            quantity=quantity,
+            total_price=product.price * quantity,
+        )
+        for product, quantity in reserved
+    ]
+    return OrderItem.objects.bulk_create(order_items)
+
+
+def calculate_total(reserved: List[Tuple[Product, int]]) -> Decimal:
+    """计算订单总额"""
+    return sum((product.price * quantity for product, quantity in reserved), Decimal('0'))
+
+
+def annotate_order_list(queryset):
+    """
+    订单列表查询构建：预取订单商品及产品，注解是否已评价与商品总件数
+
+    OrderListSerializer 只读取这里注解/预取的数据，每页查询数与订单数量无关。
+
+    Args:
+        queryset: Order 查询集
+
+    Returns:
+        QuerySet: 注解了 is_reviewed、total_count 的查询集
+    """
+    item_count = OrderItem.objects.filter(
+        order=OuterRef('pk')
+    ).order_by().values('order').annotate(total=Sum('quantity')).values('total')
+
+    return queryset.select_related('user').prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.select_related('product'))
+    ).annotate(
+        is_reviewed=Exists(Comment.objects.filter(order=OuterRef('pk'))),
+        total_count=Coalesce(Subquery(item_count, output_field=IntegerField()), Value(0)),
+    )
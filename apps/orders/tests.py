@@ -0,0 +1,98 @@
+"""
+订单模块 - 测试
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.products.models import Category, Product
+from apps.users.models import User
+from .models import Order, OrderItem
+
+
+class OrderListQueryCountTest(TestCase):
+    """订单列表的查询次数与订单数无关"""
+
+    # 分页计数 + 当前页订单（含用户、是否已评价、商品总数） + 订单商品及产品
+    EXPECTED_QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='buyer')
+        cls.admin = User.objects.create(username='admin', is_staff=True, is_superuser=True)
+        category = Category.objects.create(name='鲜牛奶')
+        cls.products = [
+            Product.objects.create(name=f'产品{i}', category=category, price=Decimal('10.00'), stock=100)
+            for i in range(3)
+        ]
+
+    def create_orders(self, count: int) -> None:
+        for _ in range(count):
+            order = Order.objects.create(
+                user=self.user,
+                total_amount=Decimal('30.00'),
+                pay_amount=Decimal('30.00'),
+                status='completed',
+                receiver_name='张三',
+                receiver_phone='13800138000',
+                receiver_address='上海市浦东新区'
+            )
+            for product in self.products:
+                OrderItem.objects.create(
+                    order=order,
+                    product=product,
+                    product_name=product.name,
+                    price=product.price,
+                    quantity=2,
+                    total_price=product.price * 2
+                )
+
+    def assert_constant_queries(self, user, url: str) -> None:
+        client = APIClient()
+        client.force_authenticate(user)
+        created = 0
+        for total in (1, 5, 10):
+            self.create_orders(total - created)
+            created = total
+            with self.subTest(orders=total), self.assertNumQueries(self.EXPECTED_QUERIES):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), total)
+            self.assertEqual(response.data['results'][0]['total_count'], 6)
+
+    def test_user_order_list(self):
+        self.assert_constant_queries(self.user, '/api/v1/orders/')
+
+    def test_admin_order_list(self):
+        self.assert_constant_queries(self.admin, '/api/v1/admin/orders/')
+
+
+class OrderCreateValidationTest(TestCase):
+    """下单商品参数错误返回 400，不扣库存"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='buyer')
+        category = Category.objects.create(name='鲜牛奶')
+        cls.product = Product.objects.create(name='产品', category=category, price=Decimal('10.00'), stock=100)
+
+    def test_invalid_items(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for item in ({'product_id': self.product.pk, 'quantity': 'abc'},
+                     {'product_id': self.product.pk, 'quantity': None},
+                     {'product_id': self.product.pk, 'quantity': 0},
+                     {'product_id': 'abc', 'quantity': 1},
+                     {'quantity': 1}):
+            with self.subTest(item=item):
+                response = client.post('/api/v1/orders/', {
+                    'receiver_name': '张三',
+                    'receiver_phone': '13800138000',
+                    'receiver_address': '上海市浦东新区',
+                    'items': [item],
+                }, format='json')
+                self.assertEqual(response.status_code, 400)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 100)
+        self.assertFalse(Order.objects.exists())
@@ -14,6 +14,9 @@ from .serializers import (
     CartSerializer, CartUpdateSerializer, PaymentSerializer,
     RefundRequestSerializer, RefundRequestCreateSerializer
 )
+from .services import (
+    reserve_stock, release_stock, build_order_items, calculate_total, annotate_order_list
+)
 from apps.products.models import Product
 
 
@@ -107,7 +110,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         status_param = self.request.query_params.get('status')
         if status_param:
             queryset = queryset.filter(status=status_param)
-        return queryset
+        return annotate_order_list(queryset)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -122,6 +125,12 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         
+        # 批量锁定产品并扣减库存
+        reserved = reserve_stock(data['items'])
+        total_amount = calculate_total(reserved)
+        # 应用会员折扣
+        discount_rate = request.user.get_discount_rate()
+
         # 创建订单
         order = Order.objects.create(
             user=request.user,
@@ -132,52 +141,15 @@ class OrderViewSet(viewsets.ModelViewSet):
             is_subscription=data.get('is_subscription', False),
             subscription_frequency=data.get('subscription_frequency', ''),
             subscription_periods=data.get('subscription_periods', 1),
-            total_amount=0,
-            pay_amount=0
+            total_amount=total_amount,
+            pay_amount=total_amount * Decimal(str(discount_rate))
         )
-        
-        total_amount = Decimal('0')
-        
+
         # 创建订单商品
-        for item_data in data['items']:
-            product_id = item_data.get('product_id')
-            quantity = item_data.get('quantity', 1)
-            
-            try:
-                product = Product.objects.select_for_update().get(pk=product_id)
-            except Product.DoesNotExist:
-                raise serializers.ValidationError(f'产品不存在: {product_id}')
-            
-            if product.stock < quantity:
-                raise serializers.ValidationError(f'库存不足: {product.name}')
-            
-            # 创建订单项
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                product_name=product.name,
-                product_image=product.cover_image.url if product.cover_image else '',
-                price=product.price,
-                quantity=quantity,
-                total_price=product.price * quantity
-            )
-            
-            total_amount += product.price * quantity
-            
-            # 扣减库存
-            product.stock -= quantity
-            product.sales_count += quantity
-            product.save()
-        
-        # 更新订单金额
-        order.total_amount = total_amount
-        # 应用会员折扣
-        discount_rate = request.user.get_discount_rate()
-        order.pay_amount = total_amount * Decimal(str(discount_rate))
-        order.save()
-        
+        build_order_items(order, reserved)
+
         # 清空购物车中已下单的商品
-        product_ids = [item['product_id'] for item in data['items']]
+        product_ids = [product.pk for product, _ in reserved]
         Cart.objects.filter(user=request.user, product_id__in=product_ids).delete()
         
         return Response(OrderDetailSerializer(order).data, status=status.HTTP_201_CREATED)
@@ -191,12 +163,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # 恢复库存
         with transaction.atomic():
-            for item in order.items.all():
-                if item.product:
-                    item.product.stock += item.quantity
-                    item.product.sales_count -= item.quantity
-                    item.product.save()
-            
+            release_stock(order)
+
             order.status = 'cancelled'
             order.save()
         
@@ -277,7 +245,7 @@ class AdminOrderViewSet(viewsets.ModelViewSet):
         return OrderListSerializer
 
     def get_queryset(self):
-        queryset = Order.objects.select_related('user').all()
+        queryset = annotate_order_list(Order.objects.all())
         status_param = self.request.query_params.get('status')
         order_no = self.request.query_params.get('order_no')
         user_id = self.request.query_params.get('user_id')
@@ -613,11 +581,7 @@ class AdminRefundRequestViewSet(viewsets.ModelViewSet):
             order.save()
 
             # 恢复库存
-            for item in order.items.all():
-                if item.product:
-                    item.product.stock += item.quantity
-                    item.product.sales_count -= item.quantity
-                    item.product.save()
+            release_stock(order)
 
             # 扣除之前发放的积分（如果订单已完成过）
             if order.completed_at:
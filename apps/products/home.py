@@ -0,0 +1,132 @@
+"""
+首页聚合数据
+
+把首页需要的广告、分类、热门、新品和推荐产品合并为一个响应，序列化后的 JSON 字节整体缓存，
+命中时只读取一次版本号，不再查询和序列化。产品、分类、广告保存或删除后（事务提交时）递增数据库中的
+版本号（HomeBundleVersion），所有进程的缓存同时作废；
+缓存有效期截止到下一个广告开始/结束时间，广告按时上下线。
+
+缓存内容与用户无关（is_favorited 恒为 false），登录用户的收藏产品ID在响应中单独返回。
+
+配置 (settings.HOME_BUNDLE):
+    TIMEOUT: 最长缓存秒数，默认 300（销量排序等不触发信号的变化最多延迟这么久）
+    LIMIT: 热门/新品/推荐各返回的产品数，默认 10
+"""
+import hashlib
+import json
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.notifications.models import Advertisement
+from apps.notifications.serializers import AdvertisementSerializer
+from .models import Category, HomeBundleVersion, Product
+from .serializers import CategorySerializer, HomeProductSerializer
+from .services import get_favorite_ids
+
+HOME_BUNDLE_CACHE_KEY = 'home_bundle:{version}:{site}'
+
+
+def get_config() -> dict:
+    return {'TIMEOUT': 300, 'LIMIT': 10, **getattr(settings, 'HOME_BUNDLE', {})}
+
+
+def _current_version() -> int:
+    return HomeBundleVersion.objects.values_list('version', flat=True).first() or 0
+
+
+def invalidate_home_bundle() -> None:
+    """作废首页缓存（递增版本号，各进程、各域名下的旧缓存自然过期）"""
+    if not HomeBundleVersion.objects.update(version=F('version') + 1):
+        HomeBundleVersion.objects.bulk_create([HomeBundleVersion(pk=1, version=1)], ignore_conflicts=True)
+
+
+def _advertisements(now):
+    """
+    当前展示中的广告，以及下一个广告开始/结束时间
+
+    Returns:
+        tuple: (广告列表, 下一个时间边界或 None)
+    """
+    ads = Advertisement.objects.filter(is_active=True).filter(
+        Q(end_time__isnull=True) | Q(end_time__gte=now)
+    )
+    visible, boundaries = [], []
+    for ad in ads:
+        if ad.start_time and ad.start_time > now:
+            boundaries.append(ad.start_time)
+            continue
+        visible.append(ad)
+        if ad.end_time:
+            boundaries.append(ad.end_time)
+    return visible, min(boundaries, default=None)
+
+
+def build_bundle(request) -> tuple:
+    """
+    查询并序列化首页数据
+
+    Returns:
+        tuple: (JSON 字节, 缓存秒数)
+    """
+    config = get_config()
+    limit = config['LIMIT']
+    now = timezone.now()
+    context = {'request': request}
+
+    ads, boundary = _advertisements(now)
+    categories = Category.objects.filter(is_active=True).annotate(
+        active_product_count=Count('products', filter=Q(products__is_active=True))
+    )
+    products = Product.objects.select_related('category').filter(is_active=True)
+    data = {
+        'advertisements': AdvertisementSerializer(ads, many=True, context=context).data,
+        'categories': CategorySerializer(categories, many=True, context=context).data,
+        'hot': HomeProductSerializer(products.filter(is_hot=True)[:limit], many=True, context=context).data,
+        'new_arrivals': HomeProductSerializer(products.filter(is_new=True)[:limit], many=True, context=context).data,
+        'recommend': HomeProductSerializer(
+            products.order_by('-sales_count', '-view_count')[:limit], many=True, context=context
+        ).data,
+    }
+
+    timeout = config['TIMEOUT']
+    if boundary is not None:
+        # 结束时间含当秒，过了边界再失效
+        timeout = min(timeout, max(1, math.ceil((boundary - now).total_seconds()) + 1))
+    return JSONRenderer().render(data), timeout
+
+
+def get_bundle(request) -> bytes:
+    """
+    首页数据 JSON 字节（优先读缓存）
+
+    图片等地址按请求域名生成绝对地址，缓存按域名区分。
+    """
+    site = hashlib.md5(request.build_absolute_uri('/').encode()).hexdigest()[:12]
+    cache_key = HOME_BUNDLE_CACHE_KEY.format(version=_current_version(), site=site)
+    content = cache.get(cache_key)
+    if content is None:
+        content, timeout = build_bundle(request)
+        cache.set(cache_key, content, timeout)
+
+    if request.user.is_authenticated:
+        # 在缓存的 JSON 对象前拼接当前用户的收藏产品ID，不重新序列化
+        favorite_ids = json.dumps(sorted(get_favorite_ids(request)))
+        content = b'{"favorite_ids":' + favorite_ids.encode() + b',' + content[1:]
+    return content
+
+
+def _invalidate_on_commit(sender, **kwargs):
+    transaction.on_commit(invalidate_home_bundle)
+
+
+for model in (Product, Category, Advertisement):
+    uid = f'home_bundle_{model._meta.label_lower}'
+    post_save.connect(_invalidate_on_commit, sender=model, dispatch_uid=uid)
+    post_delete.connect(_invalidate_on_commit, sender=model, dispatch_uid=uid)
@@ -0,0 +1,51 @@
+"""
+重建产品评分汇总
+
+用法: python manage.py rebuild_product_ratings
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.comments.models import Comment
+from apps.products.models import Product
+
+RATING_FIELDS = ['rating_sum', 'rating_count'] + [f'rating_{star}_count' for star in range(1, 6)]
+
+
+class Command(BaseCommand):
+    help = '根据已审核评论重新计算所有产品的评分总和、评分人数和评分分布'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批更新的产品数')
+
+    def handle(self, *args, **options):
+        # 一次分组查询得到 (产品, 星级) -> 数量
+        stats = defaultdict(lambda: dict.fromkeys(RATING_FIELDS, 0))
+        rows = Comment.objects.filter(is_approved=True).values(
+            'product_id', 'rating'
+        ).annotate(total=Count('id')).order_by()
+        for row in rows:
+            rating = min(5, max(1, row['rating']))
+            item = stats[row['product_id']]
+            item['rating_sum'] += rating * row['total']
+            item['rating_count'] += row['total']
+            item[f'rating_{rating}_count'] += row['total']
+
+        empty = dict.fromkeys(RATING_FIELDS, 0)
+        products = []
+        for product in Product.objects.only('pk', *RATING_FIELDS).iterator():
+            values = stats.get(product.pk, empty)
+            if any(getattr(product, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(product, field, value)
+                products.append(product)
+
+        with transaction.atomic():
+            Product.objects.bulk_update(products, RATING_FIELDS, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'评分汇总重建完成: {len(stats)} 个产品有评分, 更新 {len(products)} 个产品'
+        ))
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HomeBundleVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0, verbose_name='版本号')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '首页数据版本',
+                'verbose_name_plural': '首页数据版本',
+                'db_table': 'home_bundle_version',
+            },
+        ),
+    ]
@@ -46,6 +46,14 @@ class Product(models.Model):
     stock = models.IntegerField('库存', default=0)
     sales_count = models.IntegerField('销量', default=0)
     view_count = models.IntegerField('浏览量', default=0)
+    # 评分汇总（仅统计已审核评论，由评论模块增量维护）
+    rating_sum = models.IntegerField('评分总和', default=0)
+    rating_count = models.IntegerField('评分人数', default=0)
+    rating_1_count = models.IntegerField('1星数', default=0)
+    rating_2_count = models.IntegerField('2星数', default=0)
+    rating_3_count = models.IntegerField('3星数', default=0)
+    rating_4_count = models.IntegerField('4星数', default=0)
+    rating_5_count = models.IntegerField('5星数', default=0)
     is_hot = models.BooleanField('热门推荐', default=False)
     is_new = models.BooleanField('新品上市', default=False)
     is_subscription = models.BooleanField('支持周期购', default=False)
@@ -62,6 +70,18 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def avg_rating(self):
+        """平均评分，无评分时默认5分"""
+        if self.rating_count:
+            return round(self.rating_sum / self.rating_count, 1)
+        return 5.0
+
+    @property
+    def rating_histogram(self):
+        """评分分布 {星级: 数量}"""
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
+
 
 class ProductImage(models.Model):
     """产品图片"""
@@ -109,3 +129,48 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.product.name}'
+
+
+class ProductSimilarity(models.Model):
+    """产品相似度（离线计算的共同购买/收藏近邻，见 recommender.py）"""
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='similarities',
+        verbose_name='产品'
+    )
+    neighbor = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='similar_from',
+        verbose_name='相似产品'
+    )
+    score = models.FloatField('相似度')
+    rank = models.PositiveSmallIntegerField('排名')
+    created_at = models.DateTimeField('计算时间', auto_now_add=True)
+
+    class Meta:
+        db_table = 'product_similarities'
+        verbose_name = '产品相似度'
+        verbose_name_plural = verbose_name
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'neighbor'], name='product_similarity_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.product.name} -> {self.neighbor.name}'
+
+
+class HomeBundleVersion(models.Model):
+    """首页聚合数据版本号（只有一行，产品/分类/广告变化时递增，各进程据此作废本地缓存）"""
+    version = models.BigIntegerField('版本号', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'home_bundle_version'
+        verbose_name = '首页数据版本'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return str(self.version)
@@ -3,6 +3,7 @@
 """
 from rest_framework import serializers
 from .models import Category, Product, ProductImage, Favorite
+from .services import get_favorite_ids
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -16,6 +17,10 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_product_count(self, obj):
+        # 列表查询已按分类聚合时直接使用聚合结果
+        annotated = getattr(obj, 'active_product_count', None)
+        if annotated is not None:
+            return annotated
         return obj.products.filter(is_active=True).count()
 
 
@@ -39,9 +44,13 @@ class ProductListSerializer(serializers.ModelSerializer):
                   'is_new', 'is_subscription', 'category', 'category_name', 'is_favorited']
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Favorite.objects.filter(user=request.user, product=obj).exists()
+        return obj.pk in get_favorite_ids(self.context.get('request'))
+
+
+class HomeProductSerializer(ProductListSerializer):
+    """首页聚合产品序列化器：结果被所有用户共用，不含当前用户的收藏状态"""
+
+    def get_is_favorited(self, obj):
         return False
 
 
@@ -50,8 +59,9 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     product_images = ProductImageSerializer(many=True, read_only=True)
     is_favorited = serializers.SerializerMethodField()
-    comment_count = serializers.SerializerMethodField()
-    avg_rating = serializers.SerializerMethodField()
+    comment_count = serializers.IntegerField(source='rating_count', read_only=True)
+    avg_rating = serializers.FloatField(read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
 
     class Meta:
         model = Product
@@ -60,22 +70,11 @@ class ProductDetailSerializer(serializers.ModelSerializer):
                   'detail', 'cover_image', 'images', 'stock', 'sales_count', 
                   'view_count', 'is_hot', 'is_new', 'is_subscription', 
                   'is_active', 'category', 'product_images', 'is_favorited',
-                  'comment_count', 'avg_rating', 'created_at', 'updated_at']
+                  'comment_count', 'avg_rating', 'rating_histogram',
+                  'created_at', 'updated_at']
 
     def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Favorite.objects.filter(user=request.user, product=obj).exists()
-        return False
-
-    def get_comment_count(self, obj):
-        return obj.comments.filter(is_approved=True).count()
-
-    def get_avg_rating(self, obj):
-        comments = obj.comments.filter(is_approved=True)
-        if comments.exists():
-            return round(sum(c.rating for c in comments) / comments.count(), 1)
-        return 5.0
+        return obj.pk in get_favorite_ids(self.context.get('request'))
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
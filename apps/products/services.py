@@ -0,0 +1,28 @@
+"""
+产品模块 - 服务层
+"""
+from .models import Favorite
+
+
+def get_favorite_ids(request) -> set:
+    """
+    获取当前用户收藏的产品ID集合
+
+    同一请求内只加载一次（缓存在 request 上）；不跨请求缓存，收藏变更后下一个请求即可看到。
+
+    Args:
+        request: 当前请求
+
+    Returns:
+        set: 产品ID集合，未登录返回空集合
+    """
+    if not request or not request.user.is_authenticated:
+        return set()
+
+    favorite_ids = getattr(request, '_favorite_ids', None)
+    if favorite_ids is None:
+        favorite_ids = set(
+            Favorite.objects.filter(user=request.user).values_list('product_id', flat=True)
+        )
+        request._favorite_ids = favorite_ids
+    return favorite_ids
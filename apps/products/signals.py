@@ -0,0 +1,8 @@
+"""
+产品模块 - 自定义信号
+"""
+from django.dispatch import Signal
+
+# 通过 QuerySet.update 批量修改库存后发送（不会触发 post_save）
+# 参数 changes: [(product_id, is_active, old_stock, new_stock), ...]
+stock_changed = Signal()
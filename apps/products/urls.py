@@ -3,7 +3,7 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet, FavoriteViewSet, AdminProductViewSet
+from .views import CategoryViewSet, ProductViewSet, FavoriteViewSet, AdminProductViewSet, HomeView
 
 router = DefaultRouter()
 router.register('categories', CategoryViewSet, basename='category')
@@ -15,6 +15,7 @@ admin_router.register('products', AdminProductViewSet, basename='admin-product')
 admin_router.register('categories', CategoryViewSet, basename='admin-category')
 
 urlpatterns = [
+    path('home/', HomeView.as_view(), name='home'),
     path('', include(router.urls)),
     path('admin/', include(admin_router.urls)),
 ]
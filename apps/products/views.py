@@ -4,12 +4,17 @@
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, F
+from django.db.models import Q
+from django.http import HttpResponse
+from rest_framework.views import APIView
 from .models import Category, Product, ProductImage, Favorite
 from .serializers import (
     CategorySerializer, ProductListSerializer, ProductDetailSerializer,
     ProductCreateUpdateSerializer, ProductImageSerializer, FavoriteSerializer
 )
+from .home import get_bundle
+from .recommender import recommend_for_user
+from apps.statistics.counters import product_views
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -50,7 +55,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         return ProductListSerializer
 
     def get_queryset(self):
-        queryset = Product.objects.all()
+        queryset = Product.objects.select_related('category')
         
         # 普通用户只能看到上架商品
         if not self.request.user.is_staff:
@@ -85,8 +90,8 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # 增加浏览量
-        Product.objects.filter(pk=instance.pk).update(view_count=F('view_count') + 1)
+        # 增加浏览量（写缓冲，批量写回）
+        product_views.incr(instance.pk)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -113,20 +118,36 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def recommend(self, request):
-        """推荐产品 - 基于协同过滤"""
-        # 简单推荐：基于销量和浏览量
-        queryset = self.get_queryset().order_by('-sales_count', '-view_count')[:10]
+        """推荐产品 - 基于协同过滤（离线计算的相似产品），未登录或没有购买/收藏记录时按销量和浏览量"""
+        queryset = []
+        if request.user.is_authenticated:
+            queryset = list(recommend_for_user(request.user, self.get_queryset(), limit=10))
+        if not queryset:
+            queryset = self.get_queryset().order_by('-sales_count', '-view_count')[:10]
         serializer = ProductListSerializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
 
+class HomeView(APIView):
+    """
+    首页聚合数据
+
+    GET /home/
+    返回 advertisements、categories、hot、new_arrivals、recommend，登录用户另有 favorite_ids
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return HttpResponse(get_bundle(request), content_type='application/json')
+
+
 class FavoriteViewSet(viewsets.ModelViewSet):
     """收藏视图集"""
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return Favorite.objects.filter(user=self.request.user).select_related('product__category')
 
     def create(self, request, *args, **kwargs):
         product_id = request.data.get('product_id')
@@ -0,0 +1,125 @@
+"""
+统计模块 - 活跃用户统计
+
+精确模式：数据库内按本地日期/月份分组 COUNT(DISTINCT user_id)。
+近似模式：已结束的日期各保存一条 DailyActiveUsers（精确日活 + HyperLogLog 草图），
+日活直接读取，月活由草图合并估算；当天仍实时统计。
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from apps.users.models import UserLog
+from .hll import HyperLogLog
+from .models import DailyActiveUsers
+from .rollups import local_day_range, shop_tzinfo
+
+# 超过该天数的窗口允许使用近似模式
+APPROX_MIN_DAYS = 90
+HLL_PRECISION = 11
+
+
+def _logins(start_date, end_date):
+    start, end = local_day_range(start_date, end_date)
+    return UserLog.objects.filter(action='login', created_at__gte=start, created_at__lt=end)
+
+
+def daily_active_exact(start_date, end_date) -> dict:
+    """每日去重登录用户数 {date: count}"""
+    rows = _logins(start_date, end_date).annotate(
+        day=TruncDate('created_at', tzinfo=shop_tzinfo())
+    ).values('day').annotate(
+        count=Count('user_id', distinct=True)
+    ).order_by()
+    return {row['day']: row['count'] for row in rows}
+
+
+def monthly_active_exact(start_date, end_date) -> dict:
+    """每月去重登录用户数 {'YYYY-MM': count}，首尾月份只统计窗口内部分"""
+    rows = _logins(start_date, end_date).annotate(
+        month=TruncMonth('created_at', tzinfo=shop_tzinfo())
+    ).values('month').annotate(
+        count=Count('user_id', distinct=True)
+    ).order_by()
+    return {row['month'].strftime('%Y-%m'): row['count'] for row in rows}
+
+
+def build_daily_sketches(start_date, end_date) -> int:
+    """
+    为已结束且尚未汇总的日期生成 DailyActiveUsers
+
+    Returns:
+        int: 新生成的天数
+    """
+    today = timezone.localtime(timezone.now()).date()
+    end_date = min(end_date, today - timedelta(days=1))
+    if start_date > end_date:
+        return 0
+
+    existing = set(DailyActiveUsers.objects.filter(
+        date__gte=start_date, date__lte=end_date
+    ).values_list('date', flat=True))
+    missing = [
+        start_date + timedelta(days=i)
+        for i in range((end_date - start_date).days + 1)
+        if start_date + timedelta(days=i) not in existing
+    ]
+    if not missing:
+        return 0
+
+    sketches = {day: HyperLogLog(HLL_PRECISION) for day in missing}
+    counts = defaultdict(int)
+    pairs = _logins(missing[0], missing[-1]).annotate(
+        day=TruncDate('created_at', tzinfo=shop_tzinfo())
+    ).values_list('day', 'user_id').distinct().order_by()
+    for day, user_id in pairs.iterator():
+        if day in sketches:
+            sketches[day].add(user_id)
+            counts[day] += 1
+
+    DailyActiveUsers.objects.bulk_create([
+        DailyActiveUsers(date=day, count=counts[day], sketch=sketch.to_bytes())
+        for day, sketch in sketches.items()
+    ], ignore_conflicts=True)
+    return len(missing)
+
+
+def active_users_approx(start_date, end_date):
+    """
+    近似模式统计日活和月活
+
+    Returns:
+        tuple: ({date: count}, {'YYYY-MM': count})
+    """
+    today = timezone.localtime(timezone.now()).date()
+    build_daily_sketches(start_date, end_date)
+
+    daily = {}
+    monthly_sketches = defaultdict(list)
+    for day, count, sketch in DailyActiveUsers.objects.filter(
+            date__gte=start_date, date__lte=end_date).values_list('date', 'count', 'sketch'):
+        daily[day] = count
+        monthly_sketches[day.strftime('%Y-%m')].append(HyperLogLog.from_bytes(bytes(sketch)))
+
+    if start_date <= today <= end_date:
+        # 当天尚未结束，实时统计后并入
+        today_users = _logins(today, today).values_list('user_id', flat=True).distinct().order_by()
+        sketch = HyperLogLog(HLL_PRECISION)
+        count = 0
+        for user_id in today_users.iterator():
+            sketch.add(user_id)
+            count += 1
+        daily[today] = count
+        monthly_sketches[today.strftime('%Y-%m')].append(sketch)
+
+    monthly = {
+        month: HyperLogLog.union(sketches).count()
+        for month, sketches in monthly_sketches.items()
+    }
+    # 与精确模式一致，没有登录记录的月份不返回
+    active_months = {day.strftime('%Y-%m') for day, count in daily.items() if count}
+    monthly = {month: count for month, count in monthly.items() if month in active_months}
+    return daily, monthly
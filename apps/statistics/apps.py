@@ -5,3 +5,6 @@ class StatisticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.statistics'
     verbose_name = '统计分析'
+
+    def ready(self):
+        from . import signals  # noqa: F401
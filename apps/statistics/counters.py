@@ -0,0 +1,242 @@
+"""
+统计模块 - 计数器写缓冲
+
+浏览量、点击量等高频计数先累加在缓冲中，由后台线程每隔
+FLUSH_INTERVAL 秒、或待写入增量达到 FLUSH_THRESHOLD 时，用一条 CASE 批量
+UPDATE 写回数据库，避免热点行被逐次加锁。进程退出时自动写回剩余增量。
+
+缓冲后端：
+    local: 进程内存，各进程分别缓冲、分别写回，F() 累加保证增量不会重复；
+           进程被强制结束（kill -9、OOM）时未写回的增量会丢失
+    redis: Redis 哈希（HINCRBY 原子累加），所有进程共享，任一进程都可写回；
+           进程被强制结束只会丢失正在写回数据库的那一批（取出后、提交前）
+
+配置 (settings.COUNTER_BUFFER):
+    FLUSH_INTERVAL: 定时写回间隔（秒），默认 5
+    FLUSH_THRESHOLD: 待写入增量达到该值立即写回，默认 200
+    ENABLED: False 时直接写库，不做缓冲
+    BACKEND: 'local' 或 'redis'，默认 'local'
+    REDIS_URL: redis 后端的连接地址，默认 redis://localhost:6379/0
+    KEY_PREFIX: redis 后端的键前缀，默认 'counter_buffer'
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, When
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'FLUSH_INTERVAL': 5,
+    'FLUSH_THRESHOLD': 200,
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'REDIS_URL': 'redis://localhost:6379/0',
+    'KEY_PREFIX': 'counter_buffer',
+}
+
+
+def get_config() -> dict:
+    return {**DEFAULT_CONFIG, **getattr(settings, 'COUNTER_BUFFER', {})}
+
+
+class LocalBackend:
+    """进程内缓冲"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._total = 0
+
+    def incr(self, pk, amount: int) -> int:
+        """累加并返回当前待写回的增量总数"""
+        with self._lock:
+            self._counts[pk] += amount
+            self._total += amount
+            return self._total
+
+    def drain(self) -> Dict[int, int]:
+        with self._lock:
+            counts, self._counts = dict(self._counts), defaultdict(int)
+            self._total = 0
+        return counts
+
+    def restore(self, counts: Dict[int, int]) -> None:
+        with self._lock:
+            for pk, amount in counts.items():
+                self._counts[pk] += amount
+                self._total += amount
+
+    def pending(self) -> int:
+        return self._total
+
+
+# 原子地取出并清空哈希和总数，避免取出与删除之间的累加丢失
+_DRAIN_SCRIPT = """
+local counts = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1], KEYS[2])
+return counts
+"""
+
+
+class RedisBackend:
+    """Redis 共享缓冲：增量存放在哈希 {prefix}:{name}，总数存放在 {prefix}:{name}:total"""
+
+    def __init__(self, name: str, url: str, prefix: str):
+        import redis
+
+        self.name = name
+        self.client = redis.Redis.from_url(url)
+        self.key = f'{prefix}:{name}'
+        self.total_key = f'{self.key}:total'
+        self._drain = self.client.register_script(_DRAIN_SCRIPT)
+
+    def incr(self, pk, amount: int) -> int:
+        """累加并返回当前待写回的增量总数（所有进程合计）"""
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.key, pk, amount)
+        pipe.incrby(self.total_key, amount)
+        return pipe.execute()[1]
+
+    def drain(self) -> Dict[int, int]:
+        values = self._drain(keys=[self.key, self.total_key])
+        return {int(values[i]): int(values[i + 1]) for i in range(0, len(values), 2)}
+
+    def restore(self, counts: Dict[int, int]) -> None:
+        pipe = self.client.pipeline()
+        for pk, amount in counts.items():
+            pipe.hincrby(self.key, pk, amount)
+        pipe.incrby(self.total_key, sum(counts.values()))
+        pipe.execute()
+
+    def pending(self) -> int:
+        return int(self.client.get(self.total_key) or 0)
+
+
+def get_backend(name: str, config: dict):
+    """按配置创建缓冲后端"""
+    if config['BACKEND'] == 'redis':
+        return RedisBackend(name, config['REDIS_URL'], config['KEY_PREFIX'])
+    return LocalBackend(name)
+
+
+class CounterBuffer:
+    """单个计数字段的写缓冲"""
+
+    def __init__(self, name: str, model_label: str, field: str):
+        self.name = name
+        self.model_label = model_label
+        self.field = field
+        self.config = get_config()
+        self.backend = get_backend(name, self.config)
+        self._flush_lock = threading.Lock()
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def incr(self, pk, amount: int = 1) -> None:
+        """累加计数"""
+        if not self.config['ENABLED']:
+            self.model.objects.filter(pk=pk).update(**{self.field: F(self.field) + amount})
+            return
+        size = self.backend.incr(pk, amount)
+        _ensure_worker()
+        if size >= self.config['FLUSH_THRESHOLD']:
+            _wakeup.set()
+
+    def pending(self) -> int:
+        """待写回的增量总数"""
+        return self.backend.pending()
+
+    def flush(self) -> int:
+        """
+        写回缓冲的增量
+
+        Returns:
+            int: 本次写回的增量总数
+        """
+        with self._flush_lock:
+            counts = self.backend.drain()
+            if not counts:
+                return 0
+            try:
+                with transaction.atomic():
+                    self.model.objects.filter(pk__in=counts.keys()).update(**{
+                        self.field: Case(
+                            *[When(pk=pk, then=F(self.field) + amount) for pk, amount in counts.items()],
+                            default=F(self.field),
+                            output_field=IntegerField(),
+                        )
+                    })
+            except Exception:
+                # 写库失败，增量放回缓冲，下次重试
+                self.backend.restore(counts)
+                raise
+            return sum(counts.values())
+
+
+_registry: Dict[str, CounterBuffer] = {}
+_worker = None
+_worker_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def register(name: str, model_label: str, field: str) -> CounterBuffer:
+    """注册计数缓冲"""
+    if name not in _registry:
+        _registry[name] = CounterBuffer(name, model_label, field)
+    return _registry[name]
+
+
+def get_counter(name: str) -> CounterBuffer:
+    return _registry[name]
+
+
+def flush_all() -> Dict[str, int]:
+    """写回全部缓冲"""
+    flushed = {}
+    for name, counter in list(_registry.items()):
+        try:
+            flushed[name] = counter.flush()
+        except Exception:
+            logger.exception('计数器写回失败: %s', name)
+    return flushed
+
+
+def pending_counts() -> Dict[str, int]:
+    """各计数器待写回的增量数"""
+    return {name: counter.pending() for name, counter in _registry.items()}
+
+
+def _run_worker():
+    interval = get_config()['FLUSH_INTERVAL']
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        flush_all()
+        close_old_connections()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run_worker, name='counter-flush', daemon=True)
+            _worker.start()
+
+
+# 进程退出时写回剩余增量
+atexit.register(flush_all)
+
+product_views = register('product_view', 'products.Product', 'view_count')
+ad_clicks = register('ad_click', 'notifications.Advertisement', 'click_count')
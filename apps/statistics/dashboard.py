@@ -0,0 +1,318 @@
+"""
+统计模块 - 仪表盘快照
+
+仪表盘计数保存在 DashboardCounter 表中（金额以分为单位存整数）。订单、用户、反馈、产品变化时
+（见 signals.py）只在同一事务内向 DashboardCounterDelta 追加增量行，不更新共享的计数行，
+写入之间没有行锁竞争；事务提交后唤醒后台线程合并增量。读取时用一条查询取计数行和尚未合并的增量之和，
+结果与已提交的数据一致。
+
+计数缺失（首次使用、跨天）时安排后台重建，本次请求退回实时统计。合并和重建由一行互斥锁串行执行，
+只与彼此等待，不阻塞业务写入；重建时先记下已提交的增量，不加锁实时统计，再在短事务中写入计数并删除
+这些增量（记下增量到统计之间几毫秒内提交的增量可能重复计入，下次重建时纠正）。
+
+配置 (settings.DASHBOARD_SNAPSHOT):
+    DEBOUNCE: 合并增量/重建前的等待时间（秒），同一时段的多次唤醒合并为一次，默认 2
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Max, Sum, Value
+from django.utils import timezone
+
+from apps.feedback.models import Feedback
+from apps.orders.models import Order
+from apps.products.models import Product
+from apps.users.models import User
+from .models import DashboardCounter, DashboardCounterDelta
+from .rollups import VALID_ORDER_STATUSES
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'dashboard'
+# 合并/重建互斥锁所在的计数行
+MERGE_LOCK_KEY = f'{KEY_PREFIX}:_merge_lock'
+LOW_STOCK_THRESHOLD = 10
+
+# 全局计数
+TOTAL_KEYS = [
+    'total_users', 'total_products', 'total_orders', 'total_revenue',
+    'pending_orders', 'pending_feedbacks', 'low_stock',
+]
+# 按本地日期分桶的计数
+DAILY_KEYS = ['today_orders', 'today_revenue', 'today_users']
+
+
+def get_config() -> dict:
+    return {'DEBOUNCE': 2, **getattr(settings, 'DASHBOARD_SNAPSHOT', {})}
+
+
+def _cents(amount) -> int:
+    return int((Decimal(amount or 0) * 100).to_integral_value())
+
+
+def _local_date(value):
+    return timezone.localtime(value).date() if value else None
+
+
+def _counter_key(name: str, date=None) -> str:
+    if date is None:
+        return f'{KEY_PREFIX}:{name}'
+    return f'{KEY_PREFIX}:{name}:{date.isoformat()}'
+
+
+# ---------- 各模型对计数的贡献 ----------
+
+def order_contribution(order) -> Counter:
+    data = order.__dict__
+    if data.get('created_at') is None:
+        return Counter()
+    day = _local_date(data['created_at'])
+    valid = data.get('status') in VALID_ORDER_STATUSES
+    revenue = _cents(data.get('pay_amount')) if valid else 0
+    return Counter({
+        ('total_orders', None): 1,
+        ('total_revenue', None): revenue,
+        ('pending_orders', None): int(data.get('status') == 'paid'),
+        ('today_orders', day): 1,
+        ('today_revenue', day): revenue,
+    })
+
+
+def user_contribution(user) -> Counter:
+    data = user.__dict__
+    if data.get('id') is None:
+        return Counter()
+    return Counter({
+        ('total_users', None): int(not data.get('is_admin')),
+        ('today_users', _local_date(data.get('date_joined'))): 1,
+    })
+
+
+def feedback_contribution(feedback) -> Counter:
+    data = feedback.__dict__
+    if data.get('id') is None:
+        return Counter()
+    return Counter({('pending_feedbacks', None): int(data.get('status') == 'pending')})
+
+
+def product_contribution(product) -> Counter:
+    data = product.__dict__
+    if data.get('id') is None:
+        return Counter()
+    return stock_contribution(data.get('is_active'), data.get('stock'))
+
+
+def stock_contribution(is_active, stock) -> Counter:
+    return Counter({
+        ('total_products', None): int(bool(is_active)),
+        ('low_stock', None): int(bool(is_active) and stock is not None and stock < LOW_STOCK_THRESHOLD),
+    })
+
+
+# ---------- 增量更新 ----------
+
+def apply_changes(before: Counter, after: Counter) -> None:
+    """在当前事务内追加贡献差异（一条 INSERT），提交后唤醒后台合并"""
+    today = timezone.localtime(timezone.now()).date()
+    deltas = []
+    for name, date in set(before) | set(after):
+        delta = after.get((name, date), 0) - before.get((name, date), 0)
+        # 过去日期的分桶不再展示，无需维护
+        if delta and (date is None or date == today):
+            deltas.append(DashboardCounterDelta(key=_counter_key(name, date), delta=delta))
+    if deltas:
+        DashboardCounterDelta.objects.bulk_create(deltas)
+        transaction.on_commit(schedule_rebuild)
+
+
+def _lock_merge():
+    """获取合并/重建互斥锁（需在事务中调用），只有合并和重建会等待"""
+    DashboardCounter.objects.bulk_create([DashboardCounter(key=MERGE_LOCK_KEY)], ignore_conflicts=True)
+    list(DashboardCounter.objects.select_for_update().filter(key=MERGE_LOCK_KEY).values_list('pk'))
+
+
+def current_keys() -> list:
+    today = timezone.localtime(timezone.now()).date()
+    return [_counter_key(name) for name in TOTAL_KEYS] + [_counter_key(name, today) for name in DAILY_KEYS]
+
+
+def merge_deltas() -> bool:
+    """
+    把已提交的增量合并进计数表
+
+    Returns:
+        bool: 计数是否完整（缺失时需要重建）
+    """
+    keys = current_keys()
+    with transaction.atomic():
+        _lock_merge()
+        rows = list(DashboardCounterDelta.objects.values_list('pk', 'key', 'delta'))
+        existing = set(DashboardCounter.objects.filter(key__in=keys).values_list('key', flat=True))
+        totals = Counter()
+        merged = []
+        for pk, key, delta in rows:
+            if key in existing:
+                totals[key] += delta
+                merged.append(pk)
+            elif key not in keys:
+                # 过去日期的分桶，丢弃
+                merged.append(pk)
+        groups = defaultdict(list)
+        for key, delta in totals.items():
+            if delta:
+                groups[delta].append(key)
+        now = timezone.now()
+        for delta, group_keys in groups.items():
+            DashboardCounter.objects.filter(key__in=group_keys).update(value=F('value') + delta, updated_at=now)
+        if merged:
+            DashboardCounterDelta.objects.filter(pk__in=merged).delete()
+    return len(existing) == len(keys)
+
+
+# ---------- 全量计算 ----------
+
+def compute_live() -> dict:
+    """实时统计全部仪表盘数据（金额单位：分）"""
+    now = timezone.localtime(timezone.now())
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+
+    total_revenue = Order.objects.filter(
+        status__in=VALID_ORDER_STATUSES
+    ).aggregate(total=Sum('pay_amount'))['total']
+    today_revenue = Order.objects.filter(
+        created_at__range=(today_start, today_end),
+        status__in=VALID_ORDER_STATUSES
+    ).aggregate(total=Sum('pay_amount'))['total']
+
+    return {
+        'total_users': User.objects.filter(is_admin=False).count(),
+        'total_products': Product.objects.filter(is_active=True).count(),
+        'total_orders': Order.objects.count(),
+        'total_revenue': _cents(total_revenue),
+        'today_orders': Order.objects.filter(created_at__range=(today_start, today_end)).count(),
+        'today_revenue': _cents(today_revenue),
+        'today_users': User.objects.filter(date_joined__range=(today_start, today_end)).count(),
+        'pending_orders': Order.objects.filter(status='paid').count(),
+        'pending_feedbacks': Feedback.objects.filter(status='pending').count(),
+        'low_stock': Product.objects.filter(stock__lt=LOW_STOCK_THRESHOLD, is_active=True).count(),
+    }
+
+
+def rebuild() -> dict:
+    """全量重建计数表"""
+    keys = current_keys()
+    with transaction.atomic():
+        _lock_merge()
+        # 先记下已提交的增量（它们已包含在下面的实时统计中），统计不加锁
+        counted = list(DashboardCounterDelta.objects.values_list('pk', flat=True))
+        values = compute_live()
+        data = dict(zip(keys, [values[name] for name in TOTAL_KEYS + DAILY_KEYS]))
+        now = timezone.now()
+        # 过去日期的分桶不再需要
+        DashboardCounter.objects.exclude(key__in=keys + [MERGE_LOCK_KEY]).delete()
+        DashboardCounter.objects.bulk_create([DashboardCounter(key=key) for key in keys], ignore_conflicts=True)
+        for key, value in data.items():
+            DashboardCounter.objects.filter(key=key).update(value=value, updated_at=now)
+        DashboardCounterDelta.objects.filter(pk__in=counted).delete()
+    return values
+
+
+def get_snapshot():
+    """
+    读取计数（一条查询：计数行和尚未合并的增量之和）
+
+    Returns:
+        tuple | None: (values, 最后更新时间)，缺失时返回 None
+    """
+    today = timezone.localtime(timezone.now()).date()
+    keys = {name: _counter_key(name) for name in TOTAL_KEYS}
+    keys.update({name: _counter_key(name, today) for name in DAILY_KEYS})
+    key_list = list(keys.values())
+    rows = list(DashboardCounter.objects.filter(key__in=key_list).annotate(
+        source=Value(0)
+    ).values_list('source', 'key', 'value', 'updated_at').union(
+        DashboardCounterDelta.objects.filter(key__in=key_list).values('key').annotate(
+            source=Value(1), total=Sum('delta'), latest=Max('created_at')
+        ).values_list('source', 'key', 'total', 'latest'),
+        all=True
+    ))
+    counters = {key: (value, updated_at) for source, key, value, updated_at in rows if source == 0}
+    if any(key not in counters for key in key_list):
+        return None
+    values = {name: counters[key][0] for name, key in keys.items()}
+    updated = [updated_at for _, updated_at in counters.values()]
+    pending = {key: (total, latest) for source, key, total, latest in rows if source == 1}
+    for name, key in keys.items():
+        if key in pending:
+            values[name] += pending[key][0]
+            updated.append(pending[key][1])
+    return values, max(updated)
+
+
+def to_response(values: dict) -> dict:
+    """转换为接口返回格式"""
+    return {
+        'overview': {
+            'total_users': values['total_users'],
+            'total_products': values['total_products'],
+            'total_orders': values['total_orders'],
+            'total_revenue': values['total_revenue'] / 100,
+        },
+        'today': {
+            'orders': values['today_orders'],
+            'revenue': values['today_revenue'] / 100,
+            'new_users': values['today_users'],
+        },
+        'pending': {
+            'orders': values['pending_orders'],
+            'feedbacks': values['pending_feedbacks'],
+            'low_stock': values['low_stock'],
+        }
+    }
+
+
+# ---------- 后台重建 ----------
+
+_worker = None
+_worker_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def schedule_rebuild() -> None:
+    """唤醒后台合并增量（计数缺失时重建），短时间内的多次唤醒会合并"""
+    _ensure_worker()
+    _wakeup.set()
+
+
+def _run_worker():
+    config = get_config()
+    while True:
+        _wakeup.wait()
+        # 等待片刻，合并同一批变更触发的唤醒
+        _wakeup.clear()
+        time.sleep(config['DEBOUNCE'])
+        _wakeup.clear()
+        try:
+            if not merge_deltas():
+                rebuild()
+        except Exception:
+            logger.exception('仪表盘计数合并/重建失败')
+        finally:
+            close_old_connections()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run_worker, name='dashboard-rebuild', daemon=True)
+            _worker.start()
@@ -0,0 +1,75 @@
+"""
+统计模块 - HyperLogLog 基数估计
+
+用于长时间窗口的去重用户数（如月活）：每日保存一个草图，
+任意日期范围的去重数 = 合并这些草图后估算，无需扫描原始日志。
+"""
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """HyperLogLog 草图，寄存器以 bytes 形式存取"""
+
+    def __init__(self, precision: int = 11, registers: bytes = None):
+        """
+        Args:
+            precision: 精度 p，寄存器数 m = 2^p，标准误差约 1.04 / sqrt(m)
+            registers: 已有寄存器数据
+        """
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is not None:
+            if len(registers) != self.m:
+                raise ValueError('寄存器长度与精度不匹配')
+            self.registers = bytearray(registers)
+        else:
+            self.registers = bytearray(self.m)
+
+    def add(self, value) -> None:
+        """加入一个元素"""
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """合并另一个草图（取寄存器最大值）"""
+        if other.precision != self.precision:
+            raise ValueError('精度不同的草图不能合并')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    @classmethod
+    def union(cls, sketches) -> 'HyperLogLog':
+        """一次合并多个草图，比逐个 merge 快得多"""
+        sketches = list(sketches)
+        if not sketches:
+            raise ValueError('至少需要一个草图')
+        precision = sketches[0].precision
+        if any(sketch.precision != precision for sketch in sketches):
+            raise ValueError('精度不同的草图不能合并')
+        if len(sketches) == 1:
+            return cls(precision, sketches[0].registers)
+        return cls(precision, bytes(map(max, *(sketch.registers for sketch in sketches))))
+
+    def count(self) -> int:
+        """估算去重元素个数"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # 小基数修正
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        return cls(precision=int(math.log2(len(data))), registers=data)
@@ -0,0 +1,27 @@
+"""
+重建每日销售汇总
+
+用法: python manage.py rebuild_daily_sales [--days 365]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.statistics.rollups import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = '根据订单数据重新计算每日销售汇总表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='只重建最近N天，默认全部')
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['days']:
+            today = timezone.localtime(timezone.now()).date()
+            start_date = today - timedelta(days=options['days'] - 1)
+
+        count = rebuild_daily_sales(start_date=start_date)
+        self.stdout.write(self.style.SUCCESS(f'每日销售汇总重建完成: {count} 天'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActiveUsers',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='日期')),
+                ('count', models.IntegerField(default=0, verbose_name='去重登录用户数')),
+                ('sketch', models.BinaryField(verbose_name='HyperLogLog草图')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '每日活跃用户',
+                'verbose_name_plural': '每日活跃用户',
+                'db_table': 'daily_active_users',
+                'ordering': ['date'],
+            },
+        ),
+    ]
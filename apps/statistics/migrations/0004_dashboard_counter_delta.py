@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistics', '0003_dashboard_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounterDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='计数键')),
+                ('delta', models.BigIntegerField(verbose_name='增量')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '仪表盘计数增量',
+                'verbose_name_plural': '仪表盘计数增量',
+                'db_table': 'dashboard_counter_deltas',
+            },
+        ),
+    ]
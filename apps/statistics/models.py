@@ -1,2 +1,69 @@
-# apps/statistics/models.py
-# 统计模块不需要单独的模型，使用其他模块的数据进行聚合统计
+"""
+统计模块 - 数据模型
+统计主要基于其他模块的数据聚合，这里只保存增量维护的汇总表
+"""
+from django.db import models
+
+
+class DailySales(models.Model):
+    """每日销售汇总（按店铺本地日期）"""
+    date = models.DateField('日期', unique=True)
+    revenue = models.DecimalField('销售额', max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField('订单数', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'daily_sales'
+        verbose_name = '每日销售汇总'
+        verbose_name_plural = verbose_name
+        ordering = ['date']
+
+    def __str__(self):
+        return f'{self.date} - {self.revenue}'
+
+
+class DailyActiveUsers(models.Model):
+    """每日活跃（登录）用户汇总，只保存已结束的日期"""
+    date = models.DateField('日期', unique=True)
+    count = models.IntegerField('去重登录用户数', default=0)
+    sketch = models.BinaryField('HyperLogLog草图')
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+
+    class Meta:
+        db_table = 'daily_active_users'
+        verbose_name = '每日活跃用户'
+        verbose_name_plural = verbose_name
+        ordering = ['date']
+
+    def __str__(self):
+        return f'{self.date} - {self.count}'
+
+
+class DashboardCounter(models.Model):
+    """仪表盘计数（增量维护，金额以分为单位；按日期分桶的计数键名带日期）"""
+    key = models.CharField('计数键', max_length=64, unique=True)
+    value = models.BigIntegerField('计数', default=0)
+    updated_at = models.DateTimeField('更新时间', auto_now=True)
+
+    class Meta:
+        db_table = 'dashboard_counters'
+        verbose_name = '仪表盘计数'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.key} = {self.value}'
+
+
+class DashboardCounterDelta(models.Model):
+    """仪表盘计数增量（只追加，后台合并进 DashboardCounter 后删除）"""
+    key = models.CharField('计数键', max_length=64)
+    delta = models.BigIntegerField('增量')
+    created_at = models.DateTimeField('创建时间', auto_now_add=True)
+
+    class Meta:
+        db_table = 'dashboard_counter_deltas'
+        verbose_name = '仪表盘计数增量'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.key} {self.delta:+d}'
@@ -0,0 +1,157 @@
+"""
+统计模块 - 每日销售汇总
+
+订单进入/离开有效状态时（见 signals.py）增量更新 DailySales，
+长时间窗口的销售统计只需按日期范围读取汇总表。
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order
+from .models import DailySales
+
+# 计入销售额的订单状态
+VALID_ORDER_STATUSES = ['paid', 'shipped', 'delivered', 'completed']
+
+
+def shop_tzinfo():
+    """
+    店铺时区（固定偏移）
+
+    使用当前本地时区的 UTC 偏移构造固定偏移时区，数据库按 '+08:00' 形式换算，
+    MySQL 未导入时区表时 TruncDate 也能正常工作。
+    """
+    offset = timezone.localtime(timezone.now()).utcoffset() or timedelta(0)
+    return dt_timezone(offset)
+
+
+def local_day_range(start_date, end_date):
+    """本地日期区间对应的起止时间 [start, end)"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()), tz)
+    return start, end
+
+
+def daily_sales_live(start_date, end_date) -> dict:
+    """
+    直接在数据库中按本地日期分组统计销售额
+
+    Returns:
+        dict: {date: {'revenue': Decimal, 'count': int}}
+    """
+    start, end = local_day_range(start_date, end_date)
+    rows = Order.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end,
+        status__in=VALID_ORDER_STATUSES
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=shop_tzinfo())
+    ).values('day').annotate(
+        revenue=Sum('pay_amount'),
+        count=Count('id')
+    ).order_by('day')
+    return {
+        row['day']: {'revenue': row['revenue'] or Decimal('0'), 'count': row['count']}
+        for row in rows
+    }
+
+
+def daily_sales_rollup(start_date, end_date) -> dict:
+    """
+    从汇总表读取每日销售额
+
+    Returns:
+        dict: {date: {'revenue': Decimal, 'count': int}}
+    """
+    rows = DailySales.objects.filter(
+        date__gte=start_date, date__lte=end_date
+    ).values('date', 'revenue', 'order_count')
+    return {
+        row['date']: {'revenue': row['revenue'], 'count': row['order_count']}
+        for row in rows
+    }
+
+
+def order_contribution(order):
+    """
+    订单对汇总表的贡献 (本地日期, 实付金额)，非有效状态返回 None
+
+    Args:
+        order: 订单
+    """
+    status = order.__dict__.get('status')
+    created_at = order.__dict__.get('created_at')
+    if status not in VALID_ORDER_STATUSES or created_at is None:
+        return None
+    return timezone.localtime(created_at).date(), order.__dict__.get('pay_amount') or Decimal('0')
+
+
+def apply_sales_delta(date, revenue, count: int) -> None:
+    """增量更新某日汇总"""
+    updated = DailySales.objects.filter(date=date).update(
+        revenue=F('revenue') + revenue,
+        order_count=F('order_count') + count,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailySales.objects.create(date=date, revenue=revenue, order_count=count)
+    except IntegrityError:
+        # 并发创建，改为更新
+        DailySales.objects.filter(date=date).update(
+            revenue=F('revenue') + revenue,
+            order_count=F('order_count') + count,
+        )
+
+
+def sync_order_sales(before, after) -> None:
+    """
+    根据订单变更前后的贡献更新汇总
+
+    Args:
+        before: 变更前 order_contribution
+        after: 变更后 order_contribution
+    """
+    if before == after:
+        return
+    if before:
+        apply_sales_delta(before[0], -before[1], -1)
+    if after:
+        apply_sales_delta(after[0], after[1], 1)
+
+
+def rebuild_daily_sales(start_date=None, end_date=None) -> int:
+    """
+    按订单数据重建汇总表
+
+    Args:
+        start_date: 起始日期，默认最早订单
+        end_date: 结束日期，默认今天
+
+    Returns:
+        int: 写入的天数
+    """
+    if start_date is None:
+        first = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        if first is None:
+            DailySales.objects.all().delete()
+            return 0
+        start_date = timezone.localtime(first).date()
+    if end_date is None:
+        end_date = timezone.localtime(timezone.now()).date()
+
+    sales = daily_sales_live(start_date, end_date)
+    with transaction.atomic():
+        DailySales.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+        DailySales.objects.bulk_create([
+            DailySales(date=date, revenue=item['revenue'], order_count=item['count'])
+            for date, item in sales.items()
+        ])
+    return len(sales)
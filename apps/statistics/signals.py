@@ -0,0 +1,74 @@
+"""
+统计模块 - 信号处理
+"""
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.feedback.models import Feedback
+from apps.orders.models import Order
+from apps.products.models import Product
+from apps.products.signals import stock_changed
+from apps.users.models import User
+from . import dashboard
+from .rollups import order_contribution, sync_order_sales
+
+
+@receiver(post_init, sender=Order)
+def remember_order_sales(sender, instance, **kwargs):
+    """记录订单加载时对销售汇总的贡献"""
+    instance._sales_contribution = order_contribution(instance)
+
+
+@receiver(post_save, sender=Order)
+def update_daily_sales(sender, instance, **kwargs):
+    """订单状态/金额变化时更新每日销售汇总"""
+    after = order_contribution(instance)
+    sync_order_sales(getattr(instance, '_sales_contribution', None), after)
+    instance._sales_contribution = after
+
+
+@receiver(post_delete, sender=Order)
+def remove_daily_sales(sender, instance, **kwargs):
+    """删除订单时从每日销售汇总中扣除"""
+    sync_order_sales(getattr(instance, '_sales_contribution', None), None)
+
+
+def track_dashboard(model, contribution):
+    """
+    跟踪模型实例对仪表盘计数的贡献：加载时记录，保存/删除时追加差异增量（后台合并）
+
+    Args:
+        model: 模型类
+        contribution: 计算实例贡献的函数
+    """
+    def remember(sender, instance, **kwargs):
+        instance._dashboard_contribution = contribution(instance)
+
+    def saved(sender, instance, **kwargs):
+        after = contribution(instance)
+        dashboard.apply_changes(instance._dashboard_contribution, after)
+        instance._dashboard_contribution = after
+
+    def deleted(sender, instance, **kwargs):
+        dashboard.apply_changes(instance._dashboard_contribution, dashboard.Counter())
+
+    uid = f'dashboard_{model._meta.label_lower}'
+    post_init.connect(remember, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
+
+
+track_dashboard(Order, dashboard.order_contribution)
+track_dashboard(User, dashboard.user_contribution)
+track_dashboard(Feedback, dashboard.feedback_contribution)
+track_dashboard(Product, dashboard.product_contribution)
+
+
+@receiver(stock_changed, sender=Product)
+def update_dashboard_stock(sender, changes, **kwargs):
+    """批量扣减/恢复库存后更新低库存计数"""
+    before, after = dashboard.Counter(), dashboard.Counter()
+    for product_id, is_active, old_stock, new_stock in changes:
+        before.update(dashboard.stock_contribution(is_active, old_stock))
+        after.update(dashboard.stock_contribution(is_active, new_stock))
+    dashboard.apply_changes(before, after)
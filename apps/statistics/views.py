@@ -13,6 +13,13 @@ from apps.products.models import Product, Category
 from apps.orders.models import Order, OrderItem
 from apps.comments.models import Comment
 from apps.feedback.models import Feedback
+from apps.common.transport import transport_stats
+from . import dashboard
+from .counters import flush_all, pending_counts
+from .active_users import (
+    APPROX_MIN_DAYS, active_users_approx, daily_active_exact, monthly_active_exact
+)
+from .rollups import daily_sales_live, daily_sales_rollup, local_day_range, shop_tzinfo
 
 
 class DashboardView(views.APIView):
@@ -20,59 +27,16 @@ class DashboardView(views.APIView):
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request):
-        now = timezone.now()
-        # Ensure we have timezone aware datetimes for the range
-        today_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
-        today_end = today_start + timedelta(days=1)
-        
-        # Convert back to UTC for database query if necessary, or let Django handle aware datetimes
-        # Using accurate range query is safer than __date
-        
-        # 基本统计
-        total_users = User.objects.filter(is_admin=False).count()
-        total_products = Product.objects.filter(is_active=True).count()
-        total_orders = Order.objects.count()
-        total_revenue = Order.objects.filter(
-            status__in=['paid', 'shipped', 'delivered', 'completed']
-        ).aggregate(total=Sum('pay_amount'))['total'] or 0
-        
-        # 今日统计
-        today_orders = Order.objects.filter(
-            created_at__range=(today_start, today_end)
-        ).count()
-        
-        today_revenue = Order.objects.filter(
-            created_at__range=(today_start, today_end),
-            status__in=['paid', 'shipped', 'delivered', 'completed']
-        ).aggregate(total=Sum('pay_amount'))['total'] or 0
-        
-        today_users = User.objects.filter(
-            date_joined__range=(today_start, today_end)
-        ).count()
-        
-        # 待处理事项
-        pending_orders = Order.objects.filter(status='paid').count()
-        pending_feedbacks = Feedback.objects.filter(status='pending').count()
-        low_stock_products = Product.objects.filter(stock__lt=10, is_active=True).count()
-        
-        return Response({
-            'overview': {
-                'total_users': total_users,
-                'total_products': total_products,
-                'total_orders': total_orders,
-                'total_revenue': float(total_revenue),
-            },
-            'today': {
-                'orders': today_orders,
-                'revenue': float(today_revenue),
-                'new_users': today_users,
-            },
-            'pending': {
-                'orders': pending_orders,
-                'feedbacks': pending_feedbacks,
-                'low_stock': low_stock_products,
-            }
-        })
+        # fresh=1 时实时统计，否则读取增量维护的快照
+        if request.query_params.get('fresh') != '1':
+            snapshot = dashboard.get_snapshot()
+            if snapshot is not None:
+                values, built_at = snapshot
+                return Response({**dashboard.to_response(values), 'snapshot_at': built_at})
+            # 快照缺失，后台重建，本次实时统计
+            dashboard.schedule_rebuild()
+
+        return Response({**dashboard.to_response(dashboard.compute_live()), 'snapshot_at': None})
 
 
 class SalesStatisticsView(views.APIView):
@@ -87,48 +51,22 @@ class SalesStatisticsView(views.APIView):
         today = now.date()
         start_date = today - timedelta(days=days-1)
 
-        # 转换为时间范围
-        start_datetime = timezone.make_aware(
-            datetime.combine(start_date, datetime.min.time()),
-            timezone.get_current_timezone()
-        )
-        end_datetime = timezone.make_aware(
-            datetime.combine(today, datetime.max.time()),
-            timezone.get_current_timezone()
-        )
-
-        # 每日销售额 - 使用时间范围查询
-        valid_orders = Order.objects.filter(
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime,
-            status__in=['paid', 'shipped', 'delivered', 'completed']
-        )
-
-        # 按日期分组统计
-        sales_dict = {}
-        for order in valid_orders:
-            order_date = timezone.localtime(order.created_at).date()
-            if order_date not in sales_dict:
-                sales_dict[order_date] = {'revenue': 0, 'count': 0}
-            sales_dict[order_date]['revenue'] += float(order.pay_amount or 0)
-            sales_dict[order_date]['count'] += 1
+        # 每日销售额 - 默认读取每日汇总表，fresh=1 时直接按本地日期分组实时统计
+        if request.query_params.get('fresh') == '1':
+            sales_dict = daily_sales_live(start_date, today)
+        else:
+            sales_dict = daily_sales_rollup(start_date, today)
 
         # 生成完整的日期范围数据
         daily_sales = []
         for i in range(days):
             date = start_date + timedelta(days=i)
-            if date in sales_dict:
-                daily_sales.append({
-                    'date': date.strftime('%m-%d'),
-                    'revenue': sales_dict[date]['revenue'],
-                    'count': sales_dict[date]['count']
-                })
-            else:
-                daily_sales.append({
-                    'date': date.strftime('%m-%d'),
-                    'revenue': 0,
-                    'count': 0
-                })
+            item = sales_dict.get(date, {'revenue': 0, 'count': 0})
+            daily_sales.append({
+                'date': date.strftime('%m-%d'),
+                'revenue': float(item['revenue']),
+                'count': item['count']
+            })
 
         # 分类销售占比
         category_sales = OrderItem.objects.filter(
@@ -194,56 +132,50 @@ class UserStatisticsView(views.APIView):
         today = now.date()
         start_date = today - timedelta(days=days-1)
         
-        start_dt = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        start_dt, end_dt = local_day_range(start_date, today)
 
         # 1. 每日新增用户
         new_users_qs = User.objects.filter(
             date_joined__gte=start_dt,
+            date_joined__lt=end_dt,
             is_admin=False
-        ).values('date_joined')
-        
-        daily_new_users = {}
-        for u in new_users_qs:
-            local_dt = timezone.localtime(u['date_joined'])
-            date_str = local_dt.strftime('%Y-%m-%d')
-            daily_new_users[date_str] = daily_new_users.get(date_str, 0) + 1
-
-        # 2. 每日登录用户
-        logins_qs = UserLog.objects.filter(
-            created_at__gte=start_dt,
-            action='login'
-        ).values('created_at', 'user_id')
-        
-        daily_logins = {}
-        seen_logins = set()
-        
-        for log in logins_qs:
-            local_dt = timezone.localtime(log['created_at'])
-            date_str = local_dt.strftime('%Y-%m-%d')
-            key = (date_str, log['user_id'])
-            
-            if key not in seen_logins:
-                seen_logins.add(key)
-                daily_logins[date_str] = daily_logins.get(date_str, 0) + 1
+        ).annotate(
+            day=TruncDate('date_joined', tzinfo=shop_tzinfo())
+        ).values('day').annotate(count=Count('id')).order_by()
+        daily_new_users = {row['day']: row['count'] for row in new_users_qs}
+
+        # 2. 每日/每月登录用户（去重）
+        # 超过90天的窗口可传 approx=1，读取每日汇总并用 HyperLogLog 估算月活
+        approx = days > APPROX_MIN_DAYS and request.query_params.get('approx') == '1'
+        if approx:
+            daily_logins, monthly_logins = active_users_approx(start_date, today)
+        else:
+            daily_logins = daily_active_exact(start_date, today)
+            monthly_logins = monthly_active_exact(start_date, today)
 
         # 3. 组装结果
         result_daily_users = []
         result_daily_logins = []
-        
+
         for i in range(days):
             current_date = start_date + timedelta(days=i)
             date_key = current_date.strftime('%Y-%m-%d')
-            
+
             result_daily_users.append({
                 'date': date_key,
-                'count': daily_new_users.get(date_key, 0)
+                'count': daily_new_users.get(current_date, 0)
             })
-            
+
             result_daily_logins.append({
                 'date': date_key,
-                'count': daily_logins.get(date_key, 0)
+                'count': daily_logins.get(current_date, 0)
             })
-        
+
+        result_monthly_logins = [
+            {'month': month, 'count': count}
+            for month, count in sorted(monthly_logins.items())
+        ]
+
         # 用户订购行为
         user_orders = Order.objects.filter(
             status__in=['paid', 'shipped', 'delivered', 'completed']
@@ -255,5 +187,29 @@ class UserStatisticsView(views.APIView):
         return Response({
             'daily_users': result_daily_users,
             'daily_logins': result_daily_logins,
+            'monthly_logins': result_monthly_logins,
+            'approx': approx,
             'top_buyers': list(user_orders),
         })
+
+
+class CounterStatusView(views.APIView):
+    """计数器写缓冲状态"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """各计数器待写回的增量数"""
+        return Response({'pending': pending_counts()})
+
+    def post(self, request):
+        """立即写回"""
+        return Response({'flushed': flush_all(), 'pending': pending_counts()})
+
+
+class TransportStatusView(views.APIView):
+    """第三方接口调用统计"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """处理本请求的进程内，各主机的调用次数、失败数、耗时和熔断状态"""
+        return Response({'transports': transport_stats()})
@@ -0,0 +1,31 @@
+"""
+生成周期购当天的配送记录
+
+用法:
+    python manage.py schedule_subscription_deliveries                    # 今天（适合 cron 每天凌晨执行）
+    python manage.py schedule_subscription_deliveries --date 2026-02-01  # 指定日期，重复执行不会重复生成
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.subscriptions.services import schedule_deliveries
+
+
+class Command(BaseCommand):
+    help = '为到期的配送中订阅批量生成配送记录，并推进下次配送日期'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None, help='配送日期 (YYYY-MM-DD)，默认今天')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='每批处理的订阅数')
+
+    def handle(self, *args, **options):
+        date = None
+        if options['date']:
+            try:
+                date = parse_date(options['date'])
+            except ValueError:
+                date = None
+            if date is None:
+                raise CommandError('日期格式不正确，应为 YYYY-MM-DD')
+        stats = schedule_deliveries(date, options['chunk_size'])
+        self.stdout.write(f"生成配送 {stats['scheduled']} 期，其中最后一期 {stats['last_period']} 单")
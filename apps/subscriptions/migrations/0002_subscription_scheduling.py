@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:43
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_scheduled_count(apps, schema_editor):
+    """已有订阅按已配送期数作为已排期期数"""
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+    Subscription.objects.update(scheduled_count=F('delivered_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='scheduled_count',
+            field=models.IntegerField(default=0, verbose_name='已排期期数'),
+        ),
+        migrations.RunPython(backfill_scheduled_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['status', 'next_delivery_date'], name='subscription_due_idx'),
+        ),
+    ]
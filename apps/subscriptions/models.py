@@ -43,6 +43,7 @@ class Subscription(models.Model):
     quantity = models.IntegerField('每次数量', default=1)
     total_periods = models.IntegerField('总期数', default=12)
     delivered_count = models.IntegerField('已配送期数', default=0)
+    scheduled_count = models.IntegerField('已排期期数', default=0)
 
     # 价格信息
     period_price = models.DecimalField('每期价格', max_digits=10, decimal_places=2)
@@ -69,6 +70,10 @@ class Subscription(models.Model):
         verbose_name = '周期购订阅'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            # 配送排期按状态和下次配送日期查询到期订阅
+            models.Index(fields=['status', 'next_delivery_date'], name='subscription_due_idx'),
+        ]
 
     def __str__(self):
         return self.subscription_no
@@ -25,12 +25,12 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'subscription_no', 'user', 'product', 'product_name', 'product_image',
             'frequency', 'frequency_display', 'quantity', 'total_periods',
-            'delivered_count', 'period_price', 'total_price',
+            'delivered_count', 'scheduled_count', 'period_price', 'total_price',
             'receiver_name', 'receiver_phone', 'receiver_address',
             'start_date', 'next_delivery_date', 'status', 'status_display',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['subscription_no', 'delivered_count', 'created_at', 'updated_at']
+        read_only_fields = ['subscription_no', 'delivered_count', 'scheduled_count', 'created_at', 'updated_at']
 
     def get_product(self, obj):
         if obj.product:
@@ -55,3 +55,12 @@ class SubscriptionCreateSerializer(serializers.Serializer):
     receiver_name = serializers.CharField(max_length=50, required=False)
     receiver_phone = serializers.CharField(max_length=11, required=False)
     receiver_address = serializers.CharField(required=False)
+
+
+class SubscriptionBatchConfirmSerializer(serializers.Serializer):
+    """批量确认配送序列化器"""
+    subscription_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=1000
+    )
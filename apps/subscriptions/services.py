@@ -0,0 +1,300 @@
+"""
+周期购配送排期与配送确认
+
+每天（python manage.py schedule_subscription_deliveries）为到期的配送中订阅批量生成当天的配送记录，
+并批量推进下次配送日期和已排期期数。同一天重复执行不会重复生成：已排期的订阅下次配送日期已推进；
+并发执行时由 (订阅, 配送日期) 唯一约束和带条件的 UPDATE 兜底。
+
+确认配送按期进行：配送员扫码送达时每条配送记录确认一期（confirm_record_deliveries）；
+手动确认（单个或批量）每个订阅确认一期，并把该订阅最早一条未送达的配送记录标记为已送达，
+同一期不会既被手动确认又被扫码确认。订阅加锁后按结果分组用 F() UPDATE 增加已配送期数，
+每个用户用一条 F() UPDATE 增加积分，积分记录批量插入。
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.delivery.models import DeliveryRecord
+from apps.delivery.stats import apply_changes, contribution
+from apps.users.models import PointsRecord, User
+from .models import Subscription
+
+# 配送频率对应的间隔天数
+FREQUENCY_DAYS = {
+    'daily': 1,
+    'weekly': 7,
+    'biweekly': 14,
+    'monthly': 30,
+}
+DEFAULT_FREQUENCY_DAYS = 7
+
+# 可以确认配送的订阅状态：已排期的配送记录在订阅暂停后仍可送达
+CONFIRMABLE_STATUSES = {
+    'manual': {'active'},
+    'record': {'active', 'paused'},
+}
+
+
+def frequency_days(frequency: str) -> int:
+    return FREQUENCY_DAYS.get(frequency, DEFAULT_FREQUENCY_DAYS)
+
+
+def due_subscriptions(date):
+    """到期（含错过排期）的配送中订阅"""
+    return Subscription.objects.filter(status='active', next_delivery_date__lte=date)
+
+
+def schedule_deliveries(date=None, chunk_size: int = 2000) -> dict:
+    """
+    为到期订阅生成指定日期的配送记录
+
+    错过排期的订阅（例如暂停后恢复）在当天补送，下次配送日期从当天起算。
+
+    Args:
+        date: 配送日期，默认今天
+        chunk_size: 每批处理的订阅数
+
+    Returns:
+        dict: scheduled 生成的配送期数，last_period 排完最后一期的订阅数
+    """
+    date = date or timezone.localdate()
+    stats = {'scheduled': 0, 'last_period': 0}
+    last_id = 0
+    while True:
+        rows = list(
+            due_subscriptions(date).filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', 'frequency', 'scheduled_count', 'total_periods',
+                'receiver_name', 'receiver_phone', 'receiver_address'
+            )[:chunk_size]
+        )
+        if not rows:
+            return stats
+        last_id = rows[-1][0]
+        _schedule_chunk(date, rows, stats)
+
+
+def _schedule_chunk(date, rows, stats: dict) -> None:
+    records = []
+    # 下次配送日期 -> 订阅ID（None 表示本期是最后一期）
+    advances = defaultdict(list)
+    exhausted = []
+    for pk, frequency, scheduled_count, total_periods, name, phone, address in rows:
+        if scheduled_count >= total_periods:
+            exhausted.append(pk)
+            continue
+        records.append(DeliveryRecord(
+            subscription_id=pk,
+            period=scheduled_count + 1,
+            delivery_date=date,
+            receiver_name=name or '',
+            receiver_phone=phone or '',
+            receiver_address=address or ''
+        ))
+        is_last = scheduled_count + 1 >= total_periods
+        advances[None if is_last else date + timedelta(days=frequency_days(frequency))].append(pk)
+
+    now = timezone.now()
+    with transaction.atomic():
+        DeliveryRecord.objects.bulk_create(records, batch_size=1000, ignore_conflicts=True)
+        for next_date, pks in advances.items():
+            # 条件更新：并发执行时另一方已推进的订阅不会再次推进
+            updated = due_subscriptions(date).filter(pk__in=pks).update(
+                next_delivery_date=next_date,
+                scheduled_count=F('scheduled_count') + 1,
+                updated_at=now
+            )
+            stats['scheduled'] += updated
+            if next_date is None:
+                stats['last_period'] += updated
+        if exhausted:
+            due_subscriptions(date).filter(pk__in=exhausted).update(next_delivery_date=None, updated_at=now)
+
+
+def apply_delivery(subscription: Subscription) -> None:
+    """
+    确认一期配送完成后更新订阅（不保存）
+
+    配送排期已推进过下次配送日期的期数不再推进；未经排期（手动配送）的期数在此推进。
+    """
+    subscription.delivered_count += 1
+    if subscription.delivered_count >= subscription.total_periods:
+        # 所有期数配送完成
+        subscription.status = 'completed'
+        subscription.next_delivery_date = None
+    elif subscription.scheduled_count < subscription.delivered_count and subscription.next_delivery_date:
+        subscription.next_delivery_date += timedelta(days=frequency_days(subscription.frequency))
+    subscription.scheduled_count = max(subscription.scheduled_count, subscription.delivered_count)
+
+
+def delivery_points(subscription: Subscription) -> int:
+    """每期配送奖励积分 (1元=1积分，按每期价格计算，最低1积分)"""
+    return max(1, round(float(subscription.period_price)))
+
+
+def confirm_deliveries(subscription_ids, user=None) -> dict:
+    """
+    手动批量确认配送完成并发放积分（一个事务）
+
+    每个订阅确认一期；该订阅有已排期未送达的配送记录时，最早的一条同时标记为已送达，
+    之后配送员再扫码该记录不会重复确认。
+
+    Args:
+        subscription_ids: 订阅ID列表
+        user: 只确认该用户的订阅，默认不限
+
+    Returns:
+        dict: confirmed 确认成功的订阅 [{id, delivered_count, total_periods, points_earned, status}]，
+              failed 失败的订阅 [{id, error}]
+    """
+    subscription_ids = list(dict.fromkeys(subscription_ids))
+    now = timezone.now()
+    with transaction.atomic():
+        # 与配送员扫码相同，先锁配送记录再锁订阅，避免互相等待
+        open_records = {}
+        for pk, subscription_id, person_id, assigned_at, record_status in DeliveryRecord.objects.select_for_update().filter(
+            subscription_id__in=subscription_ids
+        ).exclude(status='delivered').order_by('pk').values_list(
+            'pk', 'subscription_id', 'delivery_person_id', 'assigned_at', 'status'
+        ):
+            open_records.setdefault(subscription_id, (pk, person_id, assigned_at, record_status))
+
+        confirmed, failed = _confirm_periods(
+            [(pk, pk) for pk in subscription_ids], CONFIRMABLE_STATUSES['manual'], now, user
+        )
+        results = []
+        for subscription, periods in confirmed.values():
+            results.append({
+                'id': subscription.pk,
+                'delivered_count': subscription.delivered_count,
+                'total_periods': subscription.total_periods,
+                'points_earned': delivery_points(subscription) * len(periods),
+                'status': subscription.status
+            })
+
+        records = [open_records[pk] for pk in confirmed if pk in open_records]
+        if records:
+            DeliveryRecord.objects.filter(pk__in=[record[0] for record in records]).update(
+                status='delivered', delivered_at=now
+            )
+            before, after = Counter(), Counter()
+            for _, person_id, assigned_at, record_status in records:
+                before.update(contribution(person_id, assigned_at, record_status))
+                after.update(contribution(person_id, assigned_at, 'delivered'))
+            apply_changes(before, after)
+
+    return {'confirmed': results, 'failed': failed}
+
+
+def confirm_record_deliveries(records) -> dict:
+    """
+    配送记录送达后确认对应的周期购期数（调用方已锁定配送记录并在同一事务中）
+
+    每条记录确认一期，同一订阅的多条记录（如补送和当天）分别确认。
+
+    Args:
+        records: (配送记录ID, 订阅ID)
+
+    Returns:
+        dict: confirmed 确认成功的配送记录ID，failed 失败的配送记录 [{id, error}]
+    """
+    confirmed, failed = _confirm_periods(
+        [(subscription_id, record_id) for record_id, subscription_id in records],
+        CONFIRMABLE_STATUSES['record'], timezone.now()
+    )
+    return {
+        'confirmed': [record_id for _, periods in confirmed.values() for record_id in periods],
+        'failed': failed,
+    }
+
+
+
+def _confirm_periods(entries, statuses, now, user=None):
+    """
+    确认配送期数、推进订阅并发放积分（需在事务中调用）
+
+    按订阅主键顺序加锁；每个订阅按结果分组用 F() UPDATE 增加已配送期数，
+    每个用户用一条 F() UPDATE 增加积分，积分记录（每期一条）批量插入。
+
+    Args:
+        entries: (订阅ID, 结果键)，每项确认一期
+        statuses: 可以确认的订阅状态
+
+    Returns:
+        tuple: ({订阅ID: (订阅, [确认成功的结果键])}, 失败的 [{id: 结果键, error}])
+    """
+    queryset = Subscription.objects.select_for_update().filter(
+        pk__in={subscription_id for subscription_id, _ in entries}
+    )
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    subscriptions = queryset.order_by('pk').in_bulk()
+
+    confirmed, failed = {}, []
+    # 订阅ID -> 确认前的 (已配送期数, 已排期期数)
+    original = {}
+    # 本次确认的各期积分记录：(订阅, 期数, 积分)
+    periods = []
+    for subscription_id, key in entries:
+        subscription = subscriptions.get(subscription_id)
+        if subscription is None:
+            failed.append({'id': key, 'error': '订阅不存在'})
+            continue
+        if subscription.status not in statuses:
+            failed.append({'id': key, 'error': '订阅状态不正确'})
+            continue
+        if subscription.delivered_count >= subscription.total_periods:
+            failed.append({'id': key, 'error': '所有期数已配送完成'})
+            continue
+        if subscription_id not in confirmed:
+            original[subscription_id] = (subscription.delivered_count, subscription.scheduled_count)
+            confirmed[subscription_id] = (subscription, [])
+        apply_delivery(subscription)
+        confirmed[subscription_id][1].append(key)
+        periods.append((subscription, subscription.delivered_count, delivery_points(subscription)))
+
+    # (状态, 下次配送日期, 已配送增量, 已排期增量) -> 订阅ID
+    groups = defaultdict(list)
+    user_points = defaultdict(int)
+    for subscription, keys in confirmed.values():
+        delivered, scheduled = original[subscription.pk]
+        groups[(
+            subscription.status, subscription.next_delivery_date,
+            subscription.delivered_count - delivered, subscription.scheduled_count - scheduled
+        )].append(subscription.pk)
+        user_points[subscription.user_id] += delivery_points(subscription) * len(keys)
+    for (new_status, next_date, delivered, scheduled), pks in groups.items():
+        Subscription.objects.filter(pk__in=pks).update(
+            delivered_count=F('delivered_count') + delivered,
+            scheduled_count=F('scheduled_count') + scheduled,
+            status=new_status,
+            next_delivery_date=next_date,
+            updated_at=now
+        )
+
+    # 每个用户一条 UPDATE 增加积分，再按更新后的余额倒推每条记录的余额
+    by_total = defaultdict(list)
+    for user_id, points in user_points.items():
+        by_total[points].append(user_id)
+    for points, user_ids in by_total.items():
+        User.objects.filter(pk__in=user_ids).update(points=F('points') + points)
+    balances = dict(User.objects.filter(pk__in=list(user_points)).values_list('pk', 'points'))
+    for user_id, points in user_points.items():
+        balances[user_id] -= points
+
+    records = []
+    for subscription, period, points in periods:
+        balances[subscription.user_id] += points
+        records.append(PointsRecord(
+            user_id=subscription.user_id,
+            type='earn',
+            source='subscription',
+            points=points,
+            balance=balances[subscription.user_id],
+            subscription=subscription,
+            remark=f'周期购配送奖励: {subscription.subscription_no} 第{period}期'
+        ))
+    PointsRecord.objects.bulk_create(records, batch_size=500)
+    return confirmed, failed
@@ -4,11 +4,10 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import transaction
-from datetime import timedelta
 from decimal import Decimal
 from .models import Subscription
-from .serializers import SubscriptionSerializer, SubscriptionCreateSerializer
+from .serializers import SubscriptionSerializer, SubscriptionCreateSerializer, SubscriptionBatchConfirmSerializer
+from .services import confirm_deliveries
 from apps.products.models import Product
 
 
@@ -101,57 +100,17 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
     def confirm_delivery(self, request, pk=None):
         """确认配送完成（每期配送完成时调用，增加积分）"""
         subscription = self.get_object()
-        if subscription.status != 'active':
-            return Response({'error': '订阅状态不正确'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if subscription.delivered_count >= subscription.total_periods:
-            return Response({'error': '所有期数已配送完成'}, status=status.HTTP_400_BAD_REQUEST)
-
-        with transaction.atomic():
-            # 更新配送次数
-            subscription.delivered_count += 1
-
-            # 计算下次配送日期
-            if subscription.delivered_count < subscription.total_periods:
-                frequency_days = {
-                    'daily': 1,
-                    'weekly': 7,
-                    'biweekly': 14,
-                    'monthly': 30,
-                }
-                days = frequency_days.get(subscription.frequency, 7)
-                subscription.next_delivery_date = subscription.next_delivery_date + timedelta(days=days)
-            else:
-                # 所有期数配送完成
-                subscription.status = 'completed'
-                subscription.next_delivery_date = None
-
-            subscription.save()
-
-            # 增加积分 (1元=1积分，按每期价格计算，最低1积分)
-            points_earned = max(1, round(float(subscription.period_price)))
-            user = subscription.user
-            user.points += points_earned
-            user.save()
-
-            # 记录积分变动
-            from apps.users.models import PointsRecord
-            PointsRecord.objects.create(
-                user=user,
-                type='earn',
-                source='subscription',
-                points=points_earned,
-                balance=user.points,
-                subscription=subscription,
-                remark=f'周期购配送奖励: {subscription.subscription_no} 第{subscription.delivered_count}期'
-            )
+        result = confirm_deliveries([subscription.pk], user=request.user)
+        if result['failed']:
+            return Response({'error': result['failed'][0]['error']}, status=status.HTTP_400_BAD_REQUEST)
 
+        confirmed = result['confirmed'][0]
         return Response({
             'message': '配送确认成功',
-            'delivered_count': subscription.delivered_count,
-            'total_periods': subscription.total_periods,
-            'points_earned': points_earned,
-            'status': subscription.status
+            'delivered_count': confirmed['delivered_count'],
+            'total_periods': confirmed['total_periods'],
+            'points_earned': confirmed['points_earned'],
+            'status': confirmed['status']
         })
 
 
@@ -179,57 +138,35 @@ class AdminSubscriptionViewSet(viewsets.ModelViewSet):
     def confirm_delivery(self, request, pk=None):
         """管理员确认配送完成（增加积分）"""
         subscription = self.get_object()
-        if subscription.status != 'active':
-            return Response({'error': '订阅状态不正确'}, status=status.HTTP_400_BAD_REQUEST)
+        result = confirm_deliveries([subscription.pk])
+        if result['failed']:
+            return Response({'error': result['failed'][0]['error']}, status=status.HTTP_400_BAD_REQUEST)
 
-        if subscription.delivered_count >= subscription.total_periods:
-            return Response({'error': '所有期数已配送完成'}, status=status.HTTP_400_BAD_REQUEST)
-
-        with transaction.atomic():
-            # 更新配送次数
-            subscription.delivered_count += 1
-
-            # 计算下次配送日期
-            if subscription.delivered_count < subscription.total_periods:
-                frequency_days = {
-                    'daily': 1,
-                    'weekly': 7,
-                    'biweekly': 14,
-                    'monthly': 30,
-                }
-                days = frequency_days.get(subscription.frequency, 7)
-                subscription.next_delivery_date = subscription.next_delivery_date + timedelta(days=days)
-            else:
-                # 所有期数配送完成
-                subscription.status = 'completed'
-                subscription.next_delivery_date = None
-
-            subscription.save()
+        confirmed = result['confirmed'][0]
+        return Response({
+            'message': '配送确认成功',
+            'delivered_count': confirmed['delivered_count'],
+            'total_periods': confirmed['total_periods'],
+            'points_earned': confirmed['points_earned'],
+            'status': confirmed['status']
+        })
 
-            # 增加积分 (1元=1积分，按每期价格计算，最低1积分)
-            points_earned = max(1, round(float(subscription.period_price)))
-            user = subscription.user
-            user.points += points_earned
-            user.save()
+    @action(detail=False, methods=['post'], url_path='batch-confirm-delivery')
+    def batch_confirm_delivery(self, request):
+        """
+        批量确认配送完成（增加积分）
 
-            # 记录积分变动
-            from apps.users.models import PointsRecord
-            PointsRecord.objects.create(
-                user=user,
-                type='earn',
-                source='subscription',
-                points=points_earned,
-                balance=user.points,
-                subscription=subscription,
-                remark=f'周期购配送奖励: {subscription.subscription_no} 第{subscription.delivered_count}期'
-            )
+        POST /admin/subscriptions/batch-confirm-delivery/
+        {"subscription_ids": [1, 2, 3]}
+        """
+        serializer = SubscriptionBatchConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        result = confirm_deliveries(serializer.validated_data['subscription_ids'])
         return Response({
-            'message': '配送确认成功',
-            'delivered_count': subscription.delivered_count,
-            'total_periods': subscription.total_periods,
-            'points_earned': points_earned,
-            'status': subscription.status
+            'message': f"确认配送 {len(result['confirmed'])} 单，失败 {len(result['failed'])} 单",
+            'points_earned': sum(item['points_earned'] for item in result['confirmed']),
+            **result
         })
 
     @action(detail=True, methods=['post'])
@@ -105,6 +105,9 @@ class UserLog(models.Model):
         verbose_name = '用户日志'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['action', 'created_at'], name='user_logs_action_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.action}'
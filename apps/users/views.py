@@ -13,7 +13,7 @@ from django.db import transaction
 from django.conf import settings
 import random
 import time
-import requests
+from apps.common.transport import get_transport
 from .models import User, UserAddress, UserLog, PointsRecord, MembershipPlan, MembershipOrder
 from .serializers import (
     UserSerializer, UserRegisterSerializer, UserLoginSerializer,
@@ -46,7 +46,8 @@ def get_wx_session(code):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        # code 只能使用一次，不做重试
+        response = get_transport(url).get(url, params=params, idempotent=False)
         data = response.json()
         if 'errcode' in data and data['errcode'] != 0:
             return {'error': data.get('errmsg', '微信登录失败')}
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+下单并发压测 - 对比逐条加锁扣库存（旧）与批量预占库存（新）
+
+用法:
+    python bench_checkout.py [--threads 8] [--orders 50] [--items 3] [--products 5]
+
+需连接 MySQL 运行（SQLite 不支持行锁）。脚本会创建临时用户和产品，结束后自动清理。
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+import django
+django.setup()
+
+from django.db import connection, connections, transaction
+from rest_framework import serializers
+
+from apps.orders.models import Order, OrderItem
+from apps.orders.services import reserve_stock, build_order_items, calculate_total
+from apps.products.models import Product
+from apps.users.models import User
+
+BENCH_PREFIX = '__bench_checkout__'
+
+
+class LockTimer:
+    """统计 SELECT ... FOR UPDATE 语句耗时（即等锁时间）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0.0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.queries += 1
+                if 'FOR UPDATE' in sql.upper():
+                    self.total += elapsed
+
+
+def legacy_checkout(user, items):
+    """旧实现：逐个产品加锁、逐条创建订单项、逐个保存产品"""
+    with transaction.atomic():
+        order = Order.objects.create(
+            user=user, receiver_name='压测', receiver_phone='13800000000',
+            receiver_address='压测地址', total_amount=0, pay_amount=0
+        )
+        total_amount = Decimal('0')
+        for item_data in items:
+            product = Product.objects.select_for_update().get(pk=item_data['product_id'])
+            quantity = item_data['quantity']
+            if product.stock < quantity:
+                raise serializers.ValidationError(f'库存不足: {product.name}')
+            OrderItem.objects.create(
+                order=order, product=product, product_name=product.name,
+                product_image='', price=product.price, quantity=quantity,
+                total_price=product.price * quantity
+            )
+            total_amount += product.price * quantity
+            product.stock -= quantity
+            product.sales_count += quantity
+            product.save()
+        order.total_amount = total_amount
+        order.pay_amount = total_amount
+        order.save()
+
+
+def batched_checkout(user, items):
+    """新实现：一次有序加锁 + 条件批量扣减 + bulk_create"""
+    with transaction.atomic():
+        reserved = reserve_stock(items)
+        total_amount = calculate_total(reserved)
+        order = Order.objects.create(
+            user=user, receiver_name='压测', receiver_phone='13800000000',
+            receiver_address='压测地址', total_amount=total_amount, pay_amount=total_amount
+        )
+        build_order_items(order, reserved)
+
+
+def random_cart(product_ids, size):
+    """随机购物车，打乱顺序以制造交叉加锁"""
+    chosen = random.sample(product_ids, min(size, len(product_ids)))
+    return [{'product_id': pk, 'quantity': random.randint(1, 3)} for pk in chosen]
+
+
+def run(name, checkout, user, product_ids, args):
+    timer = LockTimer()
+    errors = []
+
+    def worker(_):
+        try:
+            with connection.execute_wrapper(timer):
+                for _ in range(args.orders):
+                    try:
+                        checkout(user, random_cart(product_ids, args.items))
+                    except Exception as e:
+                        errors.append(type(e).__name__)
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(worker, range(args.threads)))
+    elapsed = time.perf_counter() - start
+
+    total = args.threads * args.orders
+    done = total - len(errors)
+    print(f'[{name}]')
+    print(f'  下单成功: {done}/{total}  失败: {len(errors)} {sorted(set(errors))}')
+    print(f'  耗时: {elapsed:.2f}s  吞吐: {done / elapsed:.1f} 单/秒')
+    print(f'  SQL 条数: {timer.queries}  平均每单: {timer.queries / max(total, 1):.1f}')
+    print(f'  等锁总时间: {timer.total * 1000:.0f}ms  平均每单: {timer.total * 1000 / max(total, 1):.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='下单并发压测')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--orders', type=int, default=50, help='每个线程的下单次数')
+    parser.add_argument('--items', type=int, default=3, help='每单商品种数')
+    parser.add_argument('--products', type=int, default=5, help='热点产品数量')
+    args = parser.parse_args()
+
+    user, _ = User.objects.get_or_create(username=BENCH_PREFIX)
+    products = [
+        Product.objects.create(name=f'{BENCH_PREFIX}{i}', price=Decimal('9.90'), stock=10 ** 8)
+        for i in range(args.products)
+    ]
+    product_ids = [p.pk for p in products]
+
+    try:
+        print(f'线程: {args.threads}  每线程下单: {args.orders}  每单商品: {args.items}  热点产品: {args.products}')
+        run('逐条加锁 (旧)', legacy_checkout, user, product_ids, args)
+        run('批量预占 (新)', batched_checkout, user, product_ids, args)
+    finally:
+        Order.objects.filter(user=user).delete()
+        Product.objects.filter(pk__in=product_ids).delete()
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
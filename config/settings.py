@@ -146,6 +146,73 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# 浏览量/点击量写缓冲 (apps/statistics/counters.py)
+COUNTER_BUFFER = {
+    'FLUSH_INTERVAL': 5,  # 秒
+    'FLUSH_THRESHOLD': 200,
+    # 多进程部署且要求进程被强制结束时不丢计数，改用 Redis 共享缓冲
+    # 'BACKEND': 'redis',
+    # 'REDIS_URL': 'redis://localhost:6379/0',
+}
+
+# 仪表盘快照 (apps/statistics/dashboard.py)
+DASHBOARD_SNAPSHOT = {
+    'DEBOUNCE': 2,  # 合并计数增量/重建前的等待时间（秒）
+}
+
+# 第三方接口 HTTP 传输 (apps/common/transport.py)
+HTTP_TRANSPORT = {
+    'CONNECT_TIMEOUT': 3,  # 秒
+    'READ_TIMEOUT': 10,  # 秒
+    'RETRIES': 2,
+    'FAILURE_THRESHOLD': 5,  # 连续失败多少次后熔断
+    'RECOVERY_TIMEOUT': 30,  # 熔断持续时间（秒）
+}
+
+# 物流轨迹轮询 (apps/express/tracking.py, python manage.py poll_express_traces)
+EXPRESS_TRACE_POLL = {
+    'BATCH_SIZE': 200,
+    'WORKERS': 8,  # 并发查询线程数
+    'CACHE_TTL': 600,  # 秒
+}
+
+# 批量发货 (apps/express/shipping.py)
+EXPRESS_SHIP_BATCH = {
+    'WORKERS': 8,  # 并发调用快递公司接口的线程数
+    'CHUNK_SIZE': 100,
+}
+
+# 配送路线规划 (apps/delivery/routing.py)
+DELIVERY_ROUTE = {
+    'DEPOT': (31.2035, 121.5914),  # 配送站坐标 (纬度, 经度)
+    'MAX_PASSES': 100,  # 2-opt 最多迭代轮数
+}
+
+# 配送员自动分配 (apps/delivery/assignment.py)
+DELIVERY_ASSIGNMENT = {
+    'MAX_LOAD': 200,  # 每名配送员每天最多配送单数
+    'FALLBACK_ANY': True,  # 无人覆盖的地址分给任意配送员
+}
+
+# 首页聚合数据缓存 (apps/products/home.py)
+HOME_BUNDLE = {
+    'TIMEOUT': 300,  # 最长缓存秒数
+    'LIMIT': 10,  # 热门/新品/推荐各返回的产品数
+}
+
+# 协同过滤推荐 (apps/products/recommender.py)，离线构建: python manage.py build_product_similarities
+PRODUCT_RECOMMENDER = {
+    'TOP_K': 20,  # 每个产品保存的相似产品数
+    'FAVORITE_WEIGHT': 0.5,  # 收藏相对购买的权重
+}
+
+# 模拟快递服务 (apps/express/services/mock.py)，压测时可注入延迟和失败
+EXPRESS_MOCK = {
+    'LATENCY_MS': (0, 0),  # 模拟延迟范围（毫秒）
+    'FAILURE_RATE': 0.0,
+    'CACHE_SIZE': 10000,
+}
+
 # 微信小程序配置
 WECHAT_MINI_PROGRAM = {
     'APP_ID': 'wxc36959075d178439',
@@ -69,6 +69,8 @@ const api = {
     resetPassword: (data) => request({ url: '/auth/reset-password/', method: 'POST', data }),
 
     // ========== 产品模块 ==========
+    // 首页聚合数据（广告、分类、热门、新品、推荐）
+    getHome: () => request({ url: '/home/' }),
     // 获取分类列表
     getCategories: () => request({ url: '/categories/' }),
     // 获取产品列表